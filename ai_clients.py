@@ -0,0 +1,48 @@
+"""
+Shared AI Provider Clients
+Async OpenAI-compatible clients used by every portal (Catalog, Parts, Home Products, Ask AI)
+"""
+
+import os
+import httpx
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Connection pool sizing - one pool per provider, shared by all in-flight requests
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", "100"))
+AI_MAX_KEEPALIVE = int(os.getenv("AI_MAX_KEEPALIVE", "20"))
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "120"))
+
+
+def _build_client(api_key: str, base_url: str = None) -> AsyncOpenAI:
+    """Create an async client with its own keep-alive connection pool."""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=AI_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_MAX_KEEPALIVE
+        ),
+        timeout=AI_REQUEST_TIMEOUT
+    )
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+
+
+# Initialize AI clients (one per provider, shared across portals)
+openai_client = _build_client(os.getenv("OPENAI_API_KEY"))
+xai_client = _build_client(os.getenv("XAI_API_KEY"), base_url="https://api.x.ai/v1")
+
+AI_CLIENTS = {
+    "openai": openai_client,
+    "xai": xai_client
+}
+
+
+async def close_ai_clients():
+    """Close all provider connection pools (called on app shutdown)."""
+    for client in AI_CLIENTS.values():
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"Error closing AI client: {e}")
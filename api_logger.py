@@ -1,10 +1,16 @@
 """
 API Call Tracking and Logging System
-Tracks all API calls with request/response data, timing, and results
+Tracks all API calls with request/response data, timing, and results.
+Calls are queued in an in-memory ring buffer and written by a background
+thread in batched transactions on a persistent WAL-mode connection.
 """
 
+import os
 import json
+import atexit
 import sqlite3
+import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
@@ -13,15 +19,27 @@ import hashlib
 class APILogger:
     """Tracks all API calls to a SQLite database"""
     
-    def __init__(self, db_path: str = "logs/api_calls.db"):
+    def __init__(self, db_path: str = "logs/api_calls.db", max_queue: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 1.0):
         self.db_path = db_path
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "write_errors": 0, "batches": 0}
+        self._buffer = deque(maxlen=max_queue)
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._writer: Optional[threading.Thread] = None
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self._init_db()
     
     def _init_db(self):
         """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
         
         # Main API calls table
         cursor.execute("""
@@ -68,8 +86,7 @@ class APILogger:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_model_number ON api_calls(model_number)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_success ON api_calls(success)")
         
-        conn.commit()
-        conn.close()
+        self._conn.commit()
     
     def log_call(self, 
                  endpoint: str,
@@ -79,15 +96,30 @@ class APILogger:
                  response_time_ms: int,
                  status_code: int = 200,
                  client_ip: Optional[str] = None,
-                 api_key: Optional[str] = None) -> int:
+                 api_key: Optional[str] = None):
         """
-        Log an API call
-        Returns the log ID
+        Queue an API call for logging (non-blocking).
+        Serialization and the database write happen on the background writer thread.
+        When the ring buffer is full the oldest queued call is dropped and counted.
         """
+        if len(self._buffer) >= self.max_queue:
+            self.stats["dropped"] += 1
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self._buffer.append((
+            datetime.utcnow().isoformat(), endpoint, method, request_data, response_data,
+            response_time_ms, status_code, client_ip, api_key
+        ))
+        self.stats["queued"] += 1
         
+        self._ensure_writer()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+    
+    def _build_row(self, timestamp: str, endpoint: str, method: str,
+                   request_data: Dict[Any, Any], response_data: Dict[Any, Any],
+                   response_time_ms: int, status_code: int,
+                   client_ip: Optional[str], api_key: Optional[str]) -> tuple:
+        """Convert a queued call into an api_calls row"""
         # Extract common fields
         model_number = None
         search_query = None
@@ -114,16 +146,10 @@ class APILogger:
         if api_key:
             api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
         
-        cursor.execute("""
-            INSERT INTO api_calls (
-                timestamp, endpoint, method, client_ip, api_key_hash,
-                request_body, status_code, success, error_message,
-                response_data, response_time_ms, credits_used,
-                model_number, search_query, results_count,
-                matched_model, match_type
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            datetime.utcnow().isoformat(),
+        response_json = json.dumps(response_data)
+        
+        return (
+            timestamp,
             endpoint,
             method,
             client_ip,
@@ -132,7 +158,7 @@ class APILogger:
             status_code,
             success,
             error_message,
-            json.dumps(response_data) if len(json.dumps(response_data)) < 50000 else json.dumps({"truncated": True, "success": success}),
+            response_json if len(response_json) < 50000 else json.dumps({"truncated": True, "success": success}),
             response_time_ms,
             credits_used,
             model_number,
@@ -140,16 +166,71 @@ class APILogger:
             results_count,
             matched_model,
             match_type
-        ))
-        
-        log_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return log_id
+        )
+    
+    def flush(self) -> int:
+        """Write all queued calls in batched transactions. Returns rows written."""
+        written = 0
+        with self._write_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                
+                try:
+                    rows = [self._build_row(*entry) for entry in batch]
+                    self._conn.executemany("""
+                        INSERT INTO api_calls (
+                            timestamp, endpoint, method, client_ip, api_key_hash,
+                            request_body, status_code, success, error_message,
+                            response_data, response_time_ms, credits_used,
+                            model_number, search_query, results_count,
+                            matched_model, match_type
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+                    self._conn.commit()
+                    written += len(rows)
+                    self.stats["written"] += len(rows)
+                    self.stats["batches"] += 1
+                except Exception as e:
+                    self._conn.rollback()
+                    self.stats["write_errors"] += len(batch)
+                    print(f"Failed to write API call logs: {e}")
+        return written
+    
+    def _ensure_writer(self):
+        """Start the background writer thread (once per process)"""
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, name="api-logger-writer", daemon=True)
+            self._writer.start()
+    
+    def _writer_loop(self):
+        """Flush every flush_interval seconds, or sooner when a full batch is queued"""
+        while not self._stopping:
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def close(self):
+        """Stop the writer and flush anything still queued"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._writer is not None and self._writer.is_alive():
+            self._writer.join(timeout=5)
+        self.flush()
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Writer queue counters"""
+        return {
+            **self.stats,
+            "pending": len(self._buffer),
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size
+        }
     
     def get_recent_calls(self, limit: int = 100, endpoint: Optional[str] = None) -> list:
         """Get recent API calls"""
+        self.flush()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
@@ -172,6 +253,7 @@ class APILogger:
     
     def get_stats(self, hours: int = 24) -> Dict[str, Any]:
         """Get statistics for the last N hours"""
+        self.flush()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -224,6 +306,7 @@ class APILogger:
                     success: Optional[bool] = None,
                     limit: int = 50) -> list:
         """Search API call logs"""
+        self.flush()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
@@ -253,4 +336,11 @@ class APILogger:
         return [dict(row) for row in rows]
 
 # Global logger instance
-logger = APILogger()
+logger = APILogger(
+    max_queue=int(os.getenv("API_LOG_MAX_QUEUE", "10000")),
+    batch_size=int(os.getenv("API_LOG_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("API_LOG_FLUSH_INTERVAL", "1.0"))
+)
+
+# Write out queued calls on shutdown
+atexit.register(logger.close)
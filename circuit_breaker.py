@@ -0,0 +1,93 @@
+"""
+Circuit Breaker
+Stops calling a dependency (AI provider, Unwrangle) after consecutive
+failures so requests fail fast instead of each burning a full timeout.
+After a cooldown a single probe request is let through (half-open);
+its outcome closes the circuit or re-opens it.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with single-probe half-open state"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.stats = {"trips": 0, "short_circuited": 0, "probes": 0}
+
+    def _probe_due(self) -> bool:
+        return self.opened_at is not None and time.time() - self.opened_at >= self.recovery_timeout
+
+    def available(self) -> bool:
+        """Whether a request would currently be let through (does not claim the probe)"""
+        if self.state == CLOSED:
+            return True
+        return not self.probe_in_flight and (self.state == HALF_OPEN or self._probe_due())
+
+    def allow_request(self) -> bool:
+        """Claim permission for one request; while half-open only one probe is allowed"""
+        if self.state == CLOSED:
+            return True
+
+        if self.state == OPEN and self._probe_due():
+            self.state = HALF_OPEN
+
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            self.stats["probes"] += 1
+            return True
+
+        self.stats["short_circuited"] += 1
+        return False
+
+    def record_success(self):
+        """A request succeeded - close the circuit"""
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        """A request failed - open the circuit at the threshold (or if the probe failed)"""
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.stats["trips"] += 1
+            self.state = OPEN
+            self.opened_at = time.time()
+
+    def release_probe(self):
+        """The probe was cancelled without an outcome - let another request probe"""
+        self.probe_in_flight = False
+
+    def get_status(self) -> Dict[str, Any]:
+        """Current state and counters"""
+        retry_in = None
+        if self.state == OPEN and self.opened_at is not None:
+            retry_in = round(max(0.0, self.recovery_timeout - (time.time() - self.opened_at)), 1)
+
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            "retry_in_seconds": retry_in,
+            **self.stats
+        }
@@ -0,0 +1,132 @@
+"""
+Unwrangle Credit Ledger
+Records the credits of every outbound Unwrangle call per day, hour, API key
+(hashed) and platform in the shared metrics store, and enforces optional
+daily caps for the whole account:
+- soft cap: optional extra calls (e.g. hyphen-variation retries) are skipped
+- hard cap: no further Unwrangle calls until 00:00 UTC
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from metrics_store import MetricsStore, metrics_store
+from token_budget import current_key_hash
+
+# Load environment variables
+load_dotenv()
+
+DAILY_SCOPE_PREFIX = "unwrangle_credits"
+ACCOUNT = "_account"
+
+
+class UnwrangleCreditCapError(Exception):
+    """Raised instead of calling Unwrangle once the daily hard cap is reached"""
+
+    def __init__(self, spent: float, cap: int):
+        self.spent = spent
+        self.cap = cap
+        super().__init__(
+            f"Daily Unwrangle credit cap reached ({int(spent)}/{cap} credits). Resets at 00:00 UTC."
+        )
+
+
+class CreditLedger:
+    """Daily / hourly / per-key Unwrangle credit counters with soft and hard caps"""
+
+    def __init__(self, store: MetricsStore, soft_cap: int = 0, hard_cap: int = 0):
+        self.store = store
+        self.soft_cap = soft_cap
+        self.hard_cap = hard_cap
+        self.stats = {"rejected": 0, "optional_skipped": 0}
+
+    @staticmethod
+    def _scope(day: Optional[str] = None) -> str:
+        return f"{DAILY_SCOPE_PREFIX}:{day or datetime.utcnow().strftime('%Y-%m-%d')}"
+
+    def spent_today(self) -> float:
+        """Credits spent by the whole account since 00:00 UTC (all workers)"""
+        return self.store.counters(self._scope()).get(ACCOUNT, {}).get("credits", 0)
+
+    def check(self, credits: int = 10):
+        """Raise UnwrangleCreditCapError if a call costing credits would pass the hard cap"""
+        if self.hard_cap <= 0:
+            return
+        spent = self.spent_today()
+        if spent + credits > self.hard_cap:
+            self.stats["rejected"] += 1
+            raise UnwrangleCreditCapError(spent, self.hard_cap)
+
+    def allow_optional(self, credits: int = 10) -> bool:
+        """Whether an optional call (one the request can do without) fits under the soft cap"""
+        if self.soft_cap <= 0 or self.spent_today() + credits <= self.soft_cap:
+            return True
+        self.stats["optional_skipped"] += 1
+        return False
+
+    def record(self, platform: str, credits: float, success: bool = True):
+        """Record one outbound call (failed calls are counted with the credits reported, usually 0)"""
+        now = datetime.utcnow()
+        scope = self._scope(now.strftime("%Y-%m-%d"))
+        hour = f"h{now.hour:02d}"
+        field = "calls" if success else "failed_calls"
+
+        for name in (ACCOUNT, f"key:{current_key_hash()}", f"platform:{platform}"):
+            self.store.incr(scope, name, field)
+            if credits:
+                self.store.incr(scope, name, "credits", credits)
+        if credits:
+            self.store.incr(scope, ACCOUNT, hour, credits)
+
+    def _day(self, day: str) -> Dict[str, Any]:
+        counters = self.store.counters(self._scope(day))
+        account = counters.get(ACCOUNT, {})
+
+        def grouped(prefix: str) -> Dict[str, Dict[str, int]]:
+            return {
+                name[len(prefix):]: {
+                    "credits": int(fields.get("credits", 0)),
+                    "calls": int(fields.get("calls", 0)),
+                    "failed_calls": int(fields.get("failed_calls", 0))
+                }
+                for name, fields in counters.items() if name.startswith(prefix)
+            }
+
+        return {
+            "date": day,
+            "credits": int(account.get("credits", 0)),
+            "calls": int(account.get("calls", 0)),
+            "failed_calls": int(account.get("failed_calls", 0)),
+            "by_hour": {
+                field[1:]: int(value) for field, value in sorted(account.items()) if field.startswith("h")
+            },
+            "by_key": grouped("key:"),
+            "by_platform": grouped("platform:")
+        }
+
+    def report(self, days: int = 7) -> Dict[str, Any]:
+        """Spend for today (by hour, key and platform) and daily totals for the previous days"""
+        today = datetime.utcnow().date()
+        history = [self._day((today - timedelta(days=offset)).isoformat()) for offset in range(days)]
+        spent = history[0]["credits"]
+        return {
+            "today": history[0],
+            "daily": {day["date"]: day["credits"] for day in history},
+            "caps": {
+                "soft_cap": self.soft_cap or None,
+                "hard_cap": self.hard_cap or None,
+                "soft_cap_reached": bool(self.soft_cap) and spent >= self.soft_cap,
+                "hard_cap_reached": bool(self.hard_cap) and spent >= self.hard_cap,
+                "remaining": max(0, self.hard_cap - spent) if self.hard_cap else None
+            },
+            **self.stats
+        }
+
+
+# Global ledger instance
+credit_ledger = CreditLedger(
+    metrics_store,
+    soft_cap=int(os.getenv("UNWRANGLE_DAILY_SOFT_CAP", "0")),
+    hard_cap=int(os.getenv("UNWRANGLE_DAILY_HARD_CAP", "0"))
+)
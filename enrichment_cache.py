@@ -0,0 +1,192 @@
+"""
+Enrichment Result Cache
+Persistent SQLite cache of enrichment results keyed on
+(portal, brand, model_number, prompt version) with TTL and LRU eviction.
+A second, short-TTL instance holds negative results (unknown model numbers).
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable
+from metrics_store import metrics_store
+
+
+def prompt_version(prompt: str) -> str:
+    """Short hash of a prompt template - changing the prompt invalidates its cache entries"""
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+def normalize_identifier(value: Optional[str]) -> str:
+    """Normalize brand/model strings so trivial formatting differences share an entry"""
+    return " ".join((value or "").upper().split())
+
+
+def is_empty_record(record: Any, ignore_keys: Iterable[str] = ()) -> bool:
+    """
+    True if a (nested) record holds no data apart from ignore_keys - e.g. an
+    LLM enrichment that echoed the model number but found nothing else.
+    False, 0 and empty strings/lists count as no data.
+    """
+    ignore = set(ignore_keys)
+    if isinstance(record, dict):
+        return all(is_empty_record(value, ignore) for key, value in record.items() if key not in ignore)
+    if isinstance(record, list):
+        return all(is_empty_record(item, ignore) for item in record)
+    return record is None or record is False or record == 0 or record == ""
+
+
+class EnrichmentCache:
+    """Caches enrichment payloads in a SQLite database"""
+
+    def __init__(self, db_path: str = "data/enrichment_cache.db",
+                 ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 10000,
+                 metrics_scope: str = "enrichment_cache"):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.metrics_scope = metrics_scope
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+        self.portal_stats: Dict[str, Dict[str, int]] = {}
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema"""
+        cursor = self._conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_cache (
+                cache_key TEXT PRIMARY KEY,
+                portal TEXT NOT NULL,
+                brand TEXT,
+                model_number TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_accessed ON enrichment_cache(last_accessed)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_model ON enrichment_cache(portal, model_number)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(portal: str, brand: Optional[str], model_number: str, version: str) -> str:
+        """Content-addressed cache key"""
+        raw = "|".join([portal, normalize_identifier(brand), normalize_identifier(model_number), version])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _count(self, portal: str, stat: str):
+        self.stats[stat] += 1
+        portal_stats = self.portal_stats.setdefault(portal, {"hits": 0, "misses": 0})
+        portal_stats[stat] += 1
+        # Shared across workers for /metrics
+        metrics_store.incr(self.metrics_scope, portal, stat)
+
+    def get(self, portal: str, brand: Optional[str], model_number: str, version: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload, or None on a miss or expired entry"""
+        key = self.make_key(portal, brand, model_number, version)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM enrichment_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count(portal, "misses")
+                return None
+
+            payload, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM enrichment_cache WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                self._count(portal, "misses")
+                return None
+
+            self._conn.execute(
+                "UPDATE enrichment_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+            self._count(portal, "hits")
+
+        return json.loads(payload)
+
+    def set(self, portal: str, brand: Optional[str], model_number: str, version: str,
+            payload: Dict[str, Any], ttl_seconds: Optional[int] = None):
+        """Store a payload and evict least-recently-used entries beyond max_entries"""
+        key = self.make_key(portal, brand, model_number, version)
+        now = time.time()
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO enrichment_cache (
+                    cache_key, portal, brand, model_number, prompt_version,
+                    payload, created_at, expires_at, last_accessed, hit_count
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            """, (
+                key, portal, normalize_identifier(brand), normalize_identifier(model_number),
+                version, json.dumps(payload), now, now + ttl, now
+            ))
+            self.stats["writes"] += 1
+
+            # LRU eviction
+            total = self._conn.execute("SELECT COUNT(*) FROM enrichment_cache").fetchone()[0]
+            if total > self.max_entries:
+                overflow = total - self.max_entries
+                self._conn.execute("""
+                    DELETE FROM enrichment_cache WHERE cache_key IN (
+                        SELECT cache_key FROM enrichment_cache ORDER BY last_accessed ASC LIMIT ?
+                    )
+                """, (overflow,))
+                self.stats["evictions"] += overflow
+
+            self._conn.commit()
+
+    def invalidate(self, portal: Optional[str] = None, model_number: Optional[str] = None) -> int:
+        """Delete matching entries (all entries if no filter). Returns number removed."""
+        query = "DELETE FROM enrichment_cache WHERE 1=1"
+        params = []
+
+        if portal:
+            query += " AND portal = ?"
+            params.append(portal)
+
+        if model_number:
+            query += " AND model_number = ?"
+            params.append(normalize_identifier(model_number))
+
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and entry counts"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT portal, COUNT(*) FROM enrichment_cache WHERE expires_at > ? GROUP BY portal",
+                (time.time(),)
+            ).fetchall()
+
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups * 100, 2) if lookups > 0 else 0,
+            "entries": {portal: count for portal, count in rows},
+            "by_portal": self.portal_stats,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries
+        }
@@ -31,8 +31,10 @@ from datetime import datetime
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Header
 from pydantic import BaseModel, Field, ConfigDict
-import requests
-import urllib.parse
+import httpx
+from unwrangle_client import unwrangle_client
+from credit_ledger import credit_ledger, UnwrangleCreditCapError
+from variant_matcher import VariantIndex, VariantMatch, EXACT, separator_key
 
 # Load environment variables
 load_dotenv()
@@ -46,7 +48,6 @@ UNWRANGLE_API_KEY = os.getenv("UNWRANGLE_API_KEY")
 API_KEY = os.getenv("API_KEY", "your-api-key")  # Optional authentication
 
 # API Constants
-UNWRANGLE_API_URL = "https://data.unwrangle.com/api/getter/"
 SEARCH_TIMEOUT = 45  # seconds
 DETAIL_TIMEOUT = 45  # seconds
 
@@ -184,34 +185,29 @@ def find_matching_variant(
         
     Returns:
         Tuple of (variant_url, matched_model, match_type)
-        match_type: 'exact', 'variation', 'partial', or None
+        match_type: 'exact', 'variation', 'prefix', 'partial', or None
     """
-    model_upper = model_number.upper().strip()
-    variations = generate_model_variations(model_number) if fuzzy else [model_number]
-    
-    # PRIORITY 1: Try exact matches first
-    for variation in variations:
-        variation_upper = variation.upper().strip()
-        for product in search_results.get("products", []):
-            for variant in product.get("variants", []):
-                variant_model = variant.get("model_no", "").upper().strip()
-                
-                # Exact match
-                if variant_model == variation_upper:
-                    match_type = 'exact' if variation == model_number else 'variation'
-                    return (variant.get("url"), variant.get("model_no"), match_type)
-    
-    # PRIORITY 2: Try partial matches (variant contains search term)
-    if fuzzy:
-        for product in search_results.get("products", []):
-            for variant in product.get("variants", []):
-                variant_model = variant.get("model_no", "").upper().strip()
-                
-                # Partial match - variant contains model number
-                if model_upper in variant_model or variant_model in model_upper:
-                    return (variant.get("url"), variant.get("model_no"), 'partial')
+    matches = rank_variant_matches(VariantIndex(search_results.get("products", [])), model_number, fuzzy)
+    if not matches:
+        return (None, None, None)
+    return (matches[0].url, matches[0].model_no, matches[0].match_type)
+
+
+def rank_variant_matches(index: VariantIndex, model_number: str, fuzzy: bool = True) -> List[VariantMatch]:
+    """
+    Ranked variant matches for a model number, best first.
     
-    return (None, None, None)
+    Args:
+        index: Variant index built from the search results
+        model_number: Model number to find
+        fuzzy: Also try format variations, separator/prefix-insensitive and partial matches
+        
+    Returns:
+        List of VariantMatch (empty if nothing matched)
+    """
+    if not fuzzy:
+        return index.match(model_number, tiers=(EXACT,))
+    return index.match(model_number, generate_model_variations(model_number))
 
 
 def validate_unwrangle_key():
@@ -415,18 +411,8 @@ async def search_ferguson_products(
     start_time = time.time()
     
     try:
-        # Build search request
-        params = {
-            "platform": "fergusonhome_search",
-            "search": request.search,
-            "page": request.page,
-            "api_key": UNWRANGLE_API_KEY
-        }
-        
-        # Make request to Unwrangle API
-        response = requests.get(UNWRANGLE_API_URL, params=params, timeout=SEARCH_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        # Make request to Unwrangle API (shared pooled client)
+        data = await unwrangle_client.search(request.search, page=request.page, timeout=SEARCH_TIMEOUT)
         
         if not data.get("success"):
             raise HTTPException(
@@ -438,58 +424,41 @@ async def search_ferguson_products(
         
         # Enhance products with smart variant matching
         products = data.get("results", [])
-        search_model = request.search.upper().strip()
+        search_key = separator_key(request.search)
+        
+        # Index every variant once; best exact / separator-insensitive match per product
+        variant_matches = VariantIndex(products).best_by_product(request.search)
         
         # Categorize products by match quality
         exact_match_products = []
         fuzzy_match_products = []
         other_products = []
         
-        for product in products:
+        for position, product in enumerate(products):
             best_url = None
             best_model = None
             match_type = None
             
-            product_model = product.get("model_no", "").upper().strip()
             product_url = product.get("url")
             variants = product.get("variants", [])
+            match = variant_matches.get(position)
             
-            # Check variants for exact matches
-            if variants:
-                for variant in variants:
-                    variant_model = variant.get("model_no", "").upper().strip()
-                    if variant_model == search_model:
-                        best_url = variant.get("url")
-                        best_model = variant.get("model_no")
-                        match_type = "exact_variant"
-                        break
-                
-                # Fuzzy match if no exact match
-                if not best_url:
-                    for variant in variants:
-                        variant_model = variant.get("model_no", "").upper().strip()
-                        clean_search = search_model.replace("-", "").replace("_", "")
-                        clean_variant = variant_model.replace("-", "").replace("_", "")
-                        if clean_search == clean_variant:
-                            best_url = variant.get("url")
-                            best_model = variant.get("model_no")
-                            match_type = "fuzzy_variant"
-                            break
-                
+            # Check variants for exact, then separator-insensitive matches
+            if match:
+                best_url = match.url
+                best_model = match.model_no
+                match_type = "exact_variant" if match.tier == EXACT else "fuzzy_variant"
+            elif variants:
                 # Use first variant as fallback
-                if not best_url and variants:
-                    best_url = variants[0].get("url")
-                    best_model = variants[0].get("model_no")
-                    match_type = "first_variant"
+                best_url = variants[0].get("url")
+                best_model = variants[0].get("model_no")
+                match_type = "first_variant"
             
             # Check base product
-            if not best_url:
-                clean_search = search_model.replace("-", "").replace("_", "")
-                clean_product = product_model.replace("-", "").replace("_", "")
-                if clean_search == clean_product or product_model == search_model:
-                    best_url = product_url
-                    best_model = product.get("model_no")
-                    match_type = "base_product"
+            if not best_url and search_key and separator_key(product.get("model_no")) == search_key:
+                best_url = product_url
+                best_model = product.get("model_no")
+                match_type = "base_product"
             
             # Final fallback
             if not best_url and product_url:
@@ -531,7 +500,9 @@ async def search_ferguson_products(
             }
         }
     
-    except requests.RequestException as e:
+    except UnwrangleCreditCapError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=503,
             detail=f"Unwrangle API request failed: {str(e)}"
@@ -578,20 +549,8 @@ async def get_ferguson_product_detail(
     start_time = time.time()
     
     try:
-        # URL encode the product URL
-        encoded_url = urllib.parse.quote(request.url, safe='')
-        
-        params = {
-            "platform": "fergusonhome_detail",
-            "url": encoded_url,
-            "page": 1,
-            "api_key": UNWRANGLE_API_KEY
-        }
-        
-        # Make request to Unwrangle API
-        response = requests.get(UNWRANGLE_API_URL, params=params, timeout=DETAIL_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
+        # Make request to Unwrangle API (shared pooled client, URL-encodes the product URL)
+        data = await unwrangle_client.detail(request.url, timeout=DETAIL_TIMEOUT)
         
         if not data.get("success"):
             raise HTTPException(
@@ -652,7 +611,9 @@ async def get_ferguson_product_detail(
             }
         }
     
-    except requests.RequestException as e:
+    except UnwrangleCreditCapError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=503,
             detail=f"Unwrangle API request failed: {str(e)}"
@@ -708,21 +669,17 @@ async def lookup_ferguson_complete(
     overall_start = time.time()
     
     try:
+        # Don't spend the search credits if the detail call would then hit the hard cap
+        if not unwrangle_client.is_cached(unwrangle_client.search_params(model_number)):
+            credit_ledger.check(20)
+        
         # ========================================================================
         # STEP 1: SEARCH FOR PRODUCT
         # ========================================================================
         print(f"[1/3] Searching for model: {model_number}")
         step1_start = time.time()
         
-        search_params = {
-            "api_key": UNWRANGLE_API_KEY,
-            "platform": "fergusonhome_search",
-            "search": model_number,
-            "page": 1
-        }
-        search_response = requests.get(UNWRANGLE_API_URL, params=search_params, timeout=SEARCH_TIMEOUT)
-        search_response.raise_for_status()
-        search_data = search_response.json()
+        search_data = await unwrangle_client.search(model_number, page=1, timeout=SEARCH_TIMEOUT)
         step1_time = time.time() - step1_start
         
         if not search_data.get("success") or not search_data.get("results"):
@@ -733,35 +690,22 @@ async def lookup_ferguson_complete(
         
         print(f"[1/3] ✓ Found {len(search_data.get('results', []))} products ({step1_time:.2f}s)")
         
-        # Store search result data
-        search_product_data = None
-        for product in search_data.get("results", []):
-            for variant in product.get("variants", []):
-                if variant.get("model_no", "").upper().strip() == model_number.upper().strip():
-                    search_product_data = product
-                    break
-            if search_product_data:
-                break
-        
         # ========================================================================
         # STEP 2: FIND MATCHING VARIANT (with smart format variations)
         # ========================================================================
         print(f"[2/3] Finding variant match (with format variations)")
         step2_start = time.time()
         
-        match_result = find_matching_variant(
-            {"products": search_data.get("results", [])},
-            model_number,
-            fuzzy=True  # Enable smart format matching
-        )
+        variant_index = VariantIndex(search_data.get("results", []))
+        matches = rank_variant_matches(variant_index, model_number, fuzzy=True)  # Smart format matching
         step2_time = time.time() - step2_start
         
-        if not match_result or not match_result[0]:
+        # Store search result data (parent product of an exact match)
+        search_product_data = matches[0].product if matches and matches[0].tier == EXACT else None
+        
+        if not matches or not matches[0].url:
             # Collect available variants for debugging
-            available_variants = []
-            for product in search_data.get("results", []):
-                for variant in product.get("variants", []):
-                    available_variants.append(variant.get("model_no"))
+            available_variants = variant_index.models()
             
             raise HTTPException(
                 status_code=404,
@@ -774,7 +718,7 @@ async def lookup_ferguson_complete(
                 }
             )
         
-        variant_url, matched_model, match_type = match_result
+        variant_url, matched_model, match_type = matches[0].url, matches[0].model_no, matches[0].match_type
         print(f"[2/3] ✓ Matched '{model_number}' → '{matched_model}' ({match_type}, {step2_time:.2f}s)")
         
         # ========================================================================
@@ -783,16 +727,7 @@ async def lookup_ferguson_complete(
         print(f"[3/3] Fetching complete product attributes")
         step3_start = time.time()
         
-        encoded_url = urllib.parse.quote(variant_url, safe='')
-        detail_params = {
-            "api_key": UNWRANGLE_API_KEY,
-            "platform": "fergusonhome_detail",
-            "url": encoded_url,
-            "page": 1
-        }
-        detail_response = requests.get(UNWRANGLE_API_URL, params=detail_params, timeout=DETAIL_TIMEOUT)
-        detail_response.raise_for_status()
-        detail_data = detail_response.json()
+        detail_data = await unwrangle_client.detail(variant_url, timeout=DETAIL_TIMEOUT)
         step3_time = time.time() - step3_start
         
         if not detail_data.get("success"):
@@ -818,8 +753,9 @@ async def lookup_ferguson_complete(
             "matched_model": matched_model,
             "match_type": match_type,
             "variant_url": variant_url,
+            "alternative_matches": [match.to_dict() for match in matches[1:6]],
             "product": complete_product,
-            "credits_used": 20,  # 10 for search + 10 for detail
+            "credits_used": search_data.get("credits_used", 10) + detail_data.get("credits_used", 10),
             "metadata": {
                 "search_time": f"{step1_time:.2f}s",
                 "match_time": f"{step2_time:.2f}s",
@@ -831,7 +767,9 @@ async def lookup_ferguson_complete(
             }
         }
     
-    except requests.RequestException as e:
+    except UnwrangleCreditCapError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=503,
             detail=f"Unwrangle API request failed: {str(e)}"
@@ -847,6 +785,12 @@ async def lookup_ferguson_complete(
 # HEALTH CHECK & STATUS
 # ============================================================================
 
+@app.on_event("shutdown")
+async def shutdown_unwrangle_client():
+    """Close the shared Unwrangle connection pool"""
+    await unwrangle_client.aclose()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
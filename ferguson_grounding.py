@@ -0,0 +1,177 @@
+"""
+Ferguson Grounding
+Maps the structured data of a complete Ferguson lookup (specifications,
+feature groups, dimensions, UPC, warranty ...) straight into the catalog and
+home product schemas, so the AI provider is only asked for the fields
+Ferguson doesn't carry.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Catalog raw fields (as _generate_with_provider reads them) -> Ferguson spec names
+CATALOG_SPEC_FIELDS = {
+    "product_height": ["height", "overall height", "product height"],
+    "product_width": ["width", "overall width", "product width"],
+    "product_depth": ["depth", "overall depth", "product depth"],
+    "product_weight": ["weight", "product weight"],
+    "shipping_weight": ["shipping weight"],
+    "cutout_height": ["cutout height"],
+    "cutout_width": ["cutout width"],
+    "cutout_depth": ["cutout depth"],
+    "finish_color": ["finish", "color", "color finish", "finish color"],
+    "series_collection": ["collection", "series"],
+    "upc_gtin": ["upc", "gtin"],
+    "country_of_origin": ["country of origin"],
+    "manufacturer_warranty_parts": ["manufacturer warranty", "warranty"],
+    "voltage": ["voltage"],
+    "amperage": ["amperage", "amps"],
+    "hertz": ["hertz", "frequency"],
+    "gas_type": ["gas type", "fuel type"],
+    "kwh_per_year": ["kwh per year", "annual energy consumption"],
+    "dba_rating": ["noise level", "decibel rating"],
+    "total_capacity": ["capacity", "total capacity"],
+    "installation_type": ["installation type"],
+}
+
+# Home product record paths -> Ferguson spec names
+HOME_SPEC_FIELDS = {
+    "product_identity.upc_ean_gtin": ["upc", "gtin"],
+    "product_identity.series_collection": ["collection", "series"],
+    "dimensions.overall_height": ["height", "overall height", "product height"],
+    "dimensions.overall_width": ["width", "overall width", "product width"],
+    "dimensions.overall_depth": ["depth", "overall depth", "product depth"],
+    "dimensions.product_weight": ["weight", "product weight"],
+    "dimensions.shipping_weight": ["shipping weight"],
+    "material_construction.primary_material": ["material", "primary material"],
+    "finish_color.finish_name": ["finish"],
+    "finish_color.color": ["color"],
+    "finish_color.finish_family": ["finish family"],
+    "mechanical_plumbing.flow_rate_gpm": ["flow rate", "flow rate gpm", "max flow rate"],
+    "mechanical_plumbing.valve_type": ["valve type"],
+    "mechanical_plumbing.connection_size": ["connection size"],
+    "mechanical_plumbing.drain_size": ["drain size"],
+    "electrical_specs.voltage": ["voltage"],
+    "electrical_specs.amperage": ["amperage", "amps"],
+    "electrical_specs.wattage": ["wattage", "watts"],
+    "lighting_specs.lumens": ["lumens"],
+    "lighting_specs.color_temperature_kelvin": ["color temperature"],
+    "lighting_specs.cri": ["cri", "color rendering index"],
+    "lighting_specs.bulb_type": ["bulb type"],
+    "lighting_specs.number_of_bulbs": ["number of bulbs"],
+    "lighting_specs.dimmable": ["dimmable"],
+    "hvac_performance.btu": ["btu"],
+    "hvac_performance.cfm": ["cfm", "airflow"],
+    "installation.installation_type": ["installation type"],
+    "installation.mounting_type": ["mounting type"],
+    "environmental.location_rating": ["location rating"],
+    "environmental.ip_rating": ["ip rating"],
+    "certifications.ada_compliant": ["ada compliant", "ada"],
+    "certifications.watersense": ["watersense", "watersense certified"],
+    "certifications.energy_star": ["energy star", "energy star certified"],
+}
+
+
+def spec_key(name: Any) -> str:
+    """Normalize a spec name ('Overall Height', 'overall_height') for lookups"""
+    return " ".join(_NON_ALNUM.sub(" ", str(name).lower()).split())
+
+
+def spec_value(value: Any) -> Optional[str]:
+    """A spec value as a schema string (None if empty)"""
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, (list, tuple)):
+        items = [spec_value(item) for item in value]
+        value = ", ".join(item for item in items if item)
+    if value is None or isinstance(value, dict):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def flatten_specifications(product: Dict[str, Any]) -> Dict[str, str]:
+    """
+    One {normalized name: value} map over specifications, feature_groups and
+    dimensions. Specifications win over feature groups, feature groups over
+    the structured dimensions.
+    """
+    specs: Dict[str, str] = {}
+
+    def add(name: Any, value: Any):
+        if isinstance(value, dict):
+            # Grouped specifications: {"Dimensions": {"Height": ...}}
+            for sub_name, sub_value in value.items():
+                add(sub_name, sub_value)
+            return
+        value = spec_value(value)
+        if name and value:
+            specs.setdefault(spec_key(name), value)
+
+    specifications = product.get("specifications") or {}
+    if isinstance(specifications, dict):
+        for name, value in specifications.items():
+            add(name, value)
+    elif isinstance(specifications, list):
+        for item in specifications:
+            if isinstance(item, dict):
+                add(item.get("name") or item.get("key"), item.get("value"))
+
+    for group in product.get("feature_groups") or []:
+        for feature in (group.get("features") or []) if isinstance(group, dict) else []:
+            if isinstance(feature, dict):
+                add(feature.get("name"), feature.get("value"))
+
+    dimensions = product.get("dimensions") or {}
+    if isinstance(dimensions, dict):
+        for name, value in dimensions.items():
+            add(name, value)
+
+    return specs
+
+
+def _first(*values: Any) -> Optional[str]:
+    for value in values:
+        value = spec_value(value)
+        if value:
+            return value
+    return None
+
+
+def _lookup(specs: Dict[str, str], names: List[str]) -> Optional[str]:
+    return _first(*(specs.get(name) for name in names))
+
+
+def catalog_fields_from_ferguson(product: Dict[str, Any]) -> Dict[str, str]:
+    """Flat catalog raw fields (see _generate_with_provider) that Ferguson provides"""
+    specs = flatten_specifications(product)
+    fields = {
+        "product_title": _first(product.get("name")),
+        "upc_gtin": _first(product.get("upc"), product.get("barcode")),
+        "series_collection": _first(product.get("collection")),
+        "country_of_origin": _first(product.get("country_of_origin")),
+        "manufacturer_warranty_parts": _first(product.get("manufacturer_warranty"), product.get("warranty")),
+        "category": _first(product.get("product_type")),
+    }
+    for field, names in CATALOG_SPEC_FIELDS.items():
+        if not fields.get(field):
+            fields[field] = _lookup(specs, names)
+    return {field: value for field, value in fields.items() if value}
+
+
+def home_fields_from_ferguson(product: Dict[str, Any]) -> Dict[str, str]:
+    """{home product record path: value} for the fields Ferguson provides"""
+    specs = flatten_specifications(product)
+    fields = {
+        "product_identity.brand": _first(product.get("brand")),
+        "product_identity.product_title": _first(product.get("name")),
+        "product_identity.product_type": _first(product.get("product_type")),
+        "product_identity.upc_ean_gtin": _first(product.get("upc"), product.get("barcode")),
+        "product_identity.series_collection": _first(product.get("collection")),
+    }
+    for path, names in HOME_SPEC_FIELDS.items():
+        if not fields.get(path):
+            fields[path] = _lookup(specs, names)
+    return {path: value for path, value in fields.items() if value}
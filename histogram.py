@@ -0,0 +1,65 @@
+"""
+Streaming Histograms
+Fixed-memory, log-bucketed (HDR-style) histograms. A value maps to a bucket
+whose width grows geometrically, so any percentile is reported within
+`precision` relative error using a few hundred buckets at most, and bucket
+counts from many processes can simply be added together.
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+
+class LogHistogram:
+    """Bucket layout for values in [min_value, max_value] with bounded relative error"""
+
+    def __init__(self, min_value: float, max_value: float, precision: float = 0.05):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.precision = precision
+        self._log_base = math.log(1 + precision)
+        self.max_index = 1 + int(math.log(max_value / min_value) / self._log_base)
+
+    def bucket(self, value: float) -> int:
+        """Bucket index for a value (0 holds everything below min_value)"""
+        if value < self.min_value:
+            return 0
+        index = 1 + int(math.log(value / self.min_value) / self._log_base)
+        return min(index, self.max_index)
+
+    def bucket_value(self, index: int) -> float:
+        """Representative value of a bucket (geometric midpoint)"""
+        if index <= 0:
+            return 0.0
+        return self.min_value * (1 + self.precision) ** (index - 0.5)
+
+    def summarize(self, buckets: Dict[int, float], total: Optional[float] = None,
+                  percentiles: Iterable[float] = (50, 90, 95, 99)) -> Dict[str, Optional[float]]:
+        """count, mean and percentiles from bucket counts (total is the sum of observed values)"""
+        count = sum(buckets.values())
+        summary: Dict[str, Optional[float]] = {
+            "count": int(count),
+            "mean": round(total / count, 4) if count and total is not None else None
+        }
+
+        ordered = sorted(buckets.items())
+        for pct in percentiles:
+            value = None
+            if count:
+                target = pct / 100 * count
+                cumulative = 0.0
+                for index, bucket_count in ordered:
+                    cumulative += bucket_count
+                    if cumulative >= target:
+                        value = round(self.bucket_value(index), 4)
+                        break
+            summary[f"p{int(pct) if float(pct).is_integer() else pct}"] = value
+
+        return summary
+
+
+# Response times in seconds: 1ms .. 1h
+LATENCY_HISTOGRAM = LogHistogram(min_value=0.001, max_value=3600.0)
+
+# Completeness percentages: 0.1 .. 100
+COMPLETENESS_HISTOGRAM = LogHistogram(min_value=0.1, max_value=100.0)
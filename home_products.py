@@ -7,6 +7,9 @@ Master Product Data Schema v1.0 - Sections A through L
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 from datetime import datetime
+from metrics_store import metrics_store
+from token_budget import token_ledger
+from histogram import COMPLETENESS_HISTOGRAM
 
 # ============================================================================
 # SECTION A — PRODUCT IDENTITY
@@ -390,10 +393,27 @@ Begin enrichment now."""
 # METRICS TRACKING
 # ============================================================================
 
-home_products_metrics = {
-    "openai": {"requests": 0, "successful": 0, "failed": 0, "total_time": 0.0, "completeness_scores": []},
-    "xai": {"requests": 0, "successful": 0, "failed": 0, "total_time": 0.0, "completeness_scores": []}
-}
+# Shared by all workers - see metrics_store.py
+HOME_PRODUCTS_METRICS_SCOPE = "home_products_ai"
+HOME_PRODUCTS_PROVIDERS = ["openai", "xai"]
+
+def load_home_products_metrics() -> dict:
+    """Home products AI metrics per provider, aggregated across all workers"""
+    counters = metrics_store.counters(HOME_PRODUCTS_METRICS_SCOPE)
+    result = {}
+    for provider in HOME_PRODUCTS_PROVIDERS:
+        data = counters.get(provider, {})
+        completeness = metrics_store.histogram_summary(data, COMPLETENESS_HISTOGRAM, "completeness")
+        result[provider] = {
+            "requests": int(data.get("requests", 0)),
+            "successful": int(data.get("successful", 0)),
+            "failed": int(data.get("failed", 0)),
+            "total_time": data.get("total_time", 0.0),
+            "avg_completeness": completeness["mean"] or 0.0,
+            "latency": metrics_store.histogram_summary(data),
+            "completeness": completeness
+        }
+    return result
 
 def calculate_home_product_completeness(record: dict) -> float:
     """Calculate data completeness percentage for home products"""
@@ -419,20 +439,113 @@ def calculate_home_product_completeness(record: dict) -> float:
     count_fields(record)
     return (filled_fields / total_fields * 100) if total_fields > 0 else 0.0
 
-def update_home_products_metrics(provider: str, success: bool, response_time: float, completeness: float):
+def update_home_products_metrics(provider: str, success: bool, response_time: float, completeness: float,
+                                 tokens_used: int = 0):
     """Update metrics for home products enrichment"""
-    home_products_metrics[provider]["requests"] += 1
+    metrics_store.incr(HOME_PRODUCTS_METRICS_SCOPE, provider, "requests")
     if success:
-        home_products_metrics[provider]["successful"] += 1
-        home_products_metrics[provider]["completeness_scores"].append(completeness)
+        metrics_store.incr(HOME_PRODUCTS_METRICS_SCOPE, provider, "successful")
+        metrics_store.incr(HOME_PRODUCTS_METRICS_SCOPE, provider, "total_tokens_used", tokens_used)
+        metrics_store.observe(HOME_PRODUCTS_METRICS_SCOPE, provider, response_time)
+        metrics_store.observe(HOME_PRODUCTS_METRICS_SCOPE, provider, completeness,
+                              COMPLETENESS_HISTOGRAM, "completeness")
     else:
-        home_products_metrics[provider]["failed"] += 1
-    home_products_metrics[provider]["total_time"] += response_time
+        metrics_store.incr(HOME_PRODUCTS_METRICS_SCOPE, provider, "failed")
+    metrics_store.incr(HOME_PRODUCTS_METRICS_SCOPE, provider, "total_time", response_time)
 
 # ============================================================================
 # AI ENRICHMENT FUNCTION
 # ============================================================================
 
+HOME_PRODUCTS_MODELS = {"openai": "gpt-4o-mini", "xai": "grok-2-latest"}
+HOME_PRODUCTS_SYSTEM_PROMPT = "You are a product data enrichment specialist. Return only valid JSON."
+MSRP_AUTHORIZED_SOURCES = ["ferguson", "manufacturer", "ajmadison", "bestbuy", "costco", "homedepot", "lowes"]
+
+def home_product_completion_args(model_number: str, brand: Optional[str], description: Optional[str],
+                                 provider: str) -> dict:
+    """Chat completion arguments for a home product enrichment"""
+    prompt = HOME_PRODUCTS_ENRICHMENT_PROMPT.format(
+        model_number=model_number,
+        brand=brand or "Not provided",
+        description=description or "Not provided"
+    )
+    args = {
+        "model": HOME_PRODUCTS_MODELS[provider],
+        "messages": [
+            {"role": "system", "content": HOME_PRODUCTS_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 4000
+    }
+    if provider == "openai":
+        args["response_format"] = {"type": "json_object"}
+    return args
+
+def enforce_msrp_rules(product_identity: dict, provider: str):
+    """Strict MSRP validation: keep the MSRP only with 2+ named, authorized sources"""
+    pi = product_identity
+    msrp_sources = pi.get('msrp_sources', [])
+    msrp_source_count = len(msrp_sources) if msrp_sources else 0
+    
+    # Rule: Only accept MSRP if AI provided 2+ named sources
+    if msrp_source_count < 2:
+        pi['msrp_price'] = None
+        pi['msrp_confidence'] = None
+        pi['msrp_sources'] = []
+        pi['msrp_source_count'] = 0
+        pi['msrp_verified'] = False
+    else:
+        # Validate authorized sources
+        valid_sources = [s.lower().replace(" ", "").replace(".", "") for s in msrp_sources if any(auth in s.lower().replace(" ", "").replace(".", "") for auth in MSRP_AUTHORIZED_SOURCES)]
+        
+        if len(valid_sources) < 2:
+            pi['msrp_price'] = None
+            pi['msrp_confidence'] = None
+            pi['msrp_sources'] = []
+            pi['msrp_source_count'] = 0
+            pi['msrp_verified'] = False
+        else:
+            pi['msrp_confidence'] = "verified"
+            pi['msrp_source_count'] = len(valid_sources)
+            pi['msrp_verified'] = True
+    
+    # Set verified_by field
+    pi['verified_by'] = f"{provider.title()} {HOME_PRODUCTS_MODELS.get(provider, provider)}"
+
+def finalize_home_product_record(enriched_data: dict, provider: str) -> float:
+    """Add metadata and the completeness score to a parsed record. Returns the completeness."""
+    enriched_data["enriched_at"] = datetime.utcnow().isoformat()
+    enriched_data["ai_provider"] = provider
+    completeness = calculate_home_product_completeness(enriched_data)
+    enriched_data["confidence_score"] = completeness
+    return completeness
+
+def empty_home_product_record() -> dict:
+    """Every schema section with all of its fields null (metadata fields excluded)"""
+    return {
+        name: {field: None for field in info.annotation.model_fields}
+        for name, info in HomeProductRecord.model_fields.items()
+        if isinstance(info.annotation, type) and issubclass(info.annotation, BaseModel)
+    }
+
+def parse_json_content(content: str) -> dict:
+    """Parse a JSON completion, removing markdown code fences"""
+    import json
+    
+    content = content.strip()
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    return json.loads(content.strip())
+
+def get_home_product_client(provider: str, openai_client, xai_client):
+    client = {"openai": openai_client, "xai": xai_client}.get(provider)
+    if client is None:
+        raise Exception(f"Invalid provider or client not available: {provider}")
+    return client
+
 async def enrich_home_product_with_ai(
     model_number: str,
     brand: Optional[str] = None,
@@ -448,102 +561,250 @@ async def enrich_home_product_with_ai(
     Returns: (enriched_data_dict, provider_used, response_time)
     """
     import time
-    import json
     
     start_time = time.time()
     
-    # Format the prompt
-    prompt = HOME_PRODUCTS_ENRICHMENT_PROMPT.format(
+    tokens_used = 0
+    try:
+        client = get_home_product_client(provider, openai_client, xai_client)
+        response = await client.chat.completions.create(
+            **home_product_completion_args(model_number, brand, description, provider)
+        )
+        tokens_used = token_ledger.record_response("home_products", provider, HOME_PRODUCTS_MODELS[provider], response)
+        
+        # Parse JSON (markdown code blocks removed)
+        enriched_data = parse_json_content(response.choices[0].message.content)
+        
+        # ENFORCE STRICT MSRP VALIDATION RULES
+        if 'product_identity' in enriched_data:
+            enforce_msrp_rules(enriched_data['product_identity'], provider)
+        
+        # Add metadata and completeness
+        completeness = finalize_home_product_record(enriched_data, provider)
+        
+        response_time = time.time() - start_time
+        
+        # Update metrics
+        update_home_products_metrics(provider, True, response_time, completeness, tokens_used)
+        
+        return enriched_data, provider, response_time
+        
+    except Exception as e:
+        response_time = time.time() - start_time
+        update_home_products_metrics(provider, False, response_time, 0.0)
+        raise Exception(f"AI enrichment failed with {provider}: {str(e)}")
+
+# ============================================================================
+# SECTION-PARALLEL ENRICHMENT
+# ============================================================================
+
+# Independent groups of schema sections, each filled by its own smaller completion
+HOME_PRODUCT_SECTION_GROUPS = [
+    ["product_identity", "dimensions", "material_construction", "finish_color"],
+    ["mechanical_plumbing", "electrical_specs", "lighting_specs", "hvac_performance"],
+    ["installation", "compatibility", "environmental", "certifications"],
+    ["ai_enrichment", "filtering"]
+]
+HOME_PRODUCT_SECTION_MAX_TOKENS = 1500
+
+def home_product_section_prompt(model_number: str, brand: Optional[str], description: Optional[str],
+                                sections: List[str]) -> str:
+    """The enrichment prompt with its response format narrowed to the given sections"""
+    import json
+    
+    instructions = HOME_PRODUCTS_ENRICHMENT_PROMPT.split("RESPONSE FORMAT:")[0].format(
         model_number=model_number,
         brand=brand or "Not provided",
         description=description or "Not provided"
     )
+    skeleton = {
+        section: {field: "..." for field in HomeProductRecord.model_fields[section].annotation.model_fields}
+        for section in sections
+    }
+    return (
+        f"{instructions}RESPONSE FORMAT:\n"
+        f"Return a JSON object with ONLY these sections of the HomeProductRecord schema "
+        f"({', '.join(sections)}) - the other sections are handled separately:\n\n"
+        f"{json.dumps(skeleton, indent=2)}\n\nBegin enrichment now."
+    )
+
+async def enrich_home_product_sections_with_ai(
+    model_number: str,
+    brand: Optional[str] = None,
+    description: Optional[str] = None,
+    provider: str = "openai",
+    openai_client = None,
+    xai_client = None
+) -> tuple[dict, str, float]:
+    """
+    Same as enrich_home_product_with_ai, but the schema is split into
+    HOME_PRODUCT_SECTION_GROUPS that are enriched by concurrent completions and
+    merged, so wall-clock time is that of the slowest group. Fails if any group fails.
+    
+    Returns: (enriched_data_dict, provider_used, response_time)
+    """
+    import time
+    import asyncio
+    
+    start_time = time.time()
+    
+    async def enrich_group(sections: List[str]) -> tuple[dict, int]:
+        args = home_product_completion_args(model_number, brand, description, provider)
+        args["messages"][1]["content"] = home_product_section_prompt(model_number, brand, description, sections)
+        args["max_tokens"] = HOME_PRODUCT_SECTION_MAX_TOKENS
+        response = await client.chat.completions.create(**args)
+        tokens = token_ledger.record_response("home_products", provider, HOME_PRODUCTS_MODELS[provider], response)
+        data = parse_json_content(response.choices[0].message.content)
+        return {section: data.get(section) or {} for section in sections}, tokens
     
     try:
-        if provider == "openai" and openai_client:
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a product data enrichment specialist. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-                max_tokens=4000
-            )
-            content = response.choices[0].message.content.strip()
-        elif provider == "xai" and xai_client:
-            response = xai_client.chat.completions.create(
-                model="grok-2-latest",
-                messages=[
-                    {"role": "system", "content": "You are a product data enrichment specialist. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000
-            )
-            content = response.choices[0].message.content.strip()
-        else:
-            raise Exception(f"Invalid provider or client not available: {provider}")
+        client = get_home_product_client(provider, openai_client, xai_client)
+        tasks = [asyncio.ensure_future(enrich_group(sections)) for sections in HOME_PRODUCT_SECTION_GROUPS]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            # One group failed (or we were cancelled) - don't leave the others running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
         
-        # Clean JSON response - remove markdown code blocks and whitespace
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
+        enriched_data = {}
+        tokens_used = 0
+        for sections, tokens in results:
+            enriched_data.update(sections)
+            tokens_used += tokens
         
-        # Strip all leading/trailing whitespace and newlines
-        content = content.strip()
+        enforce_msrp_rules(enriched_data["product_identity"], provider)
+        completeness = finalize_home_product_record(enriched_data, provider)
         
-        # Parse JSON
-        enriched_data = json.loads(content)
+        response_time = time.time() - start_time
+        update_home_products_metrics(provider, True, response_time, completeness, tokens_used)
         
-        # ENFORCE STRICT MSRP VALIDATION RULES
-        if 'product_identity' in enriched_data:
-            pi = enriched_data['product_identity']
-            msrp_sources = pi.get('msrp_sources', [])
-            msrp_source_count = len(msrp_sources) if msrp_sources else 0
-            
-            # Rule: Only accept MSRP if AI provided 2+ named sources
-            if msrp_source_count < 2:
-                pi['msrp_price'] = None
-                pi['msrp_confidence'] = None
-                pi['msrp_sources'] = []
-                pi['msrp_source_count'] = 0
-                pi['msrp_verified'] = False
-            else:
-                # Validate authorized sources
-                authorized = ["ferguson", "manufacturer", "ajmadison", "bestbuy", "costco", "homedepot", "lowes"]
-                valid_sources = [s.lower().replace(" ", "").replace(".", "") for s in msrp_sources if any(auth in s.lower().replace(" ", "").replace(".", "") for auth in authorized)]
-                
-                if len(valid_sources) < 2:
-                    pi['msrp_price'] = None
-                    pi['msrp_confidence'] = None
-                    pi['msrp_sources'] = []
-                    pi['msrp_source_count'] = 0
-                    pi['msrp_verified'] = False
-                else:
-                    pi['msrp_confidence'] = "verified"
-                    pi['msrp_source_count'] = len(valid_sources)
-                    pi['msrp_verified'] = True
-            
-            # Set verified_by field
-            pi['verified_by'] = f"{provider.title()} {('gpt-4o-mini' if provider == 'openai' else 'grok-2-latest')}"
+        return enriched_data, provider, response_time
+        
+    except Exception as e:
+        response_time = time.time() - start_time
+        update_home_products_metrics(provider, False, response_time, 0.0)
+        raise Exception(f"AI enrichment failed with {provider}: {str(e)}")
+
+# ============================================================================
+# STREAMING ENRICHMENT
+# ============================================================================
+
+class JSONSectionParser:
+    """
+    Incremental parser for a JSON object arriving in chunks. feed() returns the
+    top-level (key, value) pairs whose value closed in that chunk, so sections
+    can be used before the rest of the object has been generated. Text before
+    the opening brace (e.g. a ```json fence) and after the closing one is ignored.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+    
+    def feed(self, chunk: str) -> list:
+        import json
         
-        # Add metadata
-        enriched_data["enriched_at"] = datetime.utcnow().isoformat()
-        enriched_data["ai_provider"] = provider
+        self.text += chunk
+        members = []
         
-        # Calculate completeness
-        completeness = calculate_home_product_completeness(enriched_data)
-        enriched_data["confidence_score"] = completeness
+        def close_member(end: int):
+            member = self.text[self._member_start:end].strip()
+            self._member_start = None
+            if member:
+                members.extend(json.loads("{" + member + "}").items())
         
-        response_time = time.time() - start_time
+        text = self.text
+        while self._pos < len(text) and not self.complete:
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    # A nested section just closed - emit it without waiting for the comma
+                    close_member(self._pos + 1)
+                elif self._depth == 0:
+                    if self._member_start is not None:
+                        close_member(self._pos)
+                    self.complete = True
+            elif char == "," and self._depth == 1:
+                if self._member_start is not None:
+                    close_member(self._pos)
+                self._member_start = self._pos + 1
+            self._pos += 1
         
-        # Update metrics
-        update_home_products_metrics(provider, True, response_time, completeness)
+        return members
+
+async def stream_home_product_with_ai(
+    model_number: str,
+    brand: Optional[str] = None,
+    description: Optional[str] = None,
+    provider: str = "openai",
+    openai_client = None,
+    xai_client = None
+):
+    """
+    Streaming variant of enrich_home_product_with_ai. Yields
+    {"event": "section", "section": name, "data": value} for each top-level
+    section as soon as the model closes it, then
+    {"event": "complete", "data": enriched_data, "provider": provider, "response_time": seconds}.
+    """
+    import time
+    
+    start_time = time.time()
+    
+    try:
+        client = get_home_product_client(provider, openai_client, xai_client)
+        stream = await client.chat.completions.create(
+            **home_product_completion_args(model_number, brand, description, provider),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
         
-        return enriched_data, provider, response_time
+        parser = JSONSectionParser()
+        enriched_data = {}
+        tokens_used = 0
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                tokens_used = token_ledger.record_response(
+                    "home_products", provider, HOME_PRODUCTS_MODELS[provider], chunk
+                )
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for section, value in parser.feed(chunk.choices[0].delta.content):
+                if section == "product_identity" and isinstance(value, dict):
+                    enforce_msrp_rules(value, provider)
+                enriched_data[section] = value
+                yield {"event": "section", "section": section, "data": value}
+        
+        if not parser.complete:
+            raise ValueError("Incomplete JSON in streamed response")
+        
+        completeness = finalize_home_product_record(enriched_data, provider)
+        response_time = time.time() - start_time
+        update_home_products_metrics(provider, True, response_time, completeness, tokens_used)
+        
+        yield {"event": "complete", "data": enriched_data, "provider": provider, "response_time": response_time}
         
     except Exception as e:
         response_time = time.time() - start_time
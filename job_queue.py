@@ -0,0 +1,246 @@
+"""
+Background Job Queue
+SQLite-persisted job queue with an in-process asyncio worker pool.
+Slow enrichments and Ferguson lookups are submitted, return a job id
+immediately, and are polled by id - jobs survive restarts and are retried.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, Awaitable
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job cannot succeed (e.g. 404, bad input)"""
+
+
+class JobQueue:
+    """Persists jobs to SQLite and runs them on a pool of asyncio workers"""
+
+    def __init__(self, db_path: str = "data/jobs.db", workers: int = 4,
+                 max_attempts: int = 3, retry_delay: float = 5.0,
+                 lease_seconds: float = 600.0, retention_days: int = 7):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.retention_days = retention_days
+        self.handlers: Dict[str, JobHandler] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self._last_recovery = 0.0
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema"""
+        cursor = self._conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                run_after REAL NOT NULL,
+                lease_expires_at REAL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, run_after)")
+        self._conn.commit()
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the coroutine that executes a job type"""
+        self.handlers[job_type] = handler
+
+    def submit(self, job_type: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Dict[str, Any]:
+        """Persist a new job and wake a worker. Returns the job record."""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = uuid.uuid4().hex
+        now = datetime.utcnow().isoformat()
+
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO jobs (id, job_type, payload, status, max_attempts, created_at, updated_at, run_after)
+                VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)
+            """, (job_id, job_type, json.dumps(payload), max_attempts or self.max_attempts, now, now, time.time()))
+            self._conn.commit()
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by id"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        del job["run_after"]
+        del job["lease_expires_at"]
+        return job
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counts by status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {
+            "by_status": {status: count for status, count in rows},
+            "workers": len(self._tasks)
+        }
+
+    def _recover(self):
+        """Requeue jobs whose worker died (restart or crash) and purge old finished jobs"""
+        now = time.time()
+        self._last_recovery = now
+        cutoff = datetime.utcfromtimestamp(now - self.retention_days * 86400).isoformat()
+        with self._lock:
+            recovered = self._conn.execute("""
+                UPDATE jobs SET status = 'queued', lease_expires_at = NULL, updated_at = ?
+                WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+            """, (datetime.utcnow().isoformat(), now)).rowcount
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?", (cutoff,)
+            )
+            self._conn.commit()
+        if recovered:
+            print(f"Job queue: requeued {recovered} interrupted job(s)")
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically claim the oldest runnable job"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ?
+                ORDER BY created_at LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                return None
+
+            claimed = self._conn.execute("""
+                UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                    started_at = ?, updated_at = ?, lease_expires_at = ?
+                WHERE id = ? AND status = 'queued'
+            """, (
+                datetime.utcnow().isoformat(), datetime.utcnow().isoformat(),
+                now + self.lease_seconds, row["id"]
+            )).rowcount
+            self._conn.commit()
+
+        return self.get(row["id"]) if claimed else None
+
+    def _release(self, job_id: str):
+        """Return a running job to the queue without counting the attempt"""
+        with self._lock:
+            self._conn.execute("""
+                UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0),
+                    updated_at = ?, lease_expires_at = NULL
+                WHERE id = ? AND status = 'running'
+            """, (datetime.utcnow().isoformat(), job_id))
+            self._conn.commit()
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None, run_after: Optional[float] = None):
+        """Record the outcome of an attempt"""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute("""
+                UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?,
+                    finished_at = ?, run_after = COALESCE(?, run_after), lease_expires_at = NULL
+                WHERE id = ?
+            """, (
+                status,
+                json.dumps(result, default=str) if result is not None else None,
+                error[:2000] if error else None,
+                now,
+                now if status in ("completed", "failed") else None,
+                run_after,
+                job_id
+            ))
+            self._conn.commit()
+
+    async def _run(self, job: Dict[str, Any]):
+        """Execute one claimed job with retry bookkeeping"""
+        handler = self.handlers.get(job["job_type"])
+        try:
+            if handler is None:
+                raise PermanentJobError(f"No handler registered for job type {job['job_type']}")
+            result = await handler(job["payload"])
+            self._finish(job["id"], "completed", result=result)
+        except asyncio.CancelledError:
+            # Shutting down - put the job back so the next start picks it up
+            self._release(job["id"])
+            raise
+        except PermanentJobError as e:
+            self._finish(job["id"], "failed", error=str(e))
+        except Exception as e:
+            if job["attempts"] < job["max_attempts"]:
+                # Exponential backoff before the next attempt
+                delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+                self._finish(job["id"], "queued", error=str(e), run_after=time.time() + delay)
+            else:
+                self._finish(job["id"], "failed", error=str(e))
+
+    async def _worker(self):
+        """Claim and run jobs until cancelled"""
+        while True:
+            if time.time() - self._last_recovery > 60:
+                self._recover()
+
+            job = self._claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    # Poll periodically so delayed retries are picked up
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job queue worker error: {e}")
+
+    async def start(self):
+        """Recover interrupted jobs and start the worker pool"""
+        self._recover()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the worker pool"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
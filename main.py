@@ -5,18 +5,39 @@ Single-file FastAPI backend that uses OpenAI to enrich product data.
 
 import os
 import json
+import copy
 import time
 import atexit
+import re
+import asyncio
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from collections import defaultdict
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import FastAPI, HTTPException, Header, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, ConfigDict
-from openai import OpenAI
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
 from dotenv import load_dotenv
 from api_logger import logger as api_logger
+from ai_clients import openai_client, xai_client, close_ai_clients
+from unwrangle_client import unwrangle_client, CREDITS_PER_CALL
+from credit_ledger import credit_ledger, UnwrangleCreditCapError
+from unwrangle_cache import unwrangle_cache
+from enrichment_cache import EnrichmentCache, prompt_version, is_empty_record
+from request_coalescing import SingleFlight
+from variant_matcher import VariantIndex, VariantMatch, EXACT, VARIATION, separator_key
+from ferguson_grounding import catalog_fields_from_ferguson, home_fields_from_ferguson
+from reenrichment import fields_to_fill, fill_missing_fields
+from job_queue import JobQueue, PermanentJobError
+from metrics_store import metrics_store
+from histogram import LATENCY_HISTOGRAM
+from prometheus import PrometheusWriter, CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE
+from token_budget import (
+    token_ledger, set_api_key, set_api_key_hash, reset_api_key, current_key_hash,
+    TokenBudgetExceededError
+)
+from provider_router import ProviderRouter, AllProvidersFailedError
+import httpx
 
 # Load environment variables
 load_dotenv()
@@ -27,19 +48,75 @@ if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR, exist_ok=True)
 METRICS_FILE = os.path.join(DATA_DIR, "portal_metrics.json")
 
+# Enrichment result cache (persistent, shared by all portals)
+enrichment_cache = EnrichmentCache(
+    db_path=os.path.join(DATA_DIR, "enrichment_cache.db"),
+    ttl_seconds=int(os.getenv("ENRICHMENT_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("ENRICHMENT_CACHE_MAX_ENTRIES", "10000"))
+)
+
+# Negative-result cache: unknown model numbers (Ferguson 404s, all-null AI records)
+# are answered from here for a short while instead of being looked up again
+negative_cache = EnrichmentCache(
+    db_path=os.path.join(DATA_DIR, "negative_cache.db"),
+    ttl_seconds=int(os.getenv("NEGATIVE_CACHE_TTL", "3600")),
+    max_entries=int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000")),
+    metrics_scope="negative_cache"
+)
+
+# Single-flight layer: concurrent identical enrichments share one AI call
+enrichment_flights = SingleFlight()
+
+# Background job queue (persistent, survives restarts)
+job_queue = JobQueue(
+    db_path=os.path.join(DATA_DIR, "jobs.db"),
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+    retry_delay=float(os.getenv("JOB_RETRY_DELAY", "5"))
+)
+
+# AI provider router: picks the primary per portal from recent latency, error
+# rate and completeness (seeded from the shared metrics store), skips providers whose circuit breaker is open, fails
+# over, and optionally hedges (launches the fallback when the primary is
+# slower than its observed latency percentile)
+provider_router = ProviderRouter(
+    hedging_enabled=os.getenv("AI_HEDGING_ENABLED", "false").lower() == "true",
+    hedge_percentile=float(os.getenv("AI_HEDGE_PERCENTILE", "90")),
+    min_samples=int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20")),
+    default_hedge_delay=float(os.getenv("AI_HEDGE_DEFAULT_DELAY", "10")),
+    adaptive=os.getenv("AI_ADAPTIVE_ROUTING", "true").lower() == "true",
+    adaptive_min_samples=int(os.getenv("AI_ADAPTIVE_MIN_SAMPLES", "10")),
+    sample_ttl=float(os.getenv("AI_ADAPTIVE_SAMPLE_TTL", "900")),
+    explore_rate=float(os.getenv("AI_ADAPTIVE_EXPLORE_RATE", "0.05")),
+    failure_threshold=int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5")),
+    recovery_timeout=float(os.getenv("AI_BREAKER_RECOVERY_TIMEOUT", "30"))
+)
+
 # Import home products module
 from home_products import (
     HomeProductRecord,
     enrich_home_product_with_ai,
-    home_products_metrics,
-    calculate_home_product_completeness
+    enrich_home_product_sections_with_ai,
+    stream_home_product_with_ai,
+    load_home_products_metrics,
+    calculate_home_product_completeness,
+    enforce_msrp_rules,
+    finalize_home_product_record,
+    empty_home_product_record,
+    HOME_PRODUCTS_ENRICHMENT_PROMPT
 )
 
+# Import parts prompt (used for enrichment cache versioning)
+from parts import PARTS_ENRICHMENT_PROMPT
+
 # Import verification module
 from verification import (
+    CRITICAL_FIELDS,
     validate_product_data,
     get_verification_summary,
-    add_verification_metadata
+    add_verification_metadata,
+    get_nested_value,
+    set_nested_value
 )
 
 # Initialize FastAPI app
@@ -49,6 +126,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Requests currently being handled by this worker process
+http_in_flight = 0
+
 # API Call Logging Middleware
 @app.middleware("http")
 async def log_api_calls(request: Request, call_next):
@@ -70,10 +150,25 @@ async def log_api_calls(request: Request, call_next):
             pass
     
     # Process request
-    response = await call_next(request)
+    global http_in_flight
+    http_in_flight += 1
+    # LLM token usage and budgets are tracked per API key
+    key_token = set_api_key(request.headers.get("x-api-key"))
+    try:
+        response = await call_next(request)
+    finally:
+        http_in_flight -= 1
+        reset_api_key(key_token)
     
     # Calculate response time
-    response_time_ms = int((time.time() - start_time) * 1000)
+    response_time = time.time() - start_time
+    response_time_ms = int(response_time * 1000)
+    
+    # Request count and latency histogram per route template (bounded cardinality - no path parameters)
+    route = request.scope.get("route")
+    route_path = route.path if route else "unmatched"
+    metrics_store.incr(ENDPOINT_METRICS_SCOPE, route_path, f"status_{response.status_code}")
+    metrics_store.observe(ENDPOINT_METRICS_SCOPE, route_path, response_time)
     
     # Get response data
     response_body = {}
@@ -83,7 +178,7 @@ async def log_api_calls(request: Request, call_next):
         except:
             pass
     
-    # Log the call (async, don't block response)
+    # Log the call (queued - written by the logger's background thread)
     try:
         api_key = request.headers.get('x-api-key') or request.headers.get('X-API-KEY')
         client_ip = request.client.host if request.client else None
@@ -118,14 +213,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize AI clients
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-xai_client = OpenAI(
-    api_key=os.getenv("XAI_API_KEY"),
-    base_url="https://api.x.ai/v1"
-)
+# Close shared AI provider and Unwrangle connection pools on shutdown
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    await close_ai_clients()
+    await unwrangle_client.aclose()
+
+# Write pending portal metrics before the process exits
+@app.on_event("shutdown")
+async def flush_metrics():
+    metrics_store.close()
+
 API_KEY = os.getenv("API_KEY", "test123")
 
+# Batch enrichment limits
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "10"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
 # AI Provider configuration
 AI_PROVIDERS = {
     "openai": {
@@ -142,120 +246,99 @@ AI_PROVIDERS = {
     }
 }
 
-# AI Performance Tracking
-ai_metrics = {
-    "openai": {
-        "total_requests": 0,
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "total_response_time": 0.0,
-        "avg_response_time": 0.0,
-        "total_tokens_used": 0,
-        "avg_tokens": 0,
-        "field_completeness_scores": [],
-        "avg_completeness": 0.0,
-        "last_used": None,
-        "errors": []
-    },
-    "xai": {
-        "total_requests": 0,
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "total_response_time": 0.0,
-        "avg_response_time": 0.0,
-        "total_tokens_used": 0,
-        "avg_tokens": 0,
-        "field_completeness_scores": [],
-        "avg_completeness": 0.0,
-        "last_used": None,
-        "errors": []
-    }
-}
+# AI Performance Tracking (shared by all workers - see metrics_store.py)
+AI_METRICS_SCOPE = "catalog_ai"
+
+def load_ai_metrics() -> dict:
+    """Catalog AI provider metrics, aggregated across all workers."""
+    return metrics_store.provider_metrics(AI_METRICS_SCOPE, AI_PROVIDERS.keys())
 
-# Portal-specific metrics tracking
-def load_metrics():
-    """Load metrics from file if it exists."""
+# Per-endpoint latency histograms (shared by all workers)
+ENDPOINT_METRICS_SCOPE = "endpoint"
+
+# Portal-specific metrics tracking (shared by all workers)
+PORTAL_METRICS_SCOPE = "portal"
+PORTAL_NAMES = ["catalog", "parts", "home_products"]
+PORTAL_COUNTERS = [
+    "total_requests", "successful_requests", "failed_requests",
+    "total_response_time", "ui_calls", "api_calls"
+]
+
+def import_legacy_metrics():
+    """Seed the shared store from portal_metrics.json (written by older versions) on first start."""
+    if not os.path.exists(METRICS_FILE) or metrics_store.has_scope(PORTAL_METRICS_SCOPE):
+        return
+    
     try:
-        if os.path.exists(METRICS_FILE):
-            with open(METRICS_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('portal_metrics', {}), data.get('request_logs', [])
+        with open(METRICS_FILE, 'r') as f:
+            data = json.load(f)
+        
+        legacy_metrics = data.get('portal_metrics', {})
+        counters = {
+            portal: {field: metrics.get(field, 0) for field in PORTAL_COUNTERS}
+            for portal, metrics in legacy_metrics.items()
+        }
+        values = {portal: {"last_used": metrics.get("last_used")} for portal, metrics in legacy_metrics.items()}
+        events = [("all", "request_logs", entry) for entry in data.get('request_logs', [])[-100:]]
+        
+        if metrics_store.import_legacy(PORTAL_METRICS_SCOPE, counters, values, events):
+            print(f"Imported portal metrics from {METRICS_FILE}")
     except Exception as e:
         print(f"Error loading metrics: {e}")
-    
-    # Return default metrics if file doesn't exist or error
-    return {
-        "catalog": {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_response_time": 0.0,
-            "avg_response_time": 0.0,
-            "last_used": None,
-            "ui_calls": 0,
-            "api_calls": 0,
-        },
-        "parts": {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_response_time": 0.0,
-            "avg_response_time": 0.0,
-            "last_used": None,
-            "ui_calls": 0,
-            "api_calls": 0,
-        },
-        "home_products": {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_response_time": 0.0,
-            "avg_response_time": 0.0,
-            "last_used": None,
-            "ui_calls": 0,
-            "api_calls": 0,
+
+def load_portal_metrics() -> dict:
+    """Portal usage metrics, aggregated across all workers."""
+    counters = metrics_store.counters(PORTAL_METRICS_SCOPE)
+    values = metrics_store.values(PORTAL_METRICS_SCOPE)
+    
+    result = {}
+    for portal in PORTAL_NAMES:
+        data = counters.get(portal, {})
+        successful = int(data.get("successful_requests", 0))
+        total_response_time = data.get("total_response_time", 0.0)
+        result[portal] = {
+            "total_requests": int(data.get("total_requests", 0)),
+            "successful_requests": successful,
+            "failed_requests": int(data.get("failed_requests", 0)),
+            "total_response_time": total_response_time,
+            "avg_response_time": total_response_time / successful if successful else 0.0,
+            "last_used": values.get(portal, {}).get("last_used"),
+            "ui_calls": int(data.get("ui_calls", 0)),
+            "api_calls": int(data.get("api_calls", 0)),
+            "latency": metrics_store.histogram_summary(data),
         }
-    }, []
+    return result
 
-def save_metrics():
-    """Save metrics to file."""
-    try:
-        with open(METRICS_FILE, 'w') as f:
-            json.dump({
-                'portal_metrics': portal_metrics,
-                'request_logs': request_logs
-            }, f)
-    except Exception as e:
-        print(f"Error saving metrics: {e}")
+def load_request_logs(limit: int = 100) -> list:
+    """Most recent portal requests (oldest first)."""
+    return metrics_store.events(PORTAL_METRICS_SCOPE, "all", "request_logs", limit=limit)
 
-# Load metrics on startup
-portal_metrics, request_logs = load_metrics()
+# Import metrics from older single-process versions
+import_legacy_metrics()
 
-# Save metrics on shutdown
-atexit.register(save_metrics)
+# Write buffered metrics on shutdown
+atexit.register(metrics_store.close)
 
 def update_portal_metrics(portal_name: str, success: bool, response_time: float, 
                           source: str = "api", user_agent: str = None, model_number: str = None, brand: str = None):
     """Update metrics for a specific portal endpoint."""
-    metrics = portal_metrics[portal_name]
-    metrics["total_requests"] += 1
-    metrics["last_used"] = datetime.utcnow().isoformat()
+    metrics_store.incr(PORTAL_METRICS_SCOPE, portal_name, "total_requests")
+    metrics_store.set_value(PORTAL_METRICS_SCOPE, portal_name, "last_used", datetime.utcnow().isoformat())
     
     # Track source (UI vs API)
-    if source == "ui":
-        metrics["ui_calls"] += 1
-    else:
-        metrics["api_calls"] += 1
+    metrics_store.incr(PORTAL_METRICS_SCOPE, portal_name, "ui_calls" if source == "ui" else "api_calls")
     
     if success:
-        metrics["successful_requests"] += 1
-        metrics["total_response_time"] += response_time
-        metrics["avg_response_time"] = metrics["total_response_time"] / metrics["successful_requests"]
+        metrics_store.incr(PORTAL_METRICS_SCOPE, portal_name, "successful_requests")
+        metrics_store.incr(PORTAL_METRICS_SCOPE, portal_name, "total_response_time", response_time)
     else:
-        metrics["failed_requests"] += 1
+        metrics_store.incr(PORTAL_METRICS_SCOPE, portal_name, "failed_requests")
     
-    # Log the request
-    log_entry = {
+    # Latency distribution (all requests, so failures and timeouts show up in p99)
+    metrics_store.observe(PORTAL_METRICS_SCOPE, portal_name, response_time)
+    
+    # Log the request (keep only last 100 logs)
+    metrics_store.add_event(PORTAL_METRICS_SCOPE, "all", "request_logs", {
         "timestamp": datetime.utcnow().isoformat(),
         "portal": portal_name,
         "endpoint": f"/enrich-{portal_name}" if portal_name != "catalog" else "/enrich",
@@ -265,16 +348,7 @@ def update_portal_metrics(portal_name: str, success: bool, response_time: float,
         "model_number": model_number,
         "brand": brand,
         "user_agent": user_agent[:100] if user_agent else None  # Truncate long user agents
-    }
-    
-    request_logs.append(log_entry)
-    
-    # Keep only last 100 logs
-    if len(request_logs) > 100:
-        request_logs.pop(0)
-    
-    # Save metrics after each update
-    save_metrics()
+    }, keep=100)
 
 def calculate_field_completeness(product_record: 'ProductRecord') -> float:
     """Calculate what percentage of optional fields are populated."""
@@ -305,36 +379,18 @@ def update_metrics(provider_name: str, success: bool, response_time: float,
                    tokens_used: int = 0, product_record: 'ProductRecord' = None, 
                    error: str = None):
     """Update performance metrics for a provider."""
-    metrics = ai_metrics[provider_name]
-    metrics["total_requests"] += 1
-    metrics["last_used"] = datetime.utcnow().isoformat()
+    completeness = None
+    if success and product_record:
+        completeness = calculate_field_completeness(product_record)
     
-    if success:
-        metrics["successful_requests"] += 1
-        metrics["total_response_time"] += response_time
-        metrics["avg_response_time"] = metrics["total_response_time"] / metrics["successful_requests"]
-        
-        if tokens_used > 0:
-            metrics["total_tokens_used"] += tokens_used
-            metrics["avg_tokens"] = metrics["total_tokens_used"] // metrics["successful_requests"]
-        
-        if product_record:
-            completeness = calculate_field_completeness(product_record)
-            metrics["field_completeness_scores"].append(completeness)
-            # Keep only last 100 scores for moving average
-            if len(metrics["field_completeness_scores"]) > 100:
-                metrics["field_completeness_scores"] = metrics["field_completeness_scores"][-100:]
-            metrics["avg_completeness"] = sum(metrics["field_completeness_scores"]) / len(metrics["field_completeness_scores"])
-    else:
-        metrics["failed_requests"] += 1
-        if error and len(metrics["errors"]) < 10:  # Keep last 10 errors
-            metrics["errors"].append({
-                "timestamp": datetime.utcnow().isoformat(),
-                "error": error[:200]  # Truncate long errors
-            })
+    metrics_store.record_provider_call(
+        AI_METRICS_SCOPE, provider_name, success, response_time,
+        tokens_used=tokens_used, completeness=completeness, error=error
+    )
 
 def get_performance_comparison() -> dict:
     """Compare performance between providers and recommend best."""
+    ai_metrics = load_ai_metrics()
     openai_metrics = ai_metrics["openai"]
     xai_metrics = ai_metrics["xai"]
     
@@ -395,12 +451,56 @@ def get_performance_comparison() -> dict:
         }
     }
 
+def provider_seed_metrics(portal: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-provider metrics for a portal from the shared store (all workers) - seeds
+    adaptive routing scores until a worker has enough recent samples of its own
+    """
+    if portal == "home_products":
+        return {
+            name: {
+                "samples": metrics["requests"],
+                "success_rate": metrics["successful"] / metrics["requests"] * 100 if metrics["requests"] else 0.0,
+                "p90": metrics["latency"]["p90"],
+                "completeness": metrics["avg_completeness"]
+            }
+            for name, metrics in load_home_products_metrics().items()
+        }
+    
+    if portal == "parts":
+        from parts import load_parts_ai_metrics
+        provider_metrics = load_parts_ai_metrics()
+    else:
+        provider_metrics = load_ai_metrics()
+    
+    return {
+        name: {
+            "samples": metrics["total_requests"],
+            "success_rate": metrics["successful_requests"] / metrics["total_requests"] * 100
+            if metrics["total_requests"] else 0.0,
+            "p90": metrics["latency"]["p90"],
+            "completeness": metrics["avg_completeness"]
+        }
+        for name, metrics in provider_metrics.items()
+    }
+
 # Pydantic models for request/response
 class EnrichRequest(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
     
     brand: str = Field(..., description="Product brand name")
     model_number: str = Field(..., description="Product model number")
+    ferguson_grounding: Optional[bool] = Field(
+        None,
+        description="Fill the record from the Ferguson lookup first and ask the AI only for the "
+                    "remaining fields. Defaults to FERGUSON_GROUNDING."
+    )
+    fill_missing: bool = Field(
+        False, description="Re-enrich only the null/unverified fields of the cached record"
+    )
+    field_details: Optional[Dict[str, Any]] = Field(
+        None, description="verification field_details of the previous result (recomputed if omitted)"
+    )
 
 class VerifiedInformation(BaseModel):
     model_config = ConfigDict(protected_namespaces=())
@@ -582,6 +682,9 @@ class EnrichResponse(BaseModel):
     success: bool
     data: Optional[ProductRecord] = None
     error: Optional[str] = None
+    cached: bool = False
+    filled_fields: Optional[List[str]] = None
+    verification: Optional[Dict[str, Any]] = None
 
 # Auth middleware
 async def verify_api_key(x_api_key: str = Header(...)):
@@ -598,7 +701,13 @@ async def root():
         "status": "operational",
         "endpoints": {
             "health": "/health",
-            "enrich": "/enrich (POST)"
+            "enrich": "/enrich (POST)",
+            "enrich_batch": "/enrich/batch (POST, NDJSON stream)",
+            "jobs": "/jobs (POST), /jobs/{job_id} (GET)",
+            "latency": "/metrics/latency",
+            "prometheus": "/metrics",
+            "token_usage": "/token-usage",
+            "unwrangle_credits": "/unwrangle/credits"
         }
     }
 
@@ -610,16 +719,30 @@ async def health_check():
         "ai_providers": {
             "openai": {
                 "enabled": AI_PROVIDERS["openai"]["enabled"],
-                "model": AI_PROVIDERS["openai"]["model"]
+                "model": AI_PROVIDERS["openai"]["model"],
+                "circuit": provider_router.breaker("openai").state
             },
             "xai": {
                 "enabled": AI_PROVIDERS["xai"]["enabled"],
-                "model": AI_PROVIDERS["xai"]["model"]
+                "model": AI_PROVIDERS["xai"]["model"],
+                "circuit": provider_router.breaker("xai").state
             }
         },
+        "unwrangle": {
+            "circuit": unwrangle_client.breaker.state
+        },
         "primary_provider": "openai" if AI_PROVIDERS["openai"]["enabled"] else "xai"
     }
 
+def provider_status(provider_name: str) -> str:
+    """active / disabled / circuit_open / half_open"""
+    if not AI_PROVIDERS[provider_name]["enabled"]:
+        return "disabled"
+    state = provider_router.breaker(provider_name).state
+    if state == "closed":
+        return "active"
+    return "circuit_open" if state == "open" else "half_open"
+
 # AI Provider status endpoint
 @app.get("/ai-providers")
 async def get_ai_providers(x_api_key: str = Header(..., alias="X-API-KEY")):
@@ -635,18 +758,23 @@ async def get_ai_providers(x_api_key: str = Header(..., alias="X-API-KEY")):
                 "name": AI_PROVIDERS["openai"]["name"],
                 "model": AI_PROVIDERS["openai"]["model"],
                 "enabled": AI_PROVIDERS["openai"]["enabled"],
-                "status": "active" if AI_PROVIDERS["openai"]["enabled"] else "disabled"
+                "status": provider_status("openai"),
+                "circuit_breaker": provider_router.breaker("openai").get_status()
             },
             "xai": {
                 "name": AI_PROVIDERS["xai"]["name"],
                 "model": AI_PROVIDERS["xai"]["model"],
                 "enabled": AI_PROVIDERS["xai"]["enabled"],
-                "status": "active" if AI_PROVIDERS["xai"]["enabled"] else "disabled"
+                "status": provider_status("xai"),
+                "circuit_breaker": provider_router.breaker("xai").get_status()
             }
         },
-        "strategy": "fallback",
+        "unwrangle_circuit_breaker": unwrangle_client.breaker.get_status(),
+        "strategy": "adaptive" if provider_router.adaptive else "fallback",
         "primary": "openai" if AI_PROVIDERS["openai"]["enabled"] else "xai",
-        "fallback": "xai" if AI_PROVIDERS["openai"]["enabled"] and AI_PROVIDERS["xai"]["enabled"] else None
+        "fallback": "xai" if AI_PROVIDERS["openai"]["enabled"] and AI_PROVIDERS["xai"]["enabled"] else None,
+        "primary_by_portal": provider_router.primary,
+        "hedging_enabled": provider_router.hedging_enabled
     }
 
 # AI Performance Metrics endpoint
@@ -659,7 +787,26 @@ async def get_ai_metrics(x_api_key: str = Header(..., alias="X-API-KEY")):
     await verify_api_key(x_api_key)
     
     return {
-        "metrics": ai_metrics,
+        "metrics": load_ai_metrics(),
+        "routing": provider_router.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Token usage endpoint
+@app.get("/token-usage")
+async def get_token_usage(x_api_key: str = Header(..., alias="X-API-KEY")):
+    """
+    Get LLM prompt/completion tokens and estimated cost by API key (hashed), portal
+    and provider, plus today's usage against each key's daily token budget.
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    return {
+        "your_key": current_key_hash(),
+        "usage": token_ledger.usage(),
+        "budgets": token_ledger.budgets(),
+        "stats": token_ledger.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -672,10 +819,10 @@ async def get_parts_ai_metrics(x_api_key: str = Header(..., alias="X-API-KEY")):
     """
     await verify_api_key(x_api_key)
     
-    from parts import parts_ai_metrics
+    from parts import load_parts_ai_metrics
     
     return {
-        "metrics": parts_ai_metrics,
+        "metrics": load_parts_ai_metrics(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -690,6 +837,8 @@ async def get_portal_metrics(x_api_key: str = Header(..., alias="X-API-KEY")):
     """
     await verify_api_key(x_api_key)
     
+    portal_metrics = load_portal_metrics()
+    
     # Calculate totals
     total_requests = sum(p["total_requests"] for p in portal_metrics.values())
     total_successful = sum(p["successful_requests"] for p in portal_metrics.values())
@@ -708,10 +857,204 @@ async def get_portal_metrics(x_api_key: str = Header(..., alias="X-API-KEY")):
             "ui_calls": total_ui_calls,
             "api_calls": total_api_calls
         },
-        "recent_logs": request_logs[-50:],  # Return last 50 requests
+        "recent_logs": load_request_logs(limit=50),  # Return last 50 requests
+        "cache": enrichment_cache.get_stats(),
+        "persistence": metrics_store.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Latency percentiles endpoint
+@app.get("/metrics/latency")
+async def get_latency_metrics(x_api_key: str = Header(..., alias="X-API-KEY")):
+    """
+    Get latency percentiles (p50/p90/p95/p99, seconds) per endpoint, portal and AI provider.
+    Built from streaming histograms aggregated across all workers.
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    from parts import PARTS_METRICS_SCOPE
+    from home_products import HOME_PRODUCTS_METRICS_SCOPE
+    
+    return {
+        "endpoints": metrics_store.histograms(ENDPOINT_METRICS_SCOPE),
+        "portals": metrics_store.histograms(PORTAL_METRICS_SCOPE),
+        "providers": {
+            "catalog": metrics_store.histograms(AI_METRICS_SCOPE),
+            "parts": metrics_store.histograms(PARTS_METRICS_SCOPE),
+            "home_products": metrics_store.histograms(HOME_PRODUCTS_METRICS_SCOPE)
+        },
+        "ask_ai": {
+            "latency": metrics_store.histograms(ASK_AI_METRICS_SCOPE),
+            "time_to_first_token": metrics_store.histograms(ASK_AI_METRICS_SCOPE, prefix="ttft")
+        },
+        "unit": "seconds",
+        "relative_error": LATENCY_HISTOGRAM.precision,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# Unwrangle credits endpoint
+@app.get("/unwrangle/credits")
+async def get_unwrangle_credits(
+    days: int = 7,
+    x_api_key: str = Header(..., alias="X-API-KEY")
+):
+    """
+    Get Unwrangle credit spend for today (by hour, API key and platform), daily
+    totals for the last `days` days, and the daily soft/hard cap status.
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    return {
+        "success": True,
+        "credits": credit_ledger.report(days=max(1, min(days, 90))),
         "timestamp": datetime.utcnow().isoformat()
     }
 
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus text exposition of request counts, latency histograms, LLM tokens,
+    Unwrangle credits, cache hit ratio and in-flight requests.
+    Counters are aggregated across all workers; no API key (scraped like /health).
+    """
+    from parts import PARTS_METRICS_SCOPE
+    from home_products import HOME_PRODUCTS_METRICS_SCOPE
+    
+    writer = PrometheusWriter()
+    
+    # HTTP
+    endpoints = metrics_store.counters(ENDPOINT_METRICS_SCOPE)
+    writer.counter("http_requests_total", "HTTP requests by route template and status code", [
+        ({"route": route, "status": field[len("status_"):]}, value)
+        for route, fields in endpoints.items()
+        for field, value in fields.items() if field.startswith("status_")
+    ])
+    writer.histogram("http_request_duration_seconds", "HTTP request latency by route template",
+                     LATENCY_HISTOGRAM, [({"route": route}, fields) for route, fields in endpoints.items()])
+    writer.gauge("http_requests_in_flight", "Requests currently being handled by this worker process",
+                 [({"pid": str(os.getpid())}, http_in_flight)])
+    
+    # Portals
+    portals = metrics_store.counters(PORTAL_METRICS_SCOPE)
+    writer.counter("portal_requests_total", "Enrichment requests by portal and outcome", [
+        ({"portal": portal, "outcome": outcome}, fields.get(field, 0))
+        for portal, fields in portals.items()
+        for outcome, field in (("success", "successful_requests"), ("failure", "failed_requests"))
+    ])
+    writer.histogram("portal_request_duration_seconds", "Enrichment latency by portal",
+                     LATENCY_HISTOGRAM, [({"portal": portal}, fields) for portal, fields in portals.items()])
+    
+    # AI providers (home products uses its own counter names)
+    provider_scopes = [
+        ("catalog", AI_METRICS_SCOPE, "successful_requests", "failed_requests"),
+        ("parts", PARTS_METRICS_SCOPE, "successful_requests", "failed_requests"),
+        ("home_products", HOME_PRODUCTS_METRICS_SCOPE, "successful", "failed")
+    ]
+    provider_requests, provider_latency, provider_tokens = [], [], []
+    for portal, scope, success_field, failure_field in provider_scopes:
+        for provider, fields in metrics_store.counters(scope).items():
+            labels = {"portal": portal, "provider": provider}
+            provider_requests.append(({**labels, "outcome": "success"}, fields.get(success_field, 0)))
+            provider_requests.append(({**labels, "outcome": "failure"}, fields.get(failure_field, 0)))
+            provider_latency.append((labels, fields))
+            if "total_tokens_used" in fields:
+                provider_tokens.append((labels, fields["total_tokens_used"]))
+    writer.counter("ai_requests_total", "AI provider calls by portal, provider and outcome", provider_requests)
+    writer.histogram("ai_request_duration_seconds", "Successful AI provider call latency",
+                     LATENCY_HISTOGRAM, provider_latency)
+    writer.counter("ai_tokens_total", "LLM tokens used by portal and provider", provider_tokens)
+    
+    # Ask AI (blocking and streaming answers)
+    ask_ai = [
+        (dict(zip(("provider", "mode"), name.split("|", 1))), fields)
+        for name, fields in metrics_store.counters(ASK_AI_METRICS_SCOPE).items()
+    ]
+    writer.counter("ask_ai_requests_total", "Ask AI answers by provider, mode and outcome", [
+        ({**labels, "outcome": outcome}, fields.get(field, 0))
+        for labels, fields in ask_ai
+        for outcome, field in (("success", "successful"), ("failure", "failed"))
+    ])
+    writer.histogram("ask_ai_duration_seconds", "Ask AI answer latency (complete answer)",
+                     LATENCY_HISTOGRAM, ask_ai)
+    writer.histogram("ask_ai_time_to_first_token_seconds", "Ask AI time to first streamed token",
+                     LATENCY_HISTOGRAM, ask_ai, prefix="ttft")
+    writer.counter("ask_ai_tokens_total", "LLM tokens used by Ask AI answers", [
+        (labels, fields.get("total_tokens_used", 0)) for labels, fields in ask_ai
+    ])
+    
+    # LLM tokens and cost per API key
+    usage = [
+        ({"api_key": key_hash, "portal": portal, "provider": provider}, counters)
+        for key_hash, portals in token_ledger.usage().items()
+        for portal, providers in portals.items()
+        for provider, counters in providers.items()
+    ]
+    writer.counter("llm_tokens_total", "LLM tokens by API key hash, portal, provider and type", [
+        ({**labels, "type": token_type}, counters[f"{token_type}_tokens"])
+        for labels, counters in usage for token_type in ("prompt", "completion")
+    ])
+    writer.counter("llm_cost_usd_total", "Estimated LLM cost in USD by API key hash, portal and provider",
+                   [(labels, counters["cost_usd"]) for labels, counters in usage])
+    writer.gauge("llm_tokens_used_today", "Tokens used since 00:00 UTC by API key hash",
+                 [({"api_key": key_hash}, budget["used_today"]) for key_hash, budget in token_ledger.budgets().items()])
+    
+    # Unwrangle
+    unwrangle = metrics_store.counters("unwrangle")
+    writer.counter("unwrangle_requests_total", "Unwrangle API calls by platform",
+                   [({"platform": platform}, fields.get("requests", 0)) for platform, fields in unwrangle.items()])
+    writer.counter("unwrangle_credits_total", "Unwrangle credits spent by platform",
+                   [({"platform": platform}, fields.get("credits", 0)) for platform, fields in unwrangle.items()])
+    writer.gauge("unwrangle_credits_today", "Unwrangle credits spent since 00:00 UTC", [({}, credit_ledger.spent_today())])
+    writer.gauge("unwrangle_credit_cap", "Daily Unwrangle credit caps (0 = none)", [
+        ({"cap": "soft"}, credit_ledger.soft_cap), ({"cap": "hard"}, credit_ledger.hard_cap)
+    ])
+    
+    # Enrichment cache
+    cache = metrics_store.counters("enrichment_cache")
+    writer.counter("enrichment_cache_lookups_total", "Enrichment cache lookups by portal and result", [
+        ({"portal": portal, "result": result}, fields.get(field, 0))
+        for portal, fields in cache.items()
+        for result, field in (("hit", "hits"), ("miss", "misses"))
+    ])
+    writer.gauge("enrichment_cache_hit_ratio", "Enrichment cache hit ratio by portal", [
+        ({"portal": portal}, fields.get("hits", 0) / (fields.get("hits", 0) + fields.get("misses", 0)))
+        for portal, fields in cache.items() if fields.get("hits", 0) + fields.get("misses", 0) > 0
+    ])
+    negative = metrics_store.counters("negative_cache")
+    writer.counter("negative_cache_lookups_total", "Negative-result cache lookups by portal and result", [
+        ({"portal": portal, "result": result}, fields.get(field, 0))
+        for portal, fields in negative.items()
+        for result, field in (("hit", "hits"), ("miss", "misses"))
+    ])
+    grounding = metrics_store.counters(FERGUSON_GROUNDING_SCOPE)
+    writer.counter("ferguson_grounding_total", "Ferguson-first grounding attempts by portal and result", [
+        ({"portal": portal, "result": result}, count)
+        for portal, fields in grounding.items() for result, count in fields.items()
+    ])
+    
+    # Unwrangle response cache
+    unwrangle_lookups = metrics_store.counters("unwrangle_cache")
+    writer.counter("unwrangle_cache_lookups_total", "Unwrangle response cache lookups by platform and result", [
+        ({"platform": platform, "result": result}, fields.get(field, 0))
+        for platform, fields in unwrangle_lookups.items()
+        for result, field in (("hit", "hits"), ("stale", "stale_hits"), ("miss", "misses"))
+    ])
+    
+    # Circuit breakers (per worker process)
+    breakers = [provider_router.breaker(name) for name in AI_PROVIDERS] + [unwrangle_client.breaker]
+    writer.gauge("circuit_breaker_open", "1 while a dependency's circuit is open or half-open",
+                 [({"name": breaker.name, "pid": str(os.getpid())}, 0 if breaker.state == "closed" else 1)
+                  for breaker in breakers])
+    
+    # Background jobs
+    writer.gauge("jobs", "Background jobs by status",
+                 [({"status": status}, count) for status, count in job_queue.get_stats()["by_status"].items()])
+    
+    return PlainTextResponse(writer.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # AI Performance Comparison endpoint
 @app.get("/ai-comparison")
 async def get_ai_comparison(x_api_key: str = Header(..., alias="X-API-KEY")):
@@ -722,6 +1065,7 @@ async def get_ai_comparison(x_api_key: str = Header(..., alias="X-API-KEY")):
     await verify_api_key(x_api_key)
     
     comparison = get_performance_comparison()
+    ai_metrics = load_ai_metrics()
     
     # Add alert if one provider is significantly better
     alert = None
@@ -764,21 +1108,8 @@ async def reset_ai_metrics(x_api_key: str = Header(..., alias="X-API-KEY")):
     """
     await verify_api_key(x_api_key)
     
-    # Reset all metrics
-    for provider in ["openai", "xai"]:
-        ai_metrics[provider] = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "total_response_time": 0.0,
-            "avg_response_time": 0.0,
-            "total_tokens_used": 0,
-            "avg_tokens": 0,
-            "field_completeness_scores": [],
-            "avg_completeness": 0.0,
-            "last_used": None,
-            "errors": []
-        }
+    # Reset all metrics (for every worker)
+    metrics_store.reset(AI_METRICS_SCOPE)
     
     return {
         "success": True,
@@ -808,8 +1139,19 @@ async def enrich_product(
     source = "ui" if referer and ("vercel.app" in referer or "localhost" in referer) else "api"
     
     try:
-        # Call OpenAI to generate product data
-        product_data = await generate_product_data(request.brand, request.model_number)
+        # Second pass: only the missing/unverified fields of the cached record
+        refilled = None
+        if request.fill_missing:
+            refilled = await refill_product_data(request.brand, request.model_number, request.field_details)
+        
+        if refilled is not None:
+            product_data, filled_fields, field_sources, cache_hit = refilled
+        else:
+            # Generate product data (served from the enrichment cache when available)
+            product_data, cache_hit, field_sources = await cached_product_data(
+                request.brand, request.model_number, request.ferguson_grounding
+            )
+            filled_fields = None
         
         success = True
         response_time = time.time() - start_time
@@ -825,6 +1167,7 @@ async def enrich_product(
             flattened_data = {}
             if 'verified_information' in product_dict:
                 flattened_data.update(product_dict['verified_information'])
+            flattened_data.update(catalog_source_fields(field_sources))
             
             # Validate data against 2-source verification requirements
             validation_result = validate_product_data(
@@ -837,11 +1180,14 @@ async def enrich_product(
             return {
                 "success": True,
                 "data": product_data,
+                "cached": cache_hit,
+                **({"filled_fields": filled_fields} if filled_fields is not None else {}),
                 "verification": {
                     "summary": get_verification_summary(validation_result['verification']),
                     "rate": validation_result['verification']['verification_rate'],
                     "verified_count": validation_result['verification']['verified_fields'],
-                    "total_critical_fields": validation_result['verification']['total_critical_fields']
+                    "total_critical_fields": validation_result['verification']['total_critical_fields'],
+                    "field_details": validation_result['verification']['field_details']
                 }
             }
         except Exception as verify_error:
@@ -849,9 +1195,15 @@ async def enrich_product(
             print(f"Verification failed: {str(verify_error)}")
             return EnrichResponse(
                 success=True,
-                data=product_data
+                data=product_data,
+                cached=cache_hit
             )
     
+    except TokenBudgetExceededError as e:
+        # Over the API key's daily token budget - not a provider failure
+        update_portal_metrics("catalog", False, time.time() - start_time, source, user_agent,
+                             request.model_number, request.brand)
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         response_time = time.time() - start_time
         update_portal_metrics("catalog", success, response_time, source, user_agent,
@@ -898,129 +1250,90 @@ async def enrich_appliance_part(
     source = "ui" if referer and ("vercel.app" in referer or "localhost" in referer) else "api"
     
     try:
-        # Import parts module functions
-        from parts import (
-            enrich_part_with_ai, 
-            update_parts_metrics,
-            AI_PROVIDERS as PARTS_AI_PROVIDERS
-        )
-        
-        # Try primary provider (OpenAI), fallback to xAI
-        providers_to_try = ["openai", "xai"] if PARTS_AI_PROVIDERS["openai"]["enabled"] else ["xai"]
-        
-        last_error = None
-        for provider_name in providers_to_try:
-            try:
-                part_record, metrics = enrich_part_with_ai(
-                    request.part_number,
-                    request.brand,
-                    provider=provider_name
-                )
-                
-                # Update metrics
-                update_parts_metrics(provider_name, metrics, success=True)
-                success = True
-                response_time = time.time() - start_time
-                
-                # Get headers for source detection
-                from fastapi import Request as FastAPIRequest
-                # Note: We'll need to add request parameter to function signature
-                
-                update_portal_metrics("parts", success, response_time, source, user_agent,
-                                     request.part_number, request.brand)
-                
-                # Flatten part_record to get core_identification fields for validation
-                part_dict = part_record.dict()
-                flattened_data = {}
-                if 'core_identification' in part_dict:
-                    flattened_data.update(part_dict['core_identification'])
-                
-                # Validate part data against 2-source verification requirements
-                validation_result = validate_product_data(
-                    flattened_data,
-                    portal='parts',
-                    strict_mode=True
-                )
-                
-                # Return original structure with verification metadata
-                return PartEnrichResponse(
-                    success=True,
-                    data=part_dict,
-                    metrics={
-                        "provider": provider_name,
-                        "response_time": f"{metrics['response_time']:.2f}s",
-                        "tokens_used": metrics['tokens_used'],
-                        "completeness": f"{metrics['completeness']:.1f}%",
-                        "verification_rate": f"{validation_result['verification']['verification_rate']:.1f}%",
-                        "verified_fields": f"{validation_result['verification']['verified_fields']}/{validation_result['verification']['total_critical_fields']}"
-                    }
-                )
-                
-            except Exception as e:
-                last_error = str(e)
-                update_parts_metrics(provider_name, {"error": str(e)}, success=False)
-                continue
+        # Enrich part (served from the enrichment cache when available)
+        part_dict, metrics, cache_hit = await cached_part_data(request.part_number, request.brand)
         
-        # All providers failed
+        success = True
         response_time = time.time() - start_time
         update_portal_metrics("parts", success, response_time, source, user_agent,
                              request.part_number, request.brand)
+        
+        # Flatten part_record to get core_identification fields for validation
+        flattened_data = {}
+        if 'core_identification' in part_dict:
+            flattened_data.update(part_dict['core_identification'] or {})
+        
+        # Validate part data against 2-source verification requirements
+        validation_result = validate_product_data(
+            flattened_data,
+            portal='parts',
+            strict_mode=True
+        )
+        
+        # Return original structure with verification metadata
         return PartEnrichResponse(
-            success=False,
-            error=f"All AI providers failed. Last error: {last_error}"
+            success=True,
+            data=part_dict,
+            metrics={
+                "provider": metrics["provider"],
+                "response_time": f"{metrics['response_time']:.2f}s",
+                "tokens_used": metrics['tokens_used'],
+                "completeness": f"{metrics['completeness']:.1f}%",
+                "verification_rate": f"{validation_result['verification']['verification_rate']:.1f}%",
+                "verified_fields": f"{validation_result['verification']['verified_fields']}/{validation_result['verification']['total_critical_fields']}",
+                "cached": cache_hit
+            }
         )
     
+    except TokenBudgetExceededError as e:
+        # Over the API key's daily token budget - not a provider failure
+        update_portal_metrics("parts", False, time.time() - start_time, source, user_agent,
+                             request.part_number, request.brand)
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
+        response_time = time.time() - start_time
+        update_portal_metrics("parts", success, response_time, source, user_agent,
+                             request.part_number, request.brand)
         return PartEnrichResponse(
             success=False,
             error=str(e)
         )
 
-async def generate_product_data(brand: str, model_number: str) -> ProductRecord:
+async def generate_part_data(part_number: str, brand: str) -> tuple:
     """
-    Use AI (OpenAI primary, xAI fallback) to research and generate complete product data.
+    Use AI (OpenAI/xAI, ordered by the adaptive provider router) to enrich appliance part data.
+    Returns: (PartRecord, metrics_dict)
     """
+    from parts import (
+        enrich_part_with_ai,
+        update_parts_metrics,
+        AI_PROVIDERS as PARTS_AI_PROVIDERS
+    )
     
-    # Try primary provider (OpenAI), fallback to xAI if it fails
-    providers_to_try = ["openai", "xai"] if AI_PROVIDERS["openai"]["enabled"] else ["xai"]
+    # Providers in default order - the router reorders them on live metrics
+    providers_to_try = ["openai", "xai"] if PARTS_AI_PROVIDERS["openai"]["enabled"] else ["xai"]
+    token_ledger.check()
     
-    last_error = None
-    for provider_name in providers_to_try:
-        provider = AI_PROVIDERS.get(provider_name)
-        if not provider or not provider["enabled"]:
-            continue
-            
-        start_time = time.time()
+    async def attempt(provider_name: str) -> tuple:
         try:
-            result = await _generate_with_provider(brand, model_number, provider_name, provider)
-            response_time = time.time() - start_time
-            
-            # Track successful request
-            update_metrics(provider_name, True, response_time, 
-                         tokens_used=0,  # Will be updated in _generate_with_provider
-                         product_record=result)
-            
-            return result
+            part_record, metrics = await enrich_part_with_ai(
+                part_number,
+                brand,
+                provider=provider_name
+            )
         except Exception as e:
-            response_time = time.time() - start_time
-            last_error = e
-            
-            # Track failed request
-            update_metrics(provider_name, False, response_time, error=str(e))
-            
-            print(f"[{provider_name}] Failed: {str(e)}")
-            continue
+            update_parts_metrics(provider_name, {"error": str(e)}, success=False)
+            raise
+        update_parts_metrics(provider_name, metrics, success=True)
+        return part_record, metrics
     
-    # If all providers failed, raise the last error
-    raise Exception(f"All AI providers failed. Last error: {str(last_error)}")
+    (part_record, metrics), _ = await provider_router.call(
+        "parts", providers_to_try, attempt, provider_seed_metrics("parts")
+    )
+    return part_record, metrics
 
-async def _generate_with_provider(brand: str, model_number: str, provider_name: str, provider: dict) -> ProductRecord:
-    """
-    Generate product data using a specific AI provider.
-    """
-    
-    # System prompt to ensure structured output
-    system_prompt = """You are an expert product research assistant specializing in appliances and consumer products. 
+# Catalog enrichment system prompt (hashed into the enrichment cache key)
+CATALOG_SYSTEM_PROMPT = """You are an expert product research assistant specializing in appliances and consumer products. 
 Your task is to research and provide comprehensive, accurate product information based on the brand and model number provided.
 
 ⚠️ STRICT MSRP VALIDATION - AUTHORITATIVE SOURCES REQUIRED:
@@ -1210,14 +1523,63 @@ CRITICAL INSTRUCTIONS:
 - For capacities, use appropriate units (cu.ft. for refrigerators, lbs for washers, etc.)
 - Return ONLY the JSON object, no markdown, no additional text"""
 
+async def generate_product_data(brand: str, model_number: str,
+                                ferguson_grounding: Optional[bool] = None) -> tuple:
+    """
+    Use AI (OpenAI/xAI, ordered by the adaptive provider router) to research and generate complete product data.
+    ferguson_grounding (default FERGUSON_GROUNDING) fills the record from the Ferguson lookup
+    first and asks the AI only for the rest, when Ferguson carries the model.
+    Returns: (ProductRecord, field_sources) - sources of the critical fields ({} unless grounded)
+    """
+    
+    # Providers in default order - the router reorders them on live metrics
+    providers_to_try = [name for name in ("openai", "xai") if AI_PROVIDERS[name]["enabled"]]
+    
+    # Reject before calling any provider if the API key is over its daily token budget
+    token_ledger.check()
+    
+    if ferguson_grounding_enabled(ferguson_grounding):
+        ferguson_product = await ferguson_grounding_product("catalog", model_number)
+        if ferguson_product is not None:
+            return await generate_grounded_product_data(brand, model_number, ferguson_product)
+    
+    async def attempt(provider_name: str) -> ProductRecord:
+        start_time = time.time()
+        try:
+            result, tokens_used = await _generate_with_provider(brand, model_number, provider_name, AI_PROVIDERS[provider_name])
+        except Exception as e:
+            # Track failed request (a cancelled hedge loser is not a failure)
+            update_metrics(provider_name, False, time.time() - start_time, error=str(e))
+            print(f"[{provider_name}] Failed: {str(e)}")
+            raise
+        
+        # Track successful request
+        update_metrics(provider_name, True, time.time() - start_time, 
+                     tokens_used=tokens_used,
+                     product_record=result)
+        return result
+    
+    result, _ = await provider_router.call(
+        "catalog", providers_to_try, attempt, provider_seed_metrics("catalog")
+    )
+    return result, {}
+
+async def _generate_with_provider(brand: str, model_number: str, provider_name: str, provider: dict) -> tuple:
+    """
+    Generate product data using a specific AI provider.
+    Returns: (ProductRecord, tokens_used)
+    """
+    
+    system_prompt = CATALOG_SYSTEM_PROMPT
+    
     user_prompt = f"""Research and provide complete product information for:
 Brand: {brand}
 Model Number: {model_number}
 
 Return comprehensive, verified product data in the specified JSON format."""
 
-    # Call AI API
-    response = provider["client"].chat.completions.create(
+    # Call AI API (non-blocking, shares the provider's connection pool)
+    response = await provider["client"].chat.completions.create(
         model=provider["model"],
         messages=[
             {"role": "system", "content": system_prompt},
@@ -1228,10 +1590,8 @@ Return comprehensive, verified product data in the specified JSON format."""
         max_tokens=4000  # Increased for comprehensive appliance data
     )
     
-    # Track token usage
-    tokens_used = response.usage.total_tokens if hasattr(response, 'usage') else 0
-    if tokens_used > 0:
-        ai_metrics[provider_name]["total_tokens_used"] += tokens_used
+    # Track token usage (per API key / portal / provider)
+    tokens_used = token_ledger.record_response("catalog", provider_name, provider["model"], response)
     
     # Parse AI response
     raw_data = json.loads(response.choices[0].message.content)
@@ -1265,8 +1625,11 @@ Return comprehensive, verified product data in the specified JSON format."""
             raw_data["msrp_source_count"] = len(valid_sources)
             raw_data["msrp_verified"] = True
     
-    # Map to our structured ProductRecord model
-    product_record = ProductRecord(
+    return product_record_from_raw(raw_data, brand, model_number, provider["name"]), tokens_used
+
+def product_record_from_raw(raw_data: dict, brand: str, model_number: str, verified_by: str) -> ProductRecord:
+    """Map the flat catalog fields (the JSON format of CATALOG_SYSTEM_PROMPT) to a ProductRecord"""
+    return ProductRecord(
         verified_information=VerifiedInformation(
             brand=raw_data.get("brand", brand),
             model_number=raw_data.get("model_number", model_number),
@@ -1283,7 +1646,7 @@ Return comprehensive, verified product data in the specified JSON format."""
             msrp_sources=raw_data.get("msrp_sources"),
             msrp_source_count=raw_data.get("msrp_source_count"),
             msrp_verified=raw_data.get("msrp_verified"),
-            verified_by=provider["name"]
+            verified_by=verified_by
         ),
         dimensions_and_weight=DimensionsAndWeight(
             product_dimensions=ProductDimensions(
@@ -1417,94 +1780,596 @@ Return comprehensive, verified product data in the specified JSON format."""
             outdoor_rated=raw_data.get("outdoor_rated")
         )
     )
-    
-    return product_record
 
 # ============================================================================
-# HOME PRODUCTS ENDPOINTS (Plumbing, Kitchen, Lighting, Bath)
+# ENRICHMENT RESULT CACHE
 # ============================================================================
 
-class HomeProductEnrichRequest(BaseModel):
-    """Request model for home product enrichment"""
-    model_config = ConfigDict(protected_namespaces=())
-    
-    model_number: str = Field(..., description="Product model number (REQUIRED)")
-    brand: Optional[str] = Field(None, description="Brand name (optional, helps identification)")
-    description: Optional[str] = Field(None, description="Brief description (optional, helps identification)")
+# Prompt versions - editing a prompt automatically invalidates its cached results
+CATALOG_PROMPT_VERSION = prompt_version(CATALOG_SYSTEM_PROMPT)
+PARTS_PROMPT_VERSION = prompt_version(PARTS_ENRICHMENT_PROMPT)
+HOME_PRODUCTS_PROMPT_VERSION = prompt_version(HOME_PRODUCTS_ENRICHMENT_PROMPT)
+# Opt-in: home products are enriched with one completion per schema section group
+HOME_PRODUCTS_PARALLEL_SECTIONS = os.getenv("HOME_PRODUCTS_PARALLEL_SECTIONS", "false").lower() == "true"
+# Opt-in: catalog and home products records start from the Ferguson lookup's data
+FERGUSON_GROUNDING = os.getenv("FERGUSON_GROUNDING", "false").lower() == "true"
+FERGUSON_LOOKUP_VERSION = "lookup-v1"
+
+# Fields an AI record may echo back from the request (or we add) without having found anything
+RECORD_IDENTITY_KEYS = (
+    "brand", "manufacturer", "model_number", "part_number", "verified_by",
+    "enriched_at", "ai_provider", "confidence_score"
+)
 
-@app.post("/enrich-home-product")
-async def enrich_home_product_endpoint(
-    request: HomeProductEnrichRequest,
-    x_api_key: Optional[str] = Header(None),
-    user_agent: str = Header(None, alias="User-Agent"),
-    referer: str = Header(None, alias="Referer")
-):
+def get_cached_enrichment(portal: str, brand: Optional[str], model_number: str, version: str) -> Optional[dict]:
+    """Cached payload from the result cache, else from the negative cache"""
+    cached = enrichment_cache.get(portal, brand, model_number, version)
+    if cached is None:
+        cached = negative_cache.get(portal, brand, model_number, version)
+    return cached
+
+def cache_enrichment(portal: str, brand: Optional[str], model_number: str, version: str,
+                     payload: dict, record: dict):
+    """Cache an enrichment result - an all-null record only briefly, in the negative cache"""
+    cache = negative_cache if is_empty_record(record, RECORD_IDENTITY_KEYS) else enrichment_cache
+    cache.set(portal, brand, model_number, version, payload)
+
+# Cached catalog / home products payloads record whether Ferguson grounding was on when
+# they were produced. One entry is kept per model: a request without ferguson_grounding is
+# served either mode, one that sets it explicitly only the mode it asked for.
+GROUNDING_KEY = "ferguson_grounding"
+
+def cached_for_grounding(cached: Optional[dict], ferguson_grounding: Optional[bool]) -> Optional[dict]:
+    """The cached payload, unless the request explicitly asks for the other grounding mode"""
+    if cached is None or ferguson_grounding is None:
+        return cached
+    if cached.get(GROUNDING_KEY, False) != ferguson_grounding_enabled(ferguson_grounding):
+        return None
+    return cached
+
+def enrichment_flight_key(portal: str, brand: Optional[str], model_number: str, version: str,
+                          grounded: bool = False) -> str:
+    """Single-flight key - grounded and ungrounded runs of the same model never join each other"""
+    return EnrichmentCache.make_key(portal, brand, model_number, f"{version}:grounded" if grounded else version)
+
+async def cached_product_data(brand: str, model_number: str,
+                              ferguson_grounding: Optional[bool] = None) -> tuple:
     """
-    Enrich home product data (Plumbing, Kitchen, Lighting, Bath, Fans, Hardware, Outdoor, HVAC)
-    using Master Product Data Schema v1.0 (Sections A-L)
-    
-    Requires: model_number (primary identifier)
-    Optional: brand, description (helpers for identification)
+    Catalog enrichment with the result cache in front of generate_product_data.
+    Returns: (ProductRecord, cache_hit, field_sources) - field_sources see CATALOG_SOURCES_KEY
     """
-    # Verify API key
-    if x_api_key != API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid API key")
+    cached = cached_for_grounding(
+        get_cached_enrichment("catalog", brand, model_number, CATALOG_PROMPT_VERSION), ferguson_grounding
+    )
+    if cached is not None:
+        field_sources = cached.pop(CATALOG_SOURCES_KEY, None) or {}
+        cached.pop(GROUNDING_KEY, None)
+        return ProductRecord(**cached), True, field_sources
     
-    # Validate model number is provided
-    if not request.model_number or not request.model_number.strip():
-        raise HTTPException(status_code=400, detail="Model number is required")
+    grounded = ferguson_grounding_enabled(ferguson_grounding)
+    
+    async def produce():
+        product_data, field_sources = await generate_product_data(brand, model_number, grounded)
+        product_dict = product_data.model_dump()
+        cache_enrichment("catalog", brand, model_number, CATALOG_PROMPT_VERSION,
+                         {**product_dict, CATALOG_SOURCES_KEY: field_sources, GROUNDING_KEY: grounded}, product_dict)
+        return product_data, field_sources
     
+    flight_key = enrichment_flight_key("catalog", brand, model_number, CATALOG_PROMPT_VERSION, grounded)
+    (product_data, field_sources), _ = await enrichment_flights.do(flight_key, produce)
+    return product_data, False, field_sources
+
+async def cached_part_data(part_number: str, brand: str) -> tuple:
+    """
+    Parts enrichment with the result cache in front of enrich_part_with_ai.
+    Returns: (part_dict, metrics_dict, cache_hit)
+    """
     start_time = time.time()
+    cached = get_cached_enrichment("parts", brand, part_number, PARTS_PROMPT_VERSION)
+    if cached is not None:
+        metrics = dict(cached["metrics"])
+        metrics["response_time"] = time.time() - start_time
+        metrics["tokens_used"] = 0
+        return cached["data"], metrics, True
+    
+    async def produce():
+        part_record, metrics = await generate_part_data(part_number, brand)
+        part_dict = part_record.dict()
+        cache_enrichment("parts", brand, part_number, PARTS_PROMPT_VERSION,
+                         {"data": part_dict, "metrics": metrics}, part_dict)
+        return part_dict, metrics
+    
+    flight_key = EnrichmentCache.make_key("parts", brand, part_number, PARTS_PROMPT_VERSION)
+    (part_dict, metrics), _ = await enrichment_flights.do(flight_key, produce)
+    return part_dict, metrics, False
+
+async def cached_home_product_data(model_number: str, brand: Optional[str] = None,
+                                   description: Optional[str] = None,
+                                   parallel_sections: Optional[bool] = None,
+                                   ferguson_grounding: Optional[bool] = None) -> tuple:
+    """
+    Home products enrichment with the result cache in front of enrich_home_product_with_ai.
+    Returns: (enriched_data_dict, provider_used, ai_response_time, cache_hit)
+    """
+    cached = cached_for_grounding(
+        get_cached_enrichment("home_products", brand, model_number, HOME_PRODUCTS_PROMPT_VERSION), ferguson_grounding
+    )
+    if cached is not None:
+        return cached["data"], cached["provider"], 0.0, True
     
-    # Detect source: UI calls will have our frontend URL in referer
-    source = "ui" if referer and ("vercel.app" in referer or "localhost" in referer) else "api"
+    grounded = ferguson_grounding_enabled(ferguson_grounding)
+    
+    async def produce():
+        enriched_data, provider_used, ai_response_time = await generate_home_product_data(
+            model_number, brand, description, parallel_sections, grounded
+        )
+        cache_enrichment("home_products", brand, model_number, HOME_PRODUCTS_PROMPT_VERSION,
+                         {"data": enriched_data, "provider": provider_used, GROUNDING_KEY: grounded}, enriched_data)
+        return enriched_data, provider_used, ai_response_time
+    
+    flight_key = enrichment_flight_key("home_products", brand, model_number, HOME_PRODUCTS_PROMPT_VERSION, grounded)
+    (enriched_data, provider_used, ai_response_time), _ = await enrichment_flights.do(flight_key, produce)
+    return enriched_data, provider_used, ai_response_time, False
+
+async def refill_record(portal: str, record: dict, identity: str, section: str,
+                        field_details: Optional[Dict[str, Any]] = None,
+                        store_sources: bool = False,
+                        prior_sources: Optional[Dict[str, List[str]]] = None) -> tuple:
+    """
+    Ask a provider for just the null/unverified fields of a cached record and merge them
+    into a copy of it. field_details is validate_product_data's report for the flattened
+    section (recomputed when not given); prior_sources see merge_filled_fields.
+    Returns: (record, filled_paths, provider_used) - provider_used is None if nothing was missing
+    """
+    if field_details is None:
+        field_details = validate_product_data(
+            dict(record.get(section) or {}), portal=portal, strict_mode=True
+        )["verification"]["field_details"]
     
-    # Determine which AI provider to use (primary: OpenAI, fallback: xAI)
-    primary_provider = "openai"
-    fallback_provider = "xai"
+    paths, critical = fields_to_fill(record, portal, section, field_details)
+    if not paths:
+        return record, [], None
     
-    enriched_data = None
-    provider_used = None
-    ai_response_time = 0
+    token_ledger.check()
+    providers_to_try = [name for name in ("openai", "xai") if AI_PROVIDERS[name]["enabled"]]
     
-    # Try primary provider first
+    async def attempt(provider_name: str) -> tuple:
+        provider = AI_PROVIDERS[provider_name]
+        candidate = copy.deepcopy(record)
+        filled, _ = await fill_missing_fields(
+            provider["client"], provider["model"], portal, provider_name, identity, candidate,
+            paths, critical, json_mode=provider_name == "openai", store_sources=store_sources,
+            prior_sources=prior_sources
+        )
+        return candidate, filled
+    
+    # Routed under its own key - small fill calls would skew the full enrichments' latency stats
     try:
-        enriched_data, provider_used, ai_response_time = await enrich_home_product_with_ai(
-            model_number=request.model_number,
-            brand=request.brand,
-            description=request.description,
-            provider=primary_provider,
-            openai_client=openai_client,
-            xai_client=xai_client
+        (refilled, filled), provider_used = await provider_router.call(
+            f"{portal}_fill", providers_to_try, attempt, provider_seed_metrics(portal)
         )
-    except Exception as e:
-        print(f"Primary AI provider ({primary_provider}) failed: {str(e)}")
+    except AllProvidersFailedError as e:
+        raise Exception(
+            "All AI providers failed. " + ", ".join(f"{name}: {error}" for name, error in e.errors.items())
+        )
+    print(f"[{portal}] {provider_used} answered {len(filled)}/{len(paths)} missing or unverified fields")
+    return refilled, filled, provider_used
+
+def validated_product_record(record: dict, previous: dict, filled: List[str]) -> tuple:
+    """
+    ProductRecord from a refilled record, keeping the previous value of any field the
+    provider returned in the wrong shape.
+    Returns: (ProductRecord, filled_paths without the reverted ones)
+    """
+    try:
+        return ProductRecord(**record), filled
+    except ValidationError as e:
+        for error in e.errors():
+            path = ".".join(str(part) for part in error["loc"] if not isinstance(part, int))
+            set_nested_value(record, path, get_nested_value(previous, path))
+            filled = [filled_path for filled_path in filled if not filled_path.startswith(path)]
+        return ProductRecord(**record), filled
+
+# Catalog records have no per-field source keys - the sources of critical fields verified
+# by a fill pass are cached next to the record ({field: [sources]}) so they verify next time
+CATALOG_SOURCES_KEY = "field_sources"
+
+def catalog_source_fields(field_sources: Dict[str, List[str]]) -> dict:
+    """Stored catalog field sources as the <field>_sources / <field>_source_count keys verification reads"""
+    source_fields = {}
+    for field, sources in field_sources.items():
+        source_fields[f"{field}_sources"] = sources
+        source_fields[f"{field}_source_count"] = len(sources)
+    return source_fields
+
+def pop_catalog_field_sources(verified_information: dict) -> Dict[str, List[str]]:
+    """Remove the <field>_sources / <field>_source_count keys refill_record stored; returns {field: sources}"""
+    field_sources = {}
+    for field in CRITICAL_FIELDS["catalog"]:
+        sources = verified_information.pop(f"{field}_sources", None)
+        verified_information.pop(f"{field}_source_count", None)
+        if sources:
+            field_sources[field] = sources
+    return field_sources
+
+async def refill_product_data(brand: str, model_number: str,
+                              field_details: Optional[Dict[str, Any]] = None) -> Optional[tuple]:
+    """
+    Fill-missing-fields pass over the cached catalog record. A critical field that
+    already has a value can only be confirmed by the provider, never replaced.
+    Returns: (ProductRecord, filled_paths, field_sources, cache_hit), or None when nothing
+    is cached - cache_hit is True when nothing was left to fill (no provider call)
+    """
+    async def produce():
+        cached = enrichment_cache.get("catalog", brand, model_number, CATALOG_PROMPT_VERSION)
+        if cached is None:
+            return None
         
-        # Try fallback provider
-        try:
-            enriched_data, provider_used, ai_response_time = await enrich_home_product_with_ai(
-                model_number=request.model_number,
-                brand=request.brand,
-                description=request.description,
-                provider=fallback_provider,
-                openai_client=openai_client,
-                xai_client=xai_client
-            )
-        except Exception as fallback_error:
-            total_time = time.time() - start_time
-            update_portal_metrics("home_products", False, total_time, source, user_agent,
-                                 request.model_number, request.brand)
-            raise HTTPException(
-                status_code=500,
-                detail=f"All AI providers failed. Primary: {str(e)}, Fallback: {str(fallback_error)}"
-            )
+        field_sources = cached.pop(CATALOG_SOURCES_KEY, None) or {}
+        grounded = cached.pop(GROUNDING_KEY, False)
+        section = cached["verified_information"]
+        
+        # Fields verified on an earlier pass stay verified whatever the caller's report says
+        if field_details is None:
+            details = validate_product_data(
+                {**section, **catalog_source_fields(field_sources)}, portal="catalog", strict_mode=True
+            )["verification"]["field_details"]
+        else:
+            details = {
+                **field_details,
+                **{field: {"verified": True} for field, sources in field_sources.items() if len(sources) >= 2}
+            }
+        prior_sources = {
+            f"verified_information.{field}": field_sources.get(field, [])
+            for field in CRITICAL_FIELDS["catalog"] if section.get(field) not in (None, "")
+        }
+        
+        record, filled, provider_used = await refill_record(
+            "catalog", cached, f"Brand: {brand}\nModel Number: {model_number}", "verified_information",
+            details, store_sources=True, prior_sources=prior_sources
+        )
+        
+        # Move the sources refill_record stored next to each field into the side table
+        new_sources = pop_catalog_field_sources(record["verified_information"])
+        
+        product_data, filled = validated_product_record(record, cached, filled)
+        field_sources.update({
+            field: sources for field, sources in new_sources.items()
+            if f"verified_information.{field}" in filled
+        })
+        
+        if filled:
+            enrichment_cache.set("catalog", brand, model_number, CATALOG_PROMPT_VERSION,
+                                 {**product_data.model_dump(), CATALOG_SOURCES_KEY: field_sources, GROUNDING_KEY: grounded})
+        return product_data, filled, field_sources, provider_used is None
+    
+    # Concurrent fill passes over the same record share one provider call and one cache write
+    flight_key = enrichment_flight_key("catalog", brand, model_number, f"{CATALOG_PROMPT_VERSION}:fill")
+    result, _ = await enrichment_flights.do(flight_key, produce)
+    return result
+
+async def refill_home_product_data(model_number: str, brand: Optional[str] = None,
+                                   description: Optional[str] = None,
+                                   field_details: Optional[Dict[str, Any]] = None) -> Optional[tuple]:
+    """
+    Fill-missing-fields pass over the cached home product record.
+    Returns: (enriched_data_dict, provider_used, ai_response_time, filled_paths, cache_hit), or None when
+    nothing is cached - cache_hit is True when nothing was left to fill (no provider call)
+    """
+    async def produce():
+        cached = enrichment_cache.get("home_products", brand, model_number, HOME_PRODUCTS_PROMPT_VERSION)
+        if cached is None:
+            return None
+        
+        start_time = time.time()
+        identity = f"Model Number: {model_number}\nBrand: {brand or 'Not provided'}\nDescription: {description or 'Not provided'}"
+        record, filled, provider_used = await refill_record(
+            "home_products", cached["data"], identity, "product_identity", field_details, store_sources=True
+        )
+        
+        if filled:
+            record["confidence_score"] = calculate_home_product_completeness(record)
+            enrichment_cache.set("home_products", brand, model_number, HOME_PRODUCTS_PROMPT_VERSION,
+                                 {"data": record, "provider": cached["provider"],
+                                  GROUNDING_KEY: cached.get(GROUNDING_KEY, False)})
+        return record, provider_used or cached["provider"], time.time() - start_time, filled, provider_used is None
+    
+    # Concurrent fill passes over the same record share one provider call and one cache write
+    flight_key = enrichment_flight_key("home_products", brand, model_number, f"{HOME_PRODUCTS_PROMPT_VERSION}:fill")
+    result, _ = await enrichment_flights.do(flight_key, produce)
+    return result
+
+class CacheInvalidateRequest(BaseModel):
+    """Request model for enrichment cache invalidation"""
+    model_config = ConfigDict(protected_namespaces=())
     
-    total_time = time.time() - start_time
+    portal: Optional[str] = Field(None, description="catalog, parts, home_products or ferguson (all portals if omitted)")
+    model_number: Optional[str] = Field(None, description="Model/part number (all models if omitted)")
+
+@app.get("/cache/stats")
+async def get_cache_stats(x_api_key: str = Header(..., alias="X-API-KEY")):
+    """
+    Get enrichment cache hit/miss counters and entry counts.
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
     
-    # Update portal metrics
-    update_portal_metrics("home_products", True, total_time, source, user_agent,
-                         request.model_number, request.brand)
+    return {
+        "success": True,
+        "cache": enrichment_cache.get_stats(),
+        "negative_cache": negative_cache.get_stats(),
+        "unwrangle_cache": unwrangle_cache.get_stats(),
+        "coalescing": enrichment_flights.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.post("/cache/invalidate")
+async def invalidate_cache(
+    request: CacheInvalidateRequest,
+    x_api_key: str = Header(..., alias="X-API-KEY")
+):
+    """
+    Remove cached enrichment results (optionally filtered by portal and model number).
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    removed = enrichment_cache.invalidate(portal=request.portal, model_number=request.model_number)
+    negative_removed = negative_cache.invalidate(portal=request.portal, model_number=request.model_number)
+    return {
+        "success": True,
+        "removed": removed,
+        "negative_removed": negative_removed,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+class UnwrangleCacheInvalidateRequest(BaseModel):
+    """Request model for Unwrangle response cache invalidation"""
+    platform: Optional[str] = Field(None, description="fergusonhome_search or fergusonhome_detail (all platforms if omitted)")
+    target: Optional[str] = Field(None, description="Search query or product URL (all entries if omitted)")
+
+@app.post("/unwrangle/cache/invalidate")
+async def invalidate_unwrangle_cache(
+    request: UnwrangleCacheInvalidateRequest,
+    x_api_key: str = Header(..., alias="X-API-KEY")
+):
+    """
+    Remove cached Unwrangle search/detail responses (optionally filtered by platform and query/URL).
+    The next lookup fetches fresh data from Unwrangle (and spends credits).
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    removed = unwrangle_cache.invalidate(platform=request.platform, target=request.target)
+    return {
+        "success": True,
+        "removed": removed,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+# ============================================================================
+# BATCH ENRICHMENT (NDJSON streaming)
+# ============================================================================
+
+BATCH_PORTALS = ["catalog", "parts", "home_products"]
+
+class BatchEnrichItem(BaseModel):
+    """Single item in a batch enrichment request"""
+    model_config = ConfigDict(protected_namespaces=())
+    
+    model_number: str = Field(..., description="Product model number (OEM part number for the parts portal)")
+    brand: Optional[str] = Field(None, description="Brand name (required for catalog and parts)")
+    description: Optional[str] = Field(None, description="Brief description (home_products only, optional)")
+    parallel_sections: Optional[bool] = Field(None, description="home_products only - see HomeProductEnrichRequest")
+    ferguson_grounding: Optional[bool] = Field(None, description="catalog and home_products - see EnrichRequest")
+
+class BatchEnrichRequest(BaseModel):
+    """Request model for batch enrichment"""
+    portal: str = Field("catalog", description="catalog, parts or home_products")
+    items: List[BatchEnrichItem] = Field(..., description="Products to enrich")
+    concurrency: Optional[int] = Field(None, ge=1, description="Max concurrent enrichments (capped by BATCH_MAX_CONCURRENCY)")
+
+async def enrich_portal_item(portal: str, item: BatchEnrichItem, source: str = "batch") -> dict:
+    """Enrich one item through the same cached path as the single-item endpoints."""
+    start_time = time.time()
+    data = None
+    error = None
+    cache_hit = False
+    
+    try:
+        if portal == "catalog":
+            if not item.brand:
+                raise ValueError("brand is required for catalog enrichment")
+            product_data, cache_hit, _ = await cached_product_data(item.brand, item.model_number, item.ferguson_grounding)
+            data = product_data.model_dump()
+        elif portal == "parts":
+            if not item.brand:
+                raise ValueError("brand is required for parts enrichment")
+            data, _, cache_hit = await cached_part_data(item.model_number, item.brand)
+        else:
+            data, _, _, cache_hit = await cached_home_product_data(
+                item.model_number, item.brand, item.description, item.parallel_sections,
+                item.ferguson_grounding
+            )
+    except Exception as e:
+        error = str(e)
+    
+    response_time = time.time() - start_time
+    update_portal_metrics(portal, error is None, response_time, source, None,
+                         item.model_number, item.brand)
+    
+    return {
+        "portal": portal,
+        "brand": item.brand,
+        "model_number": item.model_number,
+        "success": error is None,
+        "data": data,
+        "error": error,
+        "cached": cache_hit,
+        "response_time": round(response_time, 2)
+    }
+
+@app.post("/enrich/batch")
+async def enrich_batch(
+    request: BatchEnrichRequest,
+    x_api_key: str = Header(..., alias="X-API-KEY")
+):
+    """
+    Enrich many products in one call for any portal (catalog, parts, home_products).
+    Requires X-API-KEY header for authentication.
+    
+    Items are fanned out to the AI providers under a bounded concurrency cap and
+    each result is streamed back as one NDJSON line as soon as it completes
+    (so lines arrive out of order - use "index" to correlate). The final line
+    is a summary: {"summary": {"total", "successful", "failed", "total_time"}}.
+    """
+    await verify_api_key(x_api_key)
+    
+    if request.portal not in BATCH_PORTALS:
+        raise HTTPException(status_code=400, detail=f"Invalid portal. Use one of: {', '.join(BATCH_PORTALS)}")
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items (max {BATCH_MAX_ITEMS})")
+    
+    concurrency = min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_item(index: int, item: BatchEnrichItem) -> dict:
+        async with semaphore:
+            result = await enrich_portal_item(request.portal, item)
+            return {"index": index, **result}
+    
+    async def stream_results():
+        start_time = time.time()
+        successful = 0
+        tasks = [asyncio.ensure_future(run_item(i, item)) for i, item in enumerate(request.items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["success"]:
+                    successful += 1
+                yield json.dumps(result, default=str) + "\n"
+            
+            yield json.dumps({
+                "summary": {
+                    "portal": request.portal,
+                    "total": len(tasks),
+                    "successful": successful,
+                    "failed": len(tasks) - successful,
+                    "concurrency": concurrency,
+                    "total_time": round(time.time() - start_time, 2)
+                }
+            }) + "\n"
+        finally:
+            # Client went away - stop the remaining work
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# ============================================================================
+# HOME PRODUCTS ENDPOINTS (Plumbing, Kitchen, Lighting, Bath)
+# ============================================================================
+
+class HomeProductEnrichRequest(BaseModel):
+    """Request model for home product enrichment"""
+    model_config = ConfigDict(protected_namespaces=())
+    
+    model_number: str = Field(..., description="Product model number (REQUIRED)")
+    brand: Optional[str] = Field(None, description="Brand name (optional, helps identification)")
+    description: Optional[str] = Field(None, description="Brief description (optional, helps identification)")
+    parallel_sections: Optional[bool] = Field(
+        None,
+        description="Enrich the schema section groups with concurrent smaller completions "
+                    "(faster, more tokens). Defaults to HOME_PRODUCTS_PARALLEL_SECTIONS."
+    )
+    ferguson_grounding: Optional[bool] = Field(
+        None,
+        description="Fill the record from the Ferguson lookup first and ask the AI only for the "
+                    "remaining fields. Defaults to FERGUSON_GROUNDING."
+    )
+    fill_missing: bool = Field(
+        False, description="Re-enrich only the null/unverified fields of the cached record"
+    )
+    field_details: Optional[Dict[str, Any]] = Field(
+        None, description="verification field_details of the previous result (recomputed if omitted)"
+    )
+
+@app.post("/enrich-home-product")
+async def enrich_home_product_endpoint(
+    request: HomeProductEnrichRequest,
+    x_api_key: Optional[str] = Header(None),
+    user_agent: str = Header(None, alias="User-Agent"),
+    referer: str = Header(None, alias="Referer")
+):
+    """
+    Enrich home product data (Plumbing, Kitchen, Lighting, Bath, Fans, Hardware, Outdoor, HVAC)
+    using Master Product Data Schema v1.0 (Sections A-L)
+    
+    Requires: model_number (primary identifier)
+    Optional: brand, description (helpers for identification)
+    """
+    # Verify API key
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    # Validate model number is provided
+    if not request.model_number or not request.model_number.strip():
+        raise HTTPException(status_code=400, detail="Model number is required")
     
+    start_time = time.time()
+    
+    # Detect source: UI calls will have our frontend URL in referer
+    source = "ui" if referer and ("vercel.app" in referer or "localhost" in referer) else "api"
+    
+    # Enrich product (served from the enrichment cache when available)
+    try:
+        # Second pass: only the missing/unverified fields of the cached record
+        refilled = None
+        if request.fill_missing:
+            refilled = await refill_home_product_data(
+                request.model_number, request.brand, request.description, request.field_details
+            )
+        
+        filled_fields = None
+        if refilled is not None:
+            enriched_data, provider_used, ai_response_time, filled_fields, cache_hit = refilled
+        else:
+            enriched_data, provider_used, ai_response_time, cache_hit = await cached_home_product_data(
+                request.model_number, request.brand, request.description, request.parallel_sections,
+                request.ferguson_grounding
+            )
+    except Exception as e:
+        total_time = time.time() - start_time
+        update_portal_metrics("home_products", False, total_time, source, user_agent,
+                             request.model_number, request.brand)
+        # Over the API key's daily token budget is not a provider failure
+        status_code = 429 if isinstance(e, TokenBudgetExceededError) else 500
+        raise HTTPException(status_code=status_code, detail=str(e))
+    
+    total_time = time.time() - start_time
+    
+    # Update portal metrics
+    update_portal_metrics("home_products", True, total_time, source, user_agent,
+                         request.model_number, request.brand)
+    
+    # Return original structure with verification metadata
+    metadata = home_product_response_metadata(
+        request, enriched_data, provider_used, total_time, ai_response_time, cache_hit
+    )
+    if filled_fields is not None:
+        metadata["filled_fields"] = filled_fields
+    return {
+        "success": True,
+        "data": enriched_data,
+        "metadata": metadata
+    }
+
+def home_product_response_metadata(request: HomeProductEnrichRequest, enriched_data: dict, provider_used: str,
+                                   total_time: float, ai_response_time: float, cache_hit: bool) -> dict:
+    """Response metadata for a home product enrichment, incl. 2-source verification of product_identity"""
     # Flatten enriched_data to get product_identity fields for validation
     flattened_data = {}
     if isinstance(enriched_data, dict):
@@ -1518,22 +2383,214 @@ async def enrich_home_product_endpoint(
         strict_mode=True
     )
     
-    # Return original structure with verification metadata
     return {
-        "success": True,
-        "data": enriched_data,
-        "metadata": {
-            "ai_provider": provider_used,
-            "response_time": round(total_time, 2),
-            "ai_processing_time": round(ai_response_time, 2),
-            "completeness": round(enriched_data.get("confidence_score", 0), 2),
-            "verification_rate": round(validation_result['verification']['verification_rate'], 2),
-            "verified_fields": f"{validation_result['verification']['verified_fields']}/{validation_result['verification']['total_critical_fields']}",
+        "ai_provider": provider_used,
+        "response_time": round(total_time, 2),
+        "ai_processing_time": round(ai_response_time, 2),
+        "completeness": round(enriched_data.get("confidence_score", 0), 2),
+        "verification_rate": round(validation_result['verification']['verification_rate'], 2),
+        "verified_fields": f"{validation_result['verification']['verified_fields']}/{validation_result['verification']['total_critical_fields']}",
+        "field_details": validation_result['verification']['field_details'],
+        "model_number": request.model_number,
+        "brand": request.brand,
+        "description": request.description,
+        "cached": cache_hit
+    }
+
+STREAM_MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+# Keep proxies from buffering the stream
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+HOME_PRODUCT_METADATA_KEYS = ("enriched_at", "ai_provider", "confidence_score")
+
+def format_stream_event(event: dict, stream_format: str) -> str:
+    """One event as a Server-Sent Events frame or an NDJSON line"""
+    if stream_format == "ndjson":
+        return json.dumps(event, default=str) + "\n"
+    return f"event: {event.get('event', 'message')}\ndata: {json.dumps(event, default=str)}\n\n"
+
+@app.post("/enrich-home-product/stream")
+async def enrich_home_product_stream(
+    request: HomeProductEnrichRequest,
+    stream_format: str = Query("sse", alias="format", description="sse or ndjson"),
+    x_api_key: Optional[str] = Header(None),
+    user_agent: str = Header(None, alias="User-Agent"),
+    referer: str = Header(None, alias="Referer")
+):
+    """
+    Streaming /enrich-home-product. The AI response is parsed while it is being
+    generated and each top-level section (product_identity, dimensions, ...) is
+    sent as soon as the model closes it:
+    
+    - {"event": "start", ...}
+    - {"event": "section", "section": name, "data": {...}, "provider": ...} per section
+    - {"event": "complete", "success": true, "data": full record, "metadata": {...}}
+      (same data/metadata as /enrich-home-product), or {"event": "error", "error": ...}
+    
+    format=sse (default) sends Server-Sent Events, format=ndjson one JSON object per line.
+    Cached results are replayed section by section. A provider that fails before
+    its first section is failed over; later failures end the stream with an error event.
+    Streams are never Ferguson-grounded (ferguson_grounding is ignored; a cached record of
+    either mode is replayed). fill_missing, field_details and parallel_sections are
+    rejected with a 400. The streamed enrichment runs under the same single-flight key
+    as an ungrounded /enrich-home-product:
+    a request that finds one already in flight (streamed or not) waits for its record and
+    replays it, and requests arriving meanwhile join this one instead of paying again.
+    """
+    if x_api_key != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    
+    if not request.model_number or not request.model_number.strip():
+        raise HTTPException(status_code=400, detail="Model number is required")
+    
+    if stream_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid format. Use sse or ndjson")
+    
+    # Options the stream can't honour - fail instead of silently running a full enrichment
+    if request.fill_missing or request.field_details is not None or request.parallel_sections:
+        raise HTTPException(
+            status_code=400,
+            detail="fill_missing, field_details and parallel_sections are not supported when streaming - "
+                   "use /enrich-home-product"
+        )
+    
+    source = "ui" if referer and ("vercel.app" in referer or "localhost" in referer) else "api"
+    cached = get_cached_enrichment("home_products", request.brand, request.model_number, HOME_PRODUCTS_PROMPT_VERSION)
+    if cached is None:
+        try:
+            token_ledger.check()
+        except TokenBudgetExceededError as e:
+            raise HTTPException(status_code=429, detail=str(e))
+    
+    providers_to_try = [name for name in ("openai", "xai") if AI_PROVIDERS[name]["enabled"]]
+    
+    def open_stream(provider_name: str):
+        return stream_home_product_with_ai(
+            model_number=request.model_number,
+            brand=request.brand,
+            description=request.description,
+            provider=provider_name,
+            openai_client=openai_client,
+            xai_client=xai_client
+        )
+    
+    async def events():
+        start_time = time.time()
+        yield format_stream_event({
+            "event": "start",
             "model_number": request.model_number,
             "brand": request.brand,
-            "description": request.description
-        }
-    }
+            "cached": cached is not None
+        }, stream_format)
+        
+        if cached is not None:
+            enriched_data, provider_used, ai_response_time = cached["data"], cached["provider"], 0.0
+            replay = True
+        else:
+            # Section events of this stream's own run; None marks the end
+            sections: asyncio.Queue = asyncio.Queue()
+            
+            async def produce():
+                try:
+                    enriched_data = None
+                    async for provider_used, event in provider_router.stream(
+                        "home_products", providers_to_try, open_stream, provider_seed_metrics("home_products")
+                    ):
+                        if event["event"] == "complete":
+                            enriched_data, ai_response_time = event["data"], event["response_time"]
+                        else:
+                            sections.put_nowait({**event, "provider": provider_used})
+                    cache_enrichment("home_products", request.brand, request.model_number,
+                                     HOME_PRODUCTS_PROMPT_VERSION,
+                                     {"data": enriched_data, "provider": provider_used, GROUNDING_KEY: False},
+                                     enriched_data)
+                    return enriched_data, provider_used, ai_response_time
+                finally:
+                    sections.put_nowait(None)
+            
+            flight_key = enrichment_flight_key("home_products", request.brand, request.model_number,
+                                               HOME_PRODUCTS_PROMPT_VERSION)
+            task, replay = enrichment_flights.start(flight_key, produce)
+            try:
+                if not replay:
+                    while (event := await sections.get()) is not None:
+                        yield format_stream_event(event, stream_format)
+                enriched_data, provider_used, ai_response_time = copy.deepcopy(await asyncio.shield(task))
+            except Exception as e:
+                update_portal_metrics("home_products", False, time.time() - start_time, source, user_agent,
+                                     request.model_number, request.brand)
+                yield format_stream_event({"event": "error", "success": False, "error": str(e)}, stream_format)
+                return
+        
+        if replay:
+            for section, value in enriched_data.items():
+                if section not in HOME_PRODUCT_METADATA_KEYS:
+                    yield format_stream_event(
+                        {"event": "section", "section": section, "data": value, "provider": provider_used},
+                        stream_format
+                    )
+        
+        total_time = time.time() - start_time
+        update_portal_metrics("home_products", True, total_time, source, user_agent,
+                             request.model_number, request.brand)
+        yield format_stream_event({
+            "event": "complete",
+            "success": True,
+            "data": enriched_data,
+            "metadata": home_product_response_metadata(
+                request, enriched_data, provider_used, total_time, ai_response_time, cached is not None
+            )
+        }, stream_format)
+    
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[stream_format], headers=STREAM_HEADERS)
+
+async def generate_home_product_data(model_number: str, brand: Optional[str] = None,
+                                     description: Optional[str] = None,
+                                     parallel_sections: Optional[bool] = None,
+                                     ferguson_grounding: Optional[bool] = None) -> tuple:
+    """
+    Use AI (OpenAI/xAI, ordered by the adaptive provider router) to enrich home product data.
+    parallel_sections (default HOME_PRODUCTS_PARALLEL_SECTIONS) fills the schema section
+    groups with concurrent completions instead of one large one.
+    ferguson_grounding (default FERGUSON_GROUNDING) fills the record from the Ferguson lookup
+    first and asks the AI only for the rest, when Ferguson carries the model.
+    Returns: (enriched_data_dict, provider_used, ai_response_time)
+    """
+    providers_to_try = [name for name in ("openai", "xai") if AI_PROVIDERS[name]["enabled"]]
+    token_ledger.check()
+    
+    if ferguson_grounding_enabled(ferguson_grounding):
+        ferguson_product = await ferguson_grounding_product("home_products", model_number)
+        if ferguson_product is not None:
+            return await generate_grounded_home_product_data(model_number, brand, description, ferguson_product)
+    
+    if parallel_sections is None:
+        parallel_sections = HOME_PRODUCTS_PARALLEL_SECTIONS
+    enrich = enrich_home_product_sections_with_ai if parallel_sections else enrich_home_product_with_ai
+    
+    async def attempt(provider_name: str) -> tuple:
+        try:
+            return await enrich(
+                model_number=model_number,
+                brand=brand,
+                description=description,
+                provider=provider_name,
+                openai_client=openai_client,
+                xai_client=xai_client
+            )
+        except Exception as e:
+            print(f"AI provider ({provider_name}) failed: {str(e)}")
+            raise
+    
+    # Router picks the primary; the other provider is the fallback (hedged when enabled)
+    try:
+        result, _ = await provider_router.call(
+            "home_products", providers_to_try, attempt, provider_seed_metrics("home_products")
+        )
+    except AllProvidersFailedError as e:
+        raise Exception(
+            "All AI providers failed. " + ", ".join(f"{name}: {error}" for name, error in e.errors.items())
+        )
+    return result
 
 @app.get("/home-products-ai-metrics")
 async def get_home_products_ai_metrics(x_api_key: Optional[str] = Header(None)):
@@ -1542,11 +2599,8 @@ async def get_home_products_ai_metrics(x_api_key: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="Invalid API key")
     
     metrics_summary = {}
-    for provider, data in home_products_metrics.items():
-        avg_completeness = (
-            sum(data["completeness_scores"]) / len(data["completeness_scores"])
-            if data["completeness_scores"] else 0
-        )
+    for provider, data in load_home_products_metrics().items():
+        avg_completeness = data["avg_completeness"]
         avg_response_time = (
             data["total_time"] / data["requests"]
             if data["requests"] > 0 else 0
@@ -1558,7 +2612,9 @@ async def get_home_products_ai_metrics(x_api_key: Optional[str] = Header(None)):
             "failed": data["failed"],
             "success_rate": f"{(data['successful'] / data['requests'] * 100) if data['requests'] > 0 else 0:.2f}%",
             "avg_response_time": f"{avg_response_time:.3f}s",
-            "avg_completeness": f"{avg_completeness:.2f}%"
+            "avg_completeness": f"{avg_completeness:.2f}%",
+            "latency": data["latency"],
+            "completeness": data["completeness"]
         }
     
     return {
@@ -1585,6 +2641,64 @@ class AskAIResponse(BaseModel):
     data: Optional[dict] = None
     error: Optional[str] = None
 
+# Ask AI metrics per "provider|mode" (mode: blocking or stream), shared by all workers
+ASK_AI_METRICS_SCOPE = "ask_ai"
+
+def update_ask_ai_metrics(provider: str, mode: str, success: bool, response_time: float,
+                          time_to_first_token: Optional[float] = None, tokens_used: int = 0):
+    """Record one Ask AI answer: outcome, total latency, time to first token (streaming) and tokens"""
+    name = f"{provider}|{mode}"
+    metrics_store.incr(ASK_AI_METRICS_SCOPE, name, "requests")
+    if not success:
+        metrics_store.incr(ASK_AI_METRICS_SCOPE, name, "failed")
+        return
+    metrics_store.incr(ASK_AI_METRICS_SCOPE, name, "successful")
+    metrics_store.incr(ASK_AI_METRICS_SCOPE, name, "total_tokens_used", tokens_used)
+    metrics_store.observe(ASK_AI_METRICS_SCOPE, name, response_time)
+    if time_to_first_token is not None:
+        metrics_store.observe(ASK_AI_METRICS_SCOPE, name, time_to_first_token, prefix="ttft")
+
+def ask_ai_provider() -> tuple:
+    """(provider_name, provider config) used for Ask AI"""
+    provider_name = "openai" if AI_PROVIDERS["openai"]["enabled"] else "xai"
+    return provider_name, AI_PROVIDERS[provider_name]
+
+def ask_ai_messages(request: AskAIRequest) -> list:
+    """Chat messages for an Ask AI question"""
+    context = request.additional_context or ""
+    
+    # Build a focused prompt for answering questions
+    system_prompt = """You are Mardey's AI assistant, an expert at answering questions about products.
+Your job is to analyze the product details provided and answer the user's question accurately and concisely.
+
+Rules:
+1. Answer directly and clearly
+2. Use the product details provided in the context
+3. If the answer isn't in the provided details, say so politely
+4. Keep answers under 200 words unless more detail is needed
+5. Be helpful and friendly"""
+
+    user_prompt = f"""Product Information:
+Brand: {request.brand or 'Unknown'}
+Model: {request.model_number or 'Unknown'}
+Name: {request.product_name or 'Unknown'}
+
+{context}
+
+Please answer the question based on the product details above."""
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def ask_ai_question_line(context: str) -> str:
+    """The "Question:" line of additional_context (for logging / the response)"""
+    for line in (context or "").split('\n'):
+        if line.startswith('Question:'):
+            return line.replace('Question:', '').strip()
+    return ""
+
 @app.post("/ask-ai", response_model=AskAIResponse)
 @app.post("/enrich-catalog", response_model=AskAIResponse)  # Legacy alias
 async def ask_ai_question(
@@ -1607,59 +2721,32 @@ async def ask_ai_question(
     # Detect source
     source = "ui" if referer and ("vercel.app" in referer or "localhost" in referer) else "api"
     
+    # Determine which AI provider to use
+    provider_name, provider = ask_ai_provider()
+    
     try:
-        # Extract question from additional_context
-        context = request.additional_context or ""
-        
-        # Determine which AI provider to use
-        provider_name = "openai" if AI_PROVIDERS["openai"]["enabled"] else "xai"
-        provider = AI_PROVIDERS[provider_name]
         client = provider["client"]
         model = provider["model"]
         
-        # Build a focused prompt for answering questions
-        system_prompt = """You are Mardey's AI assistant, an expert at answering questions about products.
-Your job is to analyze the product details provided and answer the user's question accurately and concisely.
-
-Rules:
-1. Answer directly and clearly
-2. Use the product details provided in the context
-3. If the answer isn't in the provided details, say so politely
-4. Keep answers under 200 words unless more detail is needed
-5. Be helpful and friendly"""
-
-        user_prompt = f"""Product Information:
-Brand: {request.brand or 'Unknown'}
-Model: {request.model_number or 'Unknown'}
-Name: {request.product_name or 'Unknown'}
-
-{context}
-
-Please answer the question based on the product details above."""
-
         # Call AI
+        token_ledger.check()
         ai_start = time.time()
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=ask_ai_messages(request),
             temperature=0.7,
             max_tokens=500
         )
         ai_time = time.time() - ai_start
+        tokens_used = token_ledger.record_response("ask_ai", provider_name, model, response)
         
         answer = response.choices[0].message.content
         
         # Extract question from context for logging
-        question_line = ""
-        for line in context.split('\n'):
-            if line.startswith('Question:'):
-                question_line = line.replace('Question:', '').strip()
-                break
+        question_line = ask_ai_question_line(request.additional_context)
         
         response_time = time.time() - start_time
+        update_ask_ai_metrics(provider_name, "blocking", True, ai_time, tokens_used=tokens_used)
         
         return AskAIResponse(
             success=True,
@@ -1669,18 +2756,94 @@ Please answer the question based on the product details above."""
                 "question": question_line,
                 "ai_provider": provider["name"],
                 "response_time": round(response_time, 2),
-                "ai_processing_time": round(ai_time, 2)
+                "ai_processing_time": round(ai_time, 2),
+                "tokens_used": tokens_used
             }
         )
         
+    except TokenBudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         response_time = time.time() - start_time
         print(f"Ask AI error: {str(e)}")
+        update_ask_ai_metrics(provider_name, "blocking", False, response_time)
         return AskAIResponse(
             success=False,
             error=str(e)
         )
 
+@app.post("/ask-ai/stream")
+async def ask_ai_question_stream(
+    request: AskAIRequest,
+    x_api_key: str = Header(..., alias="X-API-KEY")
+):
+    """
+    Streaming /ask-ai: the answer is relayed as Server-Sent Events while it is generated.
+    
+    - event "token": {"text": "..."} for every chunk of the answer
+    - event "done": {"success": true, "data": {answer, question, ai_provider, response_time,
+      time_to_first_token, tokens_used}} once the answer is complete
+    - event "error": {"success": false, "error": "..."} if the provider fails
+    
+    Time to first token, total latency and tokens are recorded under /metrics (ask_ai_*).
+    """
+    await verify_api_key(x_api_key)
+    
+    # Reject before opening the stream if the API key is over its daily token budget
+    try:
+        token_ledger.check()
+    except TokenBudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    provider_name, provider = ask_ai_provider()
+    
+    async def events():
+        start_time = time.time()
+        time_to_first_token = None
+        tokens_used = 0
+        answer_parts = []
+        
+        try:
+            stream = await provider["client"].chat.completions.create(
+                model=provider["model"],
+                messages=ask_ai_messages(request),
+                temperature=0.7,
+                max_tokens=500,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    tokens_used = token_ledger.record_response("ask_ai", provider_name, provider["model"], chunk)
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = time.time() - start_time
+                answer_parts.append(chunk.choices[0].delta.content)
+                yield format_stream_event({"event": "token", "text": chunk.choices[0].delta.content}, "sse")
+        except Exception as e:
+            print(f"Ask AI stream error: {str(e)}")
+            update_ask_ai_metrics(provider_name, "stream", False, time.time() - start_time)
+            yield format_stream_event({"event": "error", "success": False, "error": str(e)}, "sse")
+            return
+        
+        response_time = time.time() - start_time
+        update_ask_ai_metrics(provider_name, "stream", True, response_time, time_to_first_token, tokens_used)
+        yield format_stream_event({
+            "event": "done",
+            "success": True,
+            "data": {
+                "answer": "".join(answer_parts),
+                "question": ask_ai_question_line(request.additional_context),
+                "ai_provider": provider["name"],
+                "response_time": round(response_time, 2),
+                "time_to_first_token": round(time_to_first_token, 3) if time_to_first_token is not None else None,
+                "tokens_used": tokens_used
+            }
+        }, "sse")
+    
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES["sse"], headers=STREAM_HEADERS)
+
 # ============================================================================
 # FERGUSON HOME APIs (Unwrangle Integration)
 # ============================================================================
@@ -1694,6 +2857,74 @@ class FergusonProductRequest(BaseModel):
     """Request model for Ferguson Home product detail lookup"""
     url: str = Field(..., description="Full Ferguson Home product URL (must be URL-encoded)")
 
+def hyphen_variations(model_number: str) -> List[str]:
+    """
+    Hyphenated spellings to retry a model number search with (at most 3, to save API credits).
+    
+    Common patterns for appliance model numbers:
+    UHNP115IS01B → UHNP115-01B (remove middle letters, keep ending)
+    UHNP115IS01B → UHNP115-IS01B (add hyphen after first group)
+    ABC123DEF456 → ABC123-DEF456 (letters+numbers then letters+numbers)
+    """
+    variations = []
+    
+    # Pattern 1: LETTERS+NUMBERS+LETTERS+NUMBERS → LETTERS+NUMBERS-NUMBERS
+    match1 = re.match(r'^([A-Z]+)(\d+)[A-Z]+(\d+[A-Z]*)$', model_number, re.IGNORECASE)
+    if match1:
+        variations.append(f"{match1.group(1)}{match1.group(2)}-{match1.group(3)}")
+    
+    # Pattern 2: LETTERS+NUMBERS+LETTERS+REST → LETTERS+NUMBERS-LETTERS+REST
+    match2 = re.match(r'^([A-Z]+\d+)([A-Z]+.*)$', model_number, re.IGNORECASE)
+    if match2:
+        variations.append(f"{match2.group(1)}-{match2.group(2)}")
+    
+    # Pattern 3: More granular splits
+    match3 = re.match(r'^([A-Z]+)(\d+)([A-Z]+)(.*)$', model_number, re.IGNORECASE)
+    if match3:
+        variations.append(f"{match3.group(1)}{match3.group(2)}-{match3.group(3)}-{match3.group(4)}")
+    
+    return list(dict.fromkeys(variations))[:3]
+
+async def probe_search_variations(variations: List[str], page: int = 1, timeout: float = 30) -> tuple:
+    """
+    Search all variations concurrently; the first one with results wins. Probes still
+    in flight keep running in the background (they are billed anyway), so their credits
+    are recorded and their responses cached - zero-hit variations then cost nothing on
+    repeat misses. Uncached probes are skipped once the daily soft credit cap is reached.
+    Returns: (search_data or None, winning variation or None, credits_used) - credits_used
+    includes the probes left running
+    """
+    uncached = [v for v in variations if not unwrangle_client.is_cached(unwrangle_client.search_params(v, page))]
+    if uncached and not credit_ledger.allow_optional(10 * len(uncached)):
+        print(f"Unwrangle soft credit cap reached - skipping uncached variations {uncached}")
+        variations = [v for v in variations if v not in uncached]
+    
+    async def probe(variation: str) -> tuple:
+        return variation, await unwrangle_client.search(variation, page=page, timeout=timeout)
+    
+    tasks = [asyncio.ensure_future(probe(variation)) for variation in variations]
+    credits_used = 0
+    found = (None, None)
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                variation, retry_data = await next_done
+            except (httpx.HTTPError, UnwrangleCreditCapError) as e:
+                print(f"Variation probe failed: {e}")
+                continue
+            credits_used += retry_data.get("credits_used", 10)
+            if retry_data.get("success") and retry_data.get("stats", {}).get("total_results", 0) > 0:
+                found = (retry_data, variation)
+                break
+    finally:
+        for variation, task in zip(variations, tasks):
+            if not task.done():
+                unwrangle_client.detach(task)
+                if variation in uncached:
+                    credits_used += CREDITS_PER_CALL
+    
+    return (*found, credits_used)
+
 @app.post("/search-ferguson")
 async def search_ferguson_products(
     request: FergusonSearchRequest,
@@ -1735,22 +2966,9 @@ async def search_ferguson_products(
                 detail="Unwrangle API key not configured"
             )
         
-        # Build API request URL
-        import urllib.parse
-        base_url = "https://data.unwrangle.com/api/getter/"
-        params = {
-            "platform": "fergusonhome_search",
-            "search": request.search,
-            "page": request.page,
-            "api_key": unwrangle_api_key
-        }
-        
-        # Make request to Unwrangle API
-        import requests
-        response = requests.get(base_url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
+        # Make request to Unwrangle API (shared pooled client)
+        data = await unwrangle_client.search(request.search, page=request.page, timeout=30)
+        credits_used = data.get("credits_used", 10)
         
         if not data.get("success"):
             raise HTTPException(
@@ -1761,117 +2979,54 @@ async def search_ferguson_products(
         # If no results, try hyphen variations (e.g., UHNP115IS01B → UHNP115-01B, UHNP115-IS01B, etc.)
         results_count = data.get("stats", {}).get("total_results", 0)
         if results_count == 0 and len(request.search) > 5:
-            # Generate hyphen variations for model numbers
-            original_search = request.search.strip()
-            hyphen_variations = []
-            
-            # Try adding hyphens at common positions for model numbers
-            import re
-            
-            # Common patterns for appliance model numbers:
-            # UHNP115IS01B → UHNP115-01B (remove middle letters, keep ending)
-            # UHNP115IS01B → UHNP115-IS01B (add hyphen after first group)
-            # ABC123DEF456 → ABC123-DEF456 (letters+numbers then letters+numbers)
-            
-            # Pattern 1: LETTERS+NUMBERS+LETTERS+NUMBERS → LETTERS+NUMBERS-NUMBERS
-            match1 = re.match(r'^([A-Z]+)(\d+)[A-Z]+(\d+[A-Z]*)$', original_search, re.IGNORECASE)
-            if match1:
-                hyphen_variations.append(f"{match1.group(1)}{match1.group(2)}-{match1.group(3)}")
-            
-            # Pattern 2: LETTERS+NUMBERS+LETTERS+REST → LETTERS+NUMBERS-LETTERS+REST
-            match2 = re.match(r'^([A-Z]+\d+)([A-Z]+.*)$', original_search, re.IGNORECASE)
-            if match2:
-                hyphen_variations.append(f"{match2.group(1)}-{match2.group(2)}")
-            
-            # Pattern 3: More granular splits
-            match3 = re.match(r'^([A-Z]+)(\d+)([A-Z]+)(.*)$', original_search, re.IGNORECASE)
-            if match3:
-                hyphen_variations.append(f"{match3.group(1)}{match3.group(2)}-{match3.group(3)}-{match3.group(4)}")
-            
-            # Try each variation (limit to 3 to save API credits)
-            for variation in hyphen_variations[:3]:
-                print(f"Original search '{original_search}' returned 0 results. Trying variation: '{variation}'")
-                retry_params = params.copy()
-                retry_params["search"] = variation
-                retry_response = requests.get(base_url, params=retry_params, timeout=30)
-                retry_data = retry_response.json()
-                
-                if retry_data.get("success") and retry_data.get("stats", {}).get("total_results", 0) > 0:
+            variations = hyphen_variations(request.search.strip())
+            if variations:
+                print(f"Original search '{request.search.strip()}' returned 0 results. Trying variations: {variations}")
+                retry_data, variation, retry_credits = await probe_search_variations(variations, request.page)
+                credits_used += retry_credits
+                if retry_data is not None:
                     print(f"Found results with variation '{variation}'!")
                     data = retry_data  # Use the successful retry data
-                    break
         
         response_time = time.time() - start_time
         
         # Enhance products with smart variant matching for Salesforce compatibility
         products = data.get("results", [])
-        search_model_original = request.search.strip()  # Keep original case
-        search_model = request.search.upper().strip()
+        search_key = separator_key(request.search)
+        
+        # Index every variant once; best exact / separator-insensitive match per product
+        variant_matches = VariantIndex(products).best_by_product(request.search)
         
         # Track best match across ALL products to reorder results
         exact_match_products = []
         fuzzy_match_products = []
         other_products = []
         
-        for product in products:
+        for position, product in enumerate(products):
             # Add best_match_url field for easy Salesforce integration
             best_url = None
             best_model = None
             match_type = None
             
-            # Get product's base model and URL
-            product_model = product.get("model_no", "").upper().strip()
             product_url = product.get("url")
-            
-            # Check variants for matches
             variants = product.get("variants", [])
-            if variants:
-                # PRIORITY 1: Try exact case-insensitive match first
-                for variant in variants:
-                    variant_model_original = variant.get("model_no", "").strip()
-                    variant_model = variant_model_original.upper()
-                    
-                    # Exact match (case-insensitive)
-                    if variant_model == search_model:
-                        best_url = variant.get("url")
-                        best_model = variant_model_original  # Keep original case from Ferguson
-                        match_type = "exact_variant"
-                        break
-                    
-                    # Also try exact case-sensitive match
-                    if variant_model_original == search_model_original:
-                        best_url = variant.get("url")
-                        best_model = variant_model_original
-                        match_type = "exact_variant_case_sensitive"
-                        break
-                
-                # Try fuzzy match if no exact match
-                if not best_url:
-                    for variant in variants:
-                        variant_model = variant.get("model_no", "").upper().strip()
-                        # Remove common separators for comparison
-                        clean_search = search_model.replace("-", "").replace("_", "")
-                        clean_variant = variant_model.replace("-", "").replace("_", "")
-                        if clean_search == clean_variant:
-                            best_url = variant.get("url")
-                            best_model = variant.get("model_no")
-                            match_type = "fuzzy_variant"
-                            break
-                
+            match = variant_matches.get(position)
+            
+            if match:
+                best_url = match.url
+                best_model = match.model_no.strip() if match.tier == EXACT else match.model_no  # Keep original case from Ferguson
+                match_type = "exact_variant" if match.tier == EXACT else "fuzzy_variant"
+            elif variants:
                 # Use first variant as fallback
-                if not best_url and variants:
-                    best_url = variants[0].get("url")
-                    best_model = variants[0].get("model_no")
-                    match_type = "first_variant"
+                best_url = variants[0].get("url")
+                best_model = variants[0].get("model_no")
+                match_type = "first_variant"
             
             # Check base product match
-            if not best_url:
-                clean_search = search_model.replace("-", "").replace("_", "")
-                clean_product = product_model.replace("-", "").replace("_", "")
-                if clean_search == clean_product or product_model == search_model:
-                    best_url = product_url
-                    best_model = product.get("model_no")
-                    match_type = "base_product"
+            if not best_url and search_key and separator_key(product.get("model_no")) == search_key:
+                best_url = product_url
+                best_model = product.get("model_no")
+                match_type = "base_product"
             
             # Final fallback: use product URL if available
             if not best_url and product_url:
@@ -1906,7 +3061,7 @@ async def search_ferguson_products(
             "result_count": data.get("result_count", 0),
             "products": reordered_products,
             "meta_data": data.get("meta_data", {}),
-            "credits_used": data.get("credits_used", 10),
+            "credits_used": credits_used,
             "metadata": {
                 "response_time": f"{response_time:.2f}s",
                 "timestamp": datetime.utcnow().isoformat(),
@@ -1915,7 +3070,9 @@ async def search_ferguson_products(
             }
         }
     
-    except requests.RequestException as e:
+    except UnwrangleCreditCapError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=503,
             detail=f"Unwrangle API request failed: {str(e)}"
@@ -1973,26 +3130,8 @@ async def get_ferguson_product_detail(
                 detail="Unwrangle API key not configured"
             )
         
-        # Build API request URL
-        import urllib.parse
-        base_url = "https://data.unwrangle.com/api/getter/"
-        
-        # URL encode the product URL
-        encoded_url = urllib.parse.quote(request.url, safe='')
-        
-        params = {
-            "platform": "fergusonhome_detail",
-            "url": encoded_url,
-            "page": 1,
-            "api_key": unwrangle_api_key
-        }
-        
-        # Make request to Unwrangle API
-        import requests
-        response = requests.get(base_url, params=params, timeout=45)
-        response.raise_for_status()
-        
-        data = response.json()
+        # Make request to Unwrangle API (shared pooled client, URL-encodes the product URL)
+        data = await unwrangle_client.detail(request.url, timeout=45)
         
         if not data.get("success"):
             raise HTTPException(
@@ -2071,7 +3210,9 @@ async def get_ferguson_product_detail(
             }
         }
     
-    except requests.RequestException as e:
+    except UnwrangleCreditCapError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except httpx.HTTPError as e:
         raise HTTPException(
             status_code=503,
             detail=f"Unwrangle API request failed: {str(e)}"
@@ -2149,34 +3290,18 @@ def find_matching_variant(search_results: dict, model_number: str, fuzzy: bool =
     Find the variant that matches the requested model number.
     Returns tuple: (variant_url, matched_model, match_type)
     
-    Match types: 'exact', 'variation', 'partial', None
+    Match types: 'exact', 'variation', 'prefix', 'partial', None
     """
-    model_upper = model_number.upper().strip()
-    variations = generate_model_variations(model_number) if fuzzy else [model_number]
-    
-    # Try exact matches first
-    for variation in variations:
-        variation_upper = variation.upper().strip()
-        for product in search_results.get("products", []):
-            for variant in product.get("variants", []):
-                variant_model = variant.get("model_no", "").upper().strip()
-                
-                # Exact match
-                if variant_model == variation_upper:
-                    match_type = 'exact' if variation == model_number else 'variation'
-                    return (variant.get("url"), variant.get("model_no"), match_type)
-    
-    # Try partial matches (variant contains search term)
-    if fuzzy:
-        for product in search_results.get("products", []):
-            for variant in product.get("variants", []):
-                variant_model = variant.get("model_no", "").upper().strip()
-                
-                # Partial match - variant contains model number
-                if model_upper in variant_model or variant_model in model_upper:
-                    return (variant.get("url"), variant.get("model_no"), 'partial')
-    
-    return (None, None, None)
+    matches = rank_variant_matches(VariantIndex(search_results.get("products", [])), model_number, fuzzy)
+    if not matches:
+        return (None, None, None)
+    return (matches[0].url, matches[0].model_no, matches[0].match_type)
+
+def rank_variant_matches(index: VariantIndex, model_number: str, fuzzy: bool = True) -> List[VariantMatch]:
+    """Ranked variant matches for a model number (exact only unless fuzzy)"""
+    if not fuzzy:
+        return index.match(model_number, tiers=(EXACT,))
+    return index.match(model_number, generate_model_variations(model_number))
 
 @app.post("/lookup-ferguson-complete")
 async def lookup_ferguson_complete(
@@ -2203,29 +3328,37 @@ async def lookup_ferguson_complete(
     if not unwrangle_api_key:
         raise HTTPException(status_code=500, detail="Unwrangle API key not configured")
     
-    model_number = request.model_number
+    return await ferguson_complete_lookup(request.model_number)
+
+async def ferguson_complete_lookup(model_number: str) -> dict:
+    """
+    Search, variant match and detail fetch for one model number (the body of
+    /lookup-ferguson-complete, shared with Ferguson-first grounding).
+    Raises HTTPException: 404 when Ferguson doesn't carry the model (no search results
+    or no matching variant - cached in the negative cache), 429 at the Unwrangle credit
+    hard cap, 502 when the Unwrangle search reports a failure, 500 on other failures.
+    """
     overall_start = time.time()
     
+    # Known-unknown model number - repeat the cached 404 without searching again
+    cached_miss = negative_cache.get("ferguson", None, model_number, FERGUSON_LOOKUP_VERSION)
+    if cached_miss is not None:
+        raise HTTPException(status_code=404, detail=cached_miss["detail"])
+    
     try:
-        import requests
-        import urllib.parse
+        # Don't spend the search credits if the detail call would then hit the hard cap
+        if not unwrangle_client.is_cached(unwrangle_client.search_params(model_number)):
+            credit_ledger.check(20)
         
         # STEP 1: Search for product
         print(f"Step 1: Searching for model {model_number}...")
         step1_start = time.time()
-        search_params = {
-            "api_key": unwrangle_api_key,
-            "platform": "fergusonhome_search",
-            "search": model_number,
-            "page": 1
-        }
-        search_response = requests.get("https://data.unwrangle.com/api/getter/", params=search_params, timeout=45)
-        search_response.raise_for_status()
-        search_data = search_response.json()
+        search_data = await unwrangle_client.search(model_number, page=1, timeout=45)
         step1_time = time.time() - step1_start
         
         if not search_data.get("success"):
-            raise HTTPException(status_code=404, detail="Product not found in Ferguson")
+            # Upstream failure, not a verdict on the model number - never negative-cached
+            raise HTTPException(status_code=502, detail="Ferguson search failed")
         
         if not search_data.get("results"):
             raise HTTPException(
@@ -2239,30 +3372,17 @@ async def lookup_ferguson_complete(
         print(f"Step 2: Finding variant match for {model_number} (with format variations)...")
         step2_start = time.time()
         
-        # Store search result data before matching
-        search_product_data = None
-        for product in search_data.get("results", []):
-            for variant in product.get("variants", []):
-                if variant.get("model_no", "").upper().strip() == model_number.upper().strip():
-                    search_product_data = product  # Store the parent product data
-                    break
-            if search_product_data:
-                break
-        
-        # Use smart matching with fuzzy=True
-        match_result = find_matching_variant(
-            {"products": search_data.get("results", [])},
-            model_number,
-            fuzzy=True
-        )
+        # Index all variants once, then resolve the model number and its format variations
+        variant_index = VariantIndex(search_data.get("results", []))
+        matches = rank_variant_matches(variant_index, model_number, fuzzy=True)
         step2_time = time.time() - step2_start
         
-        if not match_result or not match_result[0]:
+        # Parent product data from the search result (exact matches only)
+        search_product_data = matches[0].product if matches and matches[0].tier == EXACT else None
+        
+        if not matches or not matches[0].url:
             # Return available variants for debugging
-            available_variants = []
-            for product in search_data.get("results", []):
-                for variant in product.get("variants", []):
-                    available_variants.append(variant.get("model_no"))
+            available_variants = variant_index.models()
             
             raise HTTPException(
                 status_code=404,
@@ -2276,8 +3396,7 @@ async def lookup_ferguson_complete(
                 }
             )
         
-        # Unpack the result tuple
-        variant_url, matched_model, match_type = match_result
+        variant_url, matched_model, match_type = matches[0].url, matches[0].model_no, matches[0].match_type
         print(f"Step 2: ✓ Matched '{model_number}' → '{matched_model}' ({match_type} match, {step2_time:.2f}s)")
         
         # STEP 3: Get complete product details
@@ -2291,17 +3410,7 @@ async def lookup_ferguson_complete(
                 detail=f"Invalid variant URL type: {type(variant_url)}"
             )
         
-        encoded_url = urllib.parse.quote(variant_url, safe='')
-        
-        detail_params = {
-            "api_key": unwrangle_api_key,
-            "platform": "fergusonhome_detail",
-            "url": encoded_url,
-            "page": 1
-        }
-        detail_response = requests.get("https://data.unwrangle.com/api/getter/", params=detail_params, timeout=45)
-        detail_response.raise_for_status()
-        detail_data = detail_response.json()
+        detail_data = await unwrangle_client.detail(variant_url, timeout=45)
         step3_time = time.time() - step3_start
         
         if not detail_data.get("success"):
@@ -2322,6 +3431,7 @@ async def lookup_ferguson_complete(
             "matched_model": matched_model,
             "match_type": match_type,
             "variant_url": variant_url,
+            "alternative_matches": [match.to_dict() for match in matches[1:6]],
             "product": {
                 # ========== BASIC INFORMATION (merged from both endpoints) ==========
                 "id": product_detail.get("id") or (search_product_data.get("id") if search_product_data else None),
@@ -2423,7 +3533,7 @@ async def lookup_ferguson_complete(
                 # ========== SPECIAL FLAGS ==========
                 "is_by_appointment_only": product_detail.get("is_by_appointment_only")
             },
-            "credits_used": 20,
+            "credits_used": search_data.get("credits_used", 10) + detail_data.get("credits_used", 10),
             "steps_completed": {
                 "1_search": "✓",
                 "2_variant_match": "✓",
@@ -2443,8 +3553,13 @@ async def lookup_ferguson_complete(
             }
         }
         
-    except HTTPException:
+    except HTTPException as e:
+        # Only "No products found" / "Variant not found" are 404s - upstream failures are 5xx
+        if e.status_code == 404:
+            negative_cache.set("ferguson", None, model_number, FERGUSON_LOOKUP_VERSION, {"detail": e.detail})
         raise
+    except UnwrangleCreditCapError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -2464,6 +3579,278 @@ async def lookup_ferguson_alias(
     """
     return await lookup_ferguson_complete(request, x_api_key)
 
+# ============================================================================
+# FERGUSON-FIRST GROUNDING (Ferguson data first, AI only for the remaining fields)
+# ============================================================================
+
+FERGUSON_GROUNDING_SCOPE = "ferguson_grounding"
+FERGUSON_LOOKUP_CREDITS = 20  # search + detail
+
+def ferguson_grounding_enabled(ferguson_grounding: Optional[bool]) -> bool:
+    """Per-request setting, else FERGUSON_GROUNDING (never without an Unwrangle key)"""
+    if ferguson_grounding is None:
+        ferguson_grounding = FERGUSON_GROUNDING
+    return ferguson_grounding and bool(os.getenv("UNWRANGLE_API_KEY"))
+
+async def ferguson_grounding_product(portal: str, model_number: str) -> Optional[dict]:
+    """
+    Ferguson product data to ground an enrichment on, or None when Ferguson doesn't
+    carry the model, only matches it on a prefix/partial tier, the lookup fails, or an
+    uncached lookup would pass the credit soft cap (the enrichment then runs in full,
+    without Ferguson data).
+    """
+    if (not unwrangle_client.is_cached(unwrangle_client.search_params(model_number))
+            and not credit_ledger.allow_optional(FERGUSON_LOOKUP_CREDITS)):
+        metrics_store.incr(FERGUSON_GROUNDING_SCOPE, portal, "skipped")
+        return None
+
+    try:
+        lookup = await ferguson_complete_lookup(model_number)
+    except HTTPException as e:
+        metrics_store.incr(FERGUSON_GROUNDING_SCOPE, portal, "not_found" if e.status_code == 404 else "lookup_failed")
+        print(f"[{portal}] Ferguson grounding unavailable for {model_number}: {e.detail}")
+        return None
+
+    # A prefix-stripped or partial match may be another SKU - never ground on its data
+    if lookup["match_type"] not in (EXACT, VARIATION):
+        metrics_store.incr(FERGUSON_GROUNDING_SCOPE, portal, "weak_match")
+        print(f"[{portal}] Ferguson grounding skipped for {model_number}: "
+              f"{lookup['match_type']} match {lookup['matched_model']}")
+        return None
+
+    metrics_store.incr(FERGUSON_GROUNDING_SCOPE, portal, "grounded")
+    return lookup["product"]
+
+async def generate_grounded_product_data(brand: str, model_number: str, ferguson_product: dict) -> tuple:
+    """
+    Catalog record from Ferguson data; the AI is asked only for the fields Ferguson
+    doesn't provide, and to confirm the critical ones it does.
+    Returns: (ProductRecord, field_sources) - Ferguson is the first source of every
+    critical field it provided (see CATALOG_SOURCES_KEY)
+    """
+    grounded = catalog_fields_from_ferguson(ferguson_product)
+    # An empty description is requested (the "No description available" default would count as filled)
+    raw_data = {"brand": brand, "model_number": model_number, "product_description": "", **grounded}
+    record = product_record_from_raw(raw_data, brand, model_number, "Ferguson").model_dump()
+    field_sources = {field: ["ferguson"] for field in grounded if field in CRITICAL_FIELDS["catalog"]}
+    prior_sources = {f"verified_information.{field}": sources for field, sources in field_sources.items()}
+
+    refilled, filled, provider_used = await refill_record(
+        "catalog", record, f"Brand: {brand}\nModel Number: {model_number}", "verified_information",
+        store_sources=True, prior_sources=prior_sources
+    )
+    if provider_used:
+        refilled["verified_information"]["verified_by"] = f"Ferguson + {AI_PROVIDERS[provider_used]['name']}"
+    new_sources = pop_catalog_field_sources(refilled["verified_information"])
+    product_data, filled = validated_product_record(refilled, record, filled)
+    field_sources.update({
+        field: sources for field, sources in new_sources.items()
+        if f"verified_information.{field}" in filled
+    })
+    print(f"[catalog] Grounded {model_number}: {len(grounded)} fields from Ferguson, {len(filled)} from AI")
+    return product_data, field_sources
+
+async def generate_grounded_home_product_data(model_number: str, brand: Optional[str], description: Optional[str],
+                                              ferguson_product: dict) -> tuple:
+    """
+    Home product record from Ferguson data; the AI is asked only for the fields
+    Ferguson doesn't provide, and to confirm the critical ones it does.
+    Returns: (enriched_data_dict, provider_used, ai_response_time)
+    """
+    start_time = time.time()
+    grounded = home_fields_from_ferguson(ferguson_product)
+    record = empty_home_product_record()
+    for path, value in grounded.items():
+        set_nested_value(record, path, value)
+    product_identity = record["product_identity"]
+    product_identity["model_number"] = model_number
+    if brand:
+        product_identity["brand"] = brand
+
+    # Ferguson is the first source of the critical fields it provides
+    prior_sources = {}
+    for path in grounded:
+        section, field = path.split(".", 1)
+        if section == "product_identity" and field in CRITICAL_FIELDS["home_products"]:
+            product_identity[f"{field}_sources"] = ["ferguson"]
+            product_identity[f"{field}_source_count"] = 1
+            prior_sources[path] = ["ferguson"]
+
+    identity = f"Model Number: {model_number}\nBrand: {brand or 'Not provided'}\nDescription: {description or 'Not provided'}"
+    record, filled, provider_used = await refill_record(
+        "home_products", record, identity, "product_identity", store_sources=True, prior_sources=prior_sources
+    )
+
+    provider_used = provider_used or "ferguson"
+    enforce_msrp_rules(record["product_identity"], provider_used)
+    if provider_used != "ferguson":
+        record["product_identity"]["verified_by"] = f"Ferguson + {record['product_identity']['verified_by']}"
+    finalize_home_product_record(record, provider_used)
+    print(f"[home_products] Grounded {model_number}: {len(grounded)} fields from Ferguson, {len(filled)} from AI")
+    return record, provider_used, time.time() - start_time
+
+# ============================================================================
+# BACKGROUND JOBS (submit now, poll /jobs/{id} later)
+# ============================================================================
+
+class JobSubmitRequest(BaseModel):
+    """Request model for background job submission"""
+    job_type: str = Field(..., description="enrich, enrich-part, enrich-home-product or lookup-ferguson")
+    payload: Dict[str, Any] = Field(..., description="Same body the matching endpoint accepts")
+
+async def _job_refill(portal: str, payload: dict) -> Optional[dict]:
+    """
+    fill_missing job for catalog / home_products: the same second pass as the endpoints,
+    with a result shaped like enrich_portal_item's. None when nothing is cached.
+    """
+    start_time = time.time()
+    if portal == "catalog":
+        refilled = await refill_product_data(payload["brand"], payload["model_number"], payload.get("field_details"))
+        if refilled is None:
+            return None
+        product_data, filled_fields, _, cache_hit = refilled
+        data = product_data.model_dump()
+    else:
+        refilled = await refill_home_product_data(
+            payload["model_number"], payload.get("brand"), payload.get("description"), payload.get("field_details")
+        )
+        if refilled is None:
+            return None
+        data, _, _, filled_fields, cache_hit = refilled
+    
+    response_time = time.time() - start_time
+    update_portal_metrics(portal, True, response_time, "job", None, payload["model_number"], payload.get("brand"))
+    return {
+        "portal": portal,
+        "brand": payload.get("brand"),
+        "model_number": payload["model_number"],
+        "success": True,
+        "data": data,
+        "error": None,
+        "cached": cache_hit,
+        "filled_fields": filled_fields,
+        "response_time": round(response_time, 2)
+    }
+
+def _job_enrichment_handler(portal: str):
+    """Build a job handler that runs one enrichment and raises on failure (so it is retried)."""
+    async def handler(payload: dict) -> dict:
+        # Over budget won't succeed on retry today
+        try:
+            token_ledger.check()
+        except TokenBudgetExceededError as e:
+            raise PermanentJobError(str(e))
+        
+        # Second pass over the cached record, as the endpoints do (full enrichment if none)
+        if payload.get("fill_missing"):
+            refilled = await _job_refill(portal, payload)
+            if refilled is not None:
+                return refilled
+        
+        if portal == "parts":
+            item = BatchEnrichItem(model_number=payload["part_number"], brand=payload["brand"])
+        else:
+            item = BatchEnrichItem(**payload)
+        
+        result = await enrich_portal_item(portal, item, source="job")
+        if not result["success"]:
+            raise Exception(result["error"])
+        return result
+    return handler
+
+async def _job_ferguson_lookup(payload: dict) -> dict:
+    """Job handler for the complete Ferguson lookup"""
+    try:
+        return await lookup_ferguson_complete(FergusonCompleteLookupRequest(**payload), API_KEY)
+    except HTTPException as e:
+        # 4xx (e.g. product not found) will not succeed on retry
+        if e.status_code < 500:
+            raise PermanentJobError(json.dumps(e.detail) if isinstance(e.detail, dict) else str(e.detail))
+        raise Exception(e.detail)
+
+# Job type -> (request model used to validate the payload, handler)
+JOB_TYPES = {
+    "enrich": (EnrichRequest, _job_enrichment_handler("catalog")),
+    "enrich-part": (PartEnrichRequest, _job_enrichment_handler("parts")),
+    "enrich-home-product": (HomeProductEnrichRequest, _job_enrichment_handler("home_products")),
+    "lookup-ferguson": (FergusonCompleteLookupRequest, _job_ferguson_lookup),
+}
+
+def _job_with_api_key(handler):
+    """Attribute a job's LLM usage to the API key that submitted it"""
+    async def run(payload: dict) -> dict:
+        payload = dict(payload)
+        key_token = set_api_key_hash(payload.pop("api_key_hash", None))
+        try:
+            return await handler(payload)
+        finally:
+            reset_api_key(key_token)
+    return run
+
+for _job_type, (_, _job_handler) in JOB_TYPES.items():
+    job_queue.register(_job_type, _job_with_api_key(_job_handler))
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop()
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    request: JobSubmitRequest,
+    x_api_key: str = Header(..., alias="X-API-KEY")
+):
+    """
+    Submit a slow enrichment or Ferguson lookup as a background job.
+    Returns a job id immediately - poll GET /jobs/{job_id} for the result.
+    Failed attempts are retried with backoff; jobs survive server restarts.
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    if request.job_type not in JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid job_type. Use one of: {', '.join(JOB_TYPES)}")
+    
+    # Validate payload up front so bad input fails fast instead of in the worker
+    request_model = JOB_TYPES[request.job_type][0]
+    try:
+        payload = request_model(**request.payload).model_dump()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {str(e)}")
+    
+    if request.job_type in ("enrich-home-product", "lookup-ferguson") and not payload["model_number"].strip():
+        raise HTTPException(status_code=400, detail="Model number is required")
+    
+    payload["api_key_hash"] = current_key_hash()
+    job = job_queue.submit(request.job_type, payload)
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['id']}"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, x_api_key: str = Header(..., alias="X-API-KEY")):
+    """
+    Get job status and, once completed, its result.
+    Status: queued, running, completed or failed.
+    Requires X-API-KEY header for authentication.
+    """
+    await verify_api_key(x_api_key)
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "success": True,
+        "job": job
+    }
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -2518,7 +3905,8 @@ async def get_api_stats(
     stats = api_logger.get_stats(hours=hours)
     return {
         "success": True,
-        **stats
+        **stats,
+        "logger_queue": api_logger.get_queue_stats()
     }
 
 @app.get("/api-logs/search")
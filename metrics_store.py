@@ -0,0 +1,392 @@
+"""
+Shared Metrics Store
+Metrics backend shared by every uvicorn worker process (SQLite WAL).
+Updates are buffered in-process as counter deltas, last-write values and
+capped event logs; a background thread flushes them every flush_interval
+seconds (or after flush_every updates) as atomic UPSERT increments, so a
+burst of requests costs one transaction and workers never clobber each other.
+Reads merge the local unflushed buffer, so a worker always sees its own updates.
+Latency and completeness distributions are streaming log-bucketed histograms
+whose bucket counts are ordinary counters (see histogram.py).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from histogram import LogHistogram, LATENCY_HISTOGRAM, COMPLETENESS_HISTOGRAM
+
+# Load environment variables
+load_dotenv()
+
+# Counters kept for every AI provider (ai_metrics / parts_ai_metrics shape)
+PROVIDER_COUNTERS = (
+    "total_requests", "successful_requests", "failed_requests",
+    "total_response_time", "total_tokens_used"
+)
+
+
+class MetricsStore:
+    """Buffered, multi-process-safe counters, values and event logs"""
+
+    def __init__(self, db_path: str = "data/metrics.db", flush_interval: float = 2.0, flush_every: int = 100):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._lock = threading.Lock()        # guards the pending buffers
+        self._db_lock = threading.Lock()     # guards the connection (flushes and reads)
+        self._counters: Dict[Tuple[str, str, str], float] = defaultdict(float)
+        self._values: Dict[Tuple[str, str, str], Any] = {}
+        self._events: List[Tuple[str, str, str, Any, float, int]] = []
+        self._pending = 0
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._writer: Optional[threading.Thread] = None
+        self.stats = {"updates": 0, "flushes": 0, "write_errors": 0}
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema"""
+        cursor = self._conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_counters (
+                scope TEXT NOT NULL,
+                name TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, name, field)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_values (
+                scope TEXT NOT NULL,
+                name TEXT NOT NULL,
+                field TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (scope, name, field)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS metric_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_metric_events ON metric_events(scope, name, kind, id)")
+        self._conn.commit()
+
+    # ---------------------------------------------------------------- updates
+
+    def _updated(self):
+        self._pending += 1
+        self.stats["updates"] += 1
+        self._ensure_writer()
+        if self._pending >= self.flush_every:
+            self._wakeup.set()
+
+    def incr(self, scope: str, name: str, field: str, amount: float = 1):
+        """Add amount to a counter"""
+        with self._lock:
+            self._counters[(scope, name, field)] += amount
+        self._updated()
+
+    def set_value(self, scope: str, name: str, field: str, value: Any):
+        """Set a last-write-wins value (e.g. last_used)"""
+        with self._lock:
+            self._values[(scope, name, field)] = value
+        self._updated()
+
+    def add_event(self, scope: str, name: str, kind: str, payload: Any, keep: int = 100):
+        """Append to a capped event log (only the newest keep entries are retained)"""
+        with self._lock:
+            self._events.append((scope, name, kind, payload, time.time(), keep))
+        self._updated()
+
+    def observe(self, scope: str, name: str, value: float,
+                histogram: LogHistogram = LATENCY_HISTOGRAM, prefix: str = "latency"):
+        """Add a value to a streaming histogram (fixed number of bucket counters)"""
+        with self._lock:
+            self._counters[(scope, name, f"{prefix}_b{histogram.bucket(value)}")] += 1
+            self._counters[(scope, name, f"{prefix}_sum")] += value
+        self._updated()
+
+    # ------------------------------------------------------------------ flush
+
+    def flush(self) -> bool:
+        """Write buffered updates in one transaction. Returns True if anything was written."""
+        with self._db_lock:
+            with self._lock:
+                counters, self._counters = self._counters, defaultdict(float)
+                values, self._values = self._values, {}
+                events, self._events = self._events, []
+                self._pending = 0
+
+            if not counters and not values and not events:
+                return False
+
+            try:
+                with self._conn:
+                    self._conn.executemany("""
+                        INSERT INTO metric_counters (scope, name, field, value) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(scope, name, field) DO UPDATE SET value = value + excluded.value
+                    """, [(*key, amount) for key, amount in counters.items()])
+                    self._conn.executemany("""
+                        INSERT INTO metric_values (scope, name, field, value) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(scope, name, field) DO UPDATE SET value = excluded.value
+                    """, [(*key, json.dumps(value)) for key, value in values.items()])
+                    self._conn.executemany("""
+                        INSERT INTO metric_events (scope, name, kind, payload, created_at) VALUES (?, ?, ?, ?, ?)
+                    """, [(scope, name, kind, json.dumps(payload, default=str), created_at)
+                          for scope, name, kind, payload, created_at, _ in events])
+
+                    # Trim each touched event log to its cap
+                    caps = {(scope, name, kind): keep for scope, name, kind, _, _, keep in events}
+                    for (scope, name, kind), keep in caps.items():
+                        self._conn.execute("""
+                            DELETE FROM metric_events WHERE scope = ? AND name = ? AND kind = ? AND id NOT IN (
+                                SELECT id FROM metric_events WHERE scope = ? AND name = ? AND kind = ?
+                                ORDER BY id DESC LIMIT ?
+                            )
+                        """, (scope, name, kind, scope, name, kind, keep))
+            except Exception as e:
+                # Put the updates back so the next flush retries them
+                with self._lock:
+                    for key, amount in counters.items():
+                        self._counters[key] += amount
+                    for key, value in values.items():
+                        self._values.setdefault(key, value)
+                    self._events[:0] = events
+                    self._pending += 1
+                self.stats["write_errors"] += 1
+                print(f"Error saving metrics: {e}")
+                return False
+
+            self.stats["flushes"] += 1
+            return True
+
+    def _ensure_writer(self):
+        """Start the background writer thread (once per process)"""
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, name="metrics-writer", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self):
+        while not self._stopping:
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the writer thread and write any pending updates"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._writer is not None and self._writer.is_alive():
+            self._writer.join(timeout=5)
+        self.flush()
+
+    # ------------------------------------------------------------------ reads
+
+    def counters(self, scope: str) -> Dict[str, Dict[str, float]]:
+        """All counters for a scope: {name: {field: value}} (includes this worker's unflushed deltas)"""
+        result: Dict[str, Dict[str, float]] = defaultdict(dict)
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT name, field, value FROM metric_counters WHERE scope = ?", (scope,)
+            ).fetchall()
+            with self._lock:
+                pending = [(key, amount) for key, amount in self._counters.items() if key[0] == scope]
+
+        for name, field, value in rows:
+            result[name][field] = value
+        for (_, name, field), amount in pending:
+            result[name][field] = result[name].get(field, 0) + amount
+        return dict(result)
+
+    def values(self, scope: str) -> Dict[str, Dict[str, Any]]:
+        """All values for a scope: {name: {field: value}}"""
+        result: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT name, field, value FROM metric_values WHERE scope = ?", (scope,)
+            ).fetchall()
+            with self._lock:
+                pending = [(key, value) for key, value in self._values.items() if key[0] == scope]
+
+        for name, field, value in rows:
+            result[name][field] = json.loads(value) if value is not None else None
+        for (_, name, field), value in pending:
+            result[name][field] = value
+        return dict(result)
+
+    def events(self, scope: str, name: str, kind: str, limit: int = 100) -> List[Any]:
+        """Newest limit events of a log, oldest first"""
+        with self._db_lock:
+            rows = self._conn.execute("""
+                SELECT payload FROM metric_events WHERE scope = ? AND name = ? AND kind = ?
+                ORDER BY id DESC LIMIT ?
+            """, (scope, name, kind, limit)).fetchall()
+            with self._lock:
+                pending = [payload for s, n, k, payload, _, _ in self._events if (s, n, k) == (scope, name, kind)]
+
+        events = [json.loads(payload) for (payload,) in reversed(rows)] + pending
+        return events[-limit:] if limit else []
+
+    @staticmethod
+    def histogram_summary(fields: Dict[str, float], histogram: LogHistogram = LATENCY_HISTOGRAM,
+                          prefix: str = "latency") -> Dict[str, Optional[float]]:
+        """count/mean/p50/p90/p95/p99 from one name's counters"""
+        bucket_prefix = f"{prefix}_b"
+        buckets = {
+            int(field[len(bucket_prefix):]): count
+            for field, count in fields.items() if field.startswith(bucket_prefix)
+        }
+        return histogram.summarize(buckets, fields.get(f"{prefix}_sum", 0.0))
+
+    def histograms(self, scope: str, histogram: LogHistogram = LATENCY_HISTOGRAM,
+                   prefix: str = "latency") -> Dict[str, Dict[str, Optional[float]]]:
+        """Histogram summaries for every name in a scope"""
+        return {
+            name: self.histogram_summary(fields, histogram, prefix)
+            for name, fields in self.counters(scope).items()
+            if any(field.startswith(f"{prefix}_b") for field in fields)
+        }
+
+    def has_scope(self, scope: str) -> bool:
+        """Whether anything has been recorded for a scope"""
+        with self._db_lock:
+            row = self._conn.execute("SELECT 1 FROM metric_counters WHERE scope = ? LIMIT 1", (scope,)).fetchone()
+        return row is not None
+
+    def reset(self, scope: str):
+        """Delete every counter, value and event of a scope (for all workers)"""
+        with self._db_lock:
+            with self._lock:
+                self._counters = defaultdict(float, {k: v for k, v in self._counters.items() if k[0] != scope})
+                self._values = {k: v for k, v in self._values.items() if k[0] != scope}
+                self._events = [event for event in self._events if event[0] != scope]
+            with self._conn:
+                for table in ("metric_counters", "metric_values", "metric_events"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE scope = ?", (scope,))
+
+    def import_legacy(self, scope: str, counters: Dict[str, Dict[str, float]],
+                      values: Dict[str, Dict[str, Any]],
+                      events: Iterable[Tuple[str, str, Any]]) -> bool:
+        """
+        Seed an empty scope (e.g. from the old portal_metrics.json).
+        Runs in one IMMEDIATE transaction so only one worker imports.
+        """
+        with self._db_lock:
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                if cursor.execute("SELECT 1 FROM metric_counters WHERE scope = ? LIMIT 1", (scope,)).fetchone():
+                    cursor.execute("ROLLBACK")
+                    return False
+
+                for name, fields in counters.items():
+                    for field, value in fields.items():
+                        cursor.execute(
+                            "INSERT INTO metric_counters (scope, name, field, value) VALUES (?, ?, ?, ?)",
+                            (scope, name, field, value)
+                        )
+                for name, fields in values.items():
+                    for field, value in fields.items():
+                        cursor.execute(
+                            "INSERT OR REPLACE INTO metric_values (scope, name, field, value) VALUES (?, ?, ?, ?)",
+                            (scope, name, field, json.dumps(value))
+                        )
+                for name, kind, payload in events:
+                    cursor.execute(
+                        "INSERT INTO metric_events (scope, name, kind, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (scope, name, kind, json.dumps(payload, default=str), time.time())
+                    )
+                cursor.execute("COMMIT")
+                return True
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    # ------------------------------------------------------- provider metrics
+
+    def record_provider_call(self, scope: str, provider: str, success: bool, response_time: float,
+                             tokens_used: int = 0, completeness: Optional[float] = None,
+                             error: Optional[str] = None, timestamp: Optional[str] = None):
+        """Record one AI provider call in the ai_metrics / parts_ai_metrics shape"""
+        self.incr(scope, provider, "total_requests")
+        self.set_value(scope, provider, "last_used", timestamp or datetime.utcnow().isoformat())
+
+        if success:
+            self.incr(scope, provider, "successful_requests")
+            self.incr(scope, provider, "total_response_time", response_time)
+            self.observe(scope, provider, response_time)
+            if tokens_used > 0:
+                self.incr(scope, provider, "total_tokens_used", tokens_used)
+            if completeness is not None:
+                self.observe(scope, provider, completeness, COMPLETENESS_HISTOGRAM, "completeness")
+        else:
+            self.incr(scope, provider, "failed_requests")
+            if error:
+                # Keep last 10 errors
+                self.add_event(scope, provider, "errors", {
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "error": error[:200]  # Truncate long errors
+                }, keep=10)
+
+    def provider_metrics(self, scope: str, providers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Provider metrics in the ai_metrics / parts_ai_metrics shape, aggregated across workers"""
+        counters = self.counters(scope)
+        values = self.values(scope)
+        result = {}
+
+        for provider in providers:
+            fields = counters.get(provider, {})
+            data = {field: fields.get(field, 0) for field in PROVIDER_COUNTERS}
+            for field in ("total_requests", "successful_requests", "failed_requests", "total_tokens_used"):
+                data[field] = int(data[field])
+            data["total_response_time"] = float(data["total_response_time"])
+
+            completeness = self.histogram_summary(fields, COMPLETENESS_HISTOGRAM, "completeness")
+            successful = data["successful_requests"]
+            result[provider] = {
+                **data,
+                "avg_response_time": data["total_response_time"] / successful if successful else 0.0,
+                "avg_tokens": data["total_tokens_used"] // successful if successful else 0,
+                "avg_completeness": completeness["mean"] or 0.0,
+                "latency": self.histogram_summary(fields),
+                "completeness": completeness,
+                "last_used": values.get(provider, {}).get("last_used"),
+                "errors": self.events(scope, provider, "errors", limit=10)
+            }
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Update/flush counters"""
+        return {
+            **self.stats,
+            "pending_updates": self._pending,
+            "flush_interval": self.flush_interval,
+            "flush_every": self.flush_every
+        }
+
+
+# Global store instance (DATA_DIR is shared by all workers)
+metrics_store = MetricsStore(
+    db_path=os.path.join(os.getenv("DATA_DIR", "/opt/render/project/src/data"), "metrics.db"),
+    flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", "2")),
+    flush_every=int(os.getenv("METRICS_FLUSH_EVERY", "100"))
+)
@@ -11,8 +11,10 @@ from typing import Optional, List, Dict, Any
 from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, ConfigDict
-from openai import OpenAI
 from dotenv import load_dotenv
+from ai_clients import openai_client, xai_client
+from metrics_store import metrics_store
+from token_budget import token_ledger
 
 # Load environment variables
 load_dotenv()
@@ -326,7 +328,7 @@ def calculate_part_completeness(part_record: PartRecord) -> float:
     return (populated_fields / total_fields * 100) if total_fields > 0 else 0.0
 
 
-def enrich_part_with_ai(part_number: str, brand: str, provider: str = "openai") -> tuple:
+async def enrich_part_with_ai(part_number: str, brand: str, provider: str = "openai") -> tuple:
     """
     Call AI to enrich part data.
     Returns: (PartRecord, metrics_dict)
@@ -347,8 +349,8 @@ def enrich_part_with_ai(part_number: str, brand: str, provider: str = "openai")
             brand=brand
         )
         
-        # Call AI
-        response = client.chat.completions.create(
+        # Call AI (non-blocking)
+        response = await client.chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": "You are an appliance parts data specialist. Return only valid JSON."},
@@ -405,7 +407,7 @@ def enrich_part_with_ai(part_number: str, brand: str, provider: str = "openai")
         
         # Calculate metrics
         elapsed_time = time.time() - start_time
-        tokens_used = response.usage.total_tokens
+        tokens_used = token_ledger.record_response("parts", provider, model, response)
         completeness = calculate_part_completeness(part_record)
         
         metrics = {
@@ -424,77 +426,31 @@ def enrich_part_with_ai(part_number: str, brand: str, provider: str = "openai")
         raise Exception(f"{provider} error after {elapsed_time:.2f}s: {str(e)}")
 
 
-# Store for parts enrichment metrics
-parts_ai_metrics = {
-    "openai": {
-        "total_requests": 0,
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "total_response_time": 0.0,
-        "avg_response_time": 0.0,
-        "total_tokens_used": 0,
-        "avg_tokens": 0,
-        "field_completeness_scores": [],
-        "avg_completeness": 0.0,
-        "last_used": None,
-        "errors": []
-    },
-    "xai": {
-        "total_requests": 0,
-        "successful_requests": 0,
-        "failed_requests": 0,
-        "total_response_time": 0.0,
-        "avg_response_time": 0.0,
-        "total_tokens_used": 0,
-        "avg_tokens": 0,
-        "field_completeness_scores": [],
-        "avg_completeness": 0.0,
-        "last_used": None,
-        "errors": []
-    }
-}
+# Parts enrichment metrics (shared by all workers - see metrics_store.py)
+PARTS_METRICS_SCOPE = "parts_ai"
+
+
+def load_parts_ai_metrics() -> dict:
+    """Parts AI provider metrics, aggregated across all workers."""
+    return metrics_store.provider_metrics(PARTS_METRICS_SCOPE, AI_PROVIDERS.keys())
 
 
 def update_parts_metrics(provider: str, metrics: dict, success: bool = True):
     """Update performance metrics for parts enrichment."""
-    provider_metrics = parts_ai_metrics[provider]
-    
-    provider_metrics["total_requests"] += 1
-    
     if success:
-        provider_metrics["successful_requests"] += 1
-        provider_metrics["total_response_time"] += metrics["response_time"]
-        provider_metrics["total_tokens_used"] += metrics["tokens_used"]
-        provider_metrics["field_completeness_scores"].append(metrics["completeness"])
-        provider_metrics["last_used"] = metrics["timestamp"]
-        
-        # Calculate averages
-        provider_metrics["avg_response_time"] = (
-            provider_metrics["total_response_time"] / provider_metrics["successful_requests"]
-        )
-        provider_metrics["avg_tokens"] = (
-            provider_metrics["total_tokens_used"] // provider_metrics["successful_requests"]
-        )
-        provider_metrics["avg_completeness"] = (
-            sum(provider_metrics["field_completeness_scores"]) / 
-            len(provider_metrics["field_completeness_scores"])
+        metrics_store.record_provider_call(
+            PARTS_METRICS_SCOPE, provider, True, metrics["response_time"],
+            tokens_used=metrics["tokens_used"],
+            completeness=metrics["completeness"],
+            timestamp=metrics["timestamp"]
         )
     else:
-        provider_metrics["failed_requests"] += 1
-        if "error" in metrics:
-            provider_metrics["errors"].append({
-                "timestamp": datetime.now().isoformat(),
-                "error": metrics["error"]
-            })
-
+        metrics_store.record_provider_call(
+            PARTS_METRICS_SCOPE, provider, False, 0.0, error=metrics.get("error")
+        )
 
-# Initialize AI clients
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-xai_client = OpenAI(
-    api_key=os.getenv("XAI_API_KEY"),
-    base_url="https://api.x.ai/v1"
-)
 
+# AI clients are shared with the other portals (see ai_clients.py)
 AI_PROVIDERS = {
     "openai": {
         "client": openai_client,
@@ -0,0 +1,96 @@
+"""
+Prometheus Text Exposition
+Minimal renderer for the Prometheus/OpenMetrics text format (version 0.0.4),
+so /metrics can be scraped without adding a client library. Histograms are
+re-bucketed from the streaming log histograms onto fixed `le` boundaries.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from histogram import LogHistogram
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Standard latency boundaries in seconds (AI calls run long)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+Labels = Dict[str, str]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Optional[Labels]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class PrometheusWriter:
+    """Accumulates metric families and renders them in exposition format"""
+
+    def __init__(self, prefix: str = "catalogbot"):
+        self.prefix = prefix
+        self.lines: List[str] = []
+
+    def _header(self, name: str, help_text: str, metric_type: str) -> str:
+        full_name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {metric_type}")
+        return full_name
+
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]):
+        full_name = self._header(name, help_text, "counter")
+        for labels, value in samples:
+            self.lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]):
+        full_name = self._header(name, help_text, "gauge")
+        for labels, value in samples:
+            self.lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, histogram: LogHistogram,
+                  series: Iterable[Tuple[Labels, Dict[str, float]]], prefix: str = "latency",
+                  boundaries: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        series: (labels, counters) where counters holds `{prefix}_b<index>` bucket
+        counts and `{prefix}_sum` as written by MetricsStore.observe.
+        """
+        full_name = self._header(name, help_text, "histogram")
+        bucket_prefix = f"{prefix}_b"
+
+        for labels, fields in series:
+            buckets = sorted(
+                (int(field[len(bucket_prefix):]), count)
+                for field, count in fields.items() if field.startswith(bucket_prefix)
+            )
+            if not buckets:
+                continue
+
+            # A log bucket is counted under the first boundary at or above its midpoint
+            cumulative = 0.0
+            position = 0
+            for boundary in boundaries:
+                while position < len(buckets) and histogram.bucket_value(buckets[position][0]) <= boundary:
+                    cumulative += buckets[position][1]
+                    position += 1
+                self.lines.append(
+                    f"{full_name}_bucket{_labels({**labels, 'le': _number(boundary)})} {_number(cumulative)}"
+                )
+
+            total_count = sum(count for _, count in buckets)
+            self.lines.append(f"{full_name}_bucket{_labels({**labels, 'le': '+Inf'})} {_number(total_count)}")
+            self.lines.append(f"{full_name}_sum{_labels(labels)} {_number(fields.get(f'{prefix}_sum', 0.0))}")
+            self.lines.append(f"{full_name}_count{_labels(labels)} {_number(total_count)}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
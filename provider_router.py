@@ -0,0 +1,387 @@
+"""
+AI Provider Router
+Runs an enrichment against the configured AI providers with failover and,
+optionally, hedging: if the primary hasn't answered within a percentile of
+its observed latency, the secondary is launched in parallel and whichever
+valid response arrives first wins (the loser is cancelled).
+
+Provider order is adaptive: per portal, providers are ranked on recent
+latency, recent error rate and data completeness. Samples expire after
+sample_ttl seconds; until a provider has enough recent samples its score is
+seeded from the shared metrics store (all workers, all time). A small share
+of requests (explore_rate) goes to a non-primary provider first so demoted
+providers keep producing fresh samples and can win the primary slot back.
+Each provider has a circuit breaker - while it is open the provider is
+skipped entirely.
+"""
+
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+ProviderAttempt = Callable[[str], Awaitable[Any]]
+ProviderStream = Callable[[str], AsyncIterator[Any]]
+
+
+class AllProvidersFailedError(Exception):
+    """Every provider failed - errors maps provider name to its error message"""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        last_error = list(errors.values())[-1] if errors else "No AI providers enabled"
+        super().__init__(f"All AI providers failed. Last error: {last_error}")
+
+
+class ProviderRouter:
+    """Failover / hedged execution across AI providers, tracking latency per portal and provider"""
+
+    def __init__(self, hedging_enabled: bool = False, hedge_percentile: float = 90.0,
+                 min_samples: int = 20, default_hedge_delay: float = 10.0, window: int = 200,
+                 adaptive: bool = True, adaptive_min_samples: int = 10,
+                 sample_ttl: float = 900.0, explore_rate: float = 0.05,
+                 failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.hedging_enabled = hedging_enabled
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.window = window
+        self.adaptive = adaptive
+        self.adaptive_min_samples = adaptive_min_samples
+        self.sample_ttl = sample_ttl
+        self.explore_rate = explore_rate
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        # (timestamp, sample) pairs - capped at window and expired after sample_ttl
+        self.latencies: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+        self.outcomes: Dict[Tuple[str, str], Deque[Tuple[float, bool]]] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.hedge_stats: Dict[str, Dict[str, int]] = {}
+        self.scores: Dict[str, Dict[str, float]] = {}
+        self.primary: Dict[str, str] = {}
+        self.explorations: Dict[str, int] = {}
+
+    # ---------------------------------------------------------------- samples
+
+    def _recent(self, samples: Optional[Deque[Tuple[float, Any]]]) -> List[Any]:
+        """Drop samples older than sample_ttl and return the remaining values"""
+        if not samples:
+            return []
+        cutoff = time.time() - self.sample_ttl
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [value for _, value in samples]
+
+    def record_latency(self, portal: str, provider: str, seconds: float):
+        """Record a successful response time"""
+        key = (portal, provider)
+        if key not in self.latencies:
+            self.latencies[key] = deque(maxlen=self.window)
+        self.latencies[key].append((time.time(), seconds))
+
+    def latency_percentile(self, portal: str, provider: str, percentile: float) -> Optional[float]:
+        """Percentile of recent successful response times (None without samples)"""
+        samples = self._recent(self.latencies.get((portal, provider)))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def hedge_delay(self, portal: str, provider: str) -> float:
+        """How long to wait on a provider before hedging to the next one"""
+        samples = self._recent(self.latencies.get((portal, provider)))
+        if len(samples) < self.min_samples:
+            return self.default_hedge_delay
+        return self.latency_percentile(portal, provider, self.hedge_percentile)
+
+    def record_outcome(self, portal: str, provider: str, success: bool):
+        """Record a success/failure (cancelled hedge losers are neither)"""
+        key = (portal, provider)
+        if key not in self.outcomes:
+            self.outcomes[key] = deque(maxlen=self.window)
+        self.outcomes[key].append((time.time(), success))
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        """Circuit breaker for a provider (shared by all portals - an outage affects every portal)"""
+        if provider not in self.breakers:
+            self.breakers[provider] = CircuitBreaker(
+                f"ai:{provider}", failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout
+            )
+        return self.breakers[provider]
+
+    # ---------------------------------------------------------------- routing
+
+    def _score(self, portal: str, provider: str, seed: Optional[Dict[str, Any]] = None) -> Optional[float]:
+        """
+        Weighted score (same weights as the /ai-comparison report):
+        success rate 40%, completeness 30%, speed 30% (p90 latency).
+        Success rate and p90 come from this process's recent samples once there are
+        adaptive_min_samples of them, otherwise from seed - the provider's metrics in
+        the shared store ({"samples", "success_rate", "p90", "completeness"}).
+        None while neither source has enough samples.
+        """
+        seed = seed or {}
+        outcomes = self._recent(self.outcomes.get((portal, provider)))
+        p90 = self.latency_percentile(portal, provider, 90)
+
+        if len(outcomes) >= self.adaptive_min_samples and p90 is not None:
+            success_rate = sum(outcomes) / len(outcomes) * 100
+        elif seed.get("samples", 0) >= self.adaptive_min_samples and seed.get("p90") is not None:
+            success_rate = seed["success_rate"]
+            p90 = seed["p90"]
+        else:
+            return None
+
+        speed_score = (1 / (p90 + 1)) * 100
+        return success_rate * 0.4 + seed.get("completeness", 0.0) * 0.3 + speed_score * 0.3
+
+    def order_providers(self, portal: str, providers: List[str],
+                        seed: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+        """
+        Order providers for a portal: best-scoring first (the configured primary
+        keeps its place unless beaten by 10%). Providers with an open circuit are dropped.
+        seed maps provider name to its shared-store metrics (see _score).
+        With probability explore_rate a non-primary provider is tried first for this
+        request only, so every provider keeps fresh samples.
+        """
+        ordered = list(providers)
+        seed = seed or {}
+
+        if self.adaptive and len(ordered) > 1:
+            scores = {name: self._score(portal, name, seed.get(name)) for name in ordered}
+            self.scores[portal] = {name: round(score, 2) for name, score in scores.items() if score is not None}
+
+            if all(score is not None for score in scores.values()):
+                incumbent = self.primary.get(portal, ordered[0])
+                if incumbent not in scores:
+                    incumbent = ordered[0]
+                best = max(ordered, key=lambda name: scores[name])
+                # 10% hysteresis so the primary doesn't flap between similar providers
+                primary = best if scores[best] > scores[incumbent] * 1.1 else incumbent
+                ordered.remove(primary)
+                ordered.insert(0, primary)
+
+        ordered = [name for name in ordered if self.breaker(name).available()]
+
+        if ordered:
+            self.primary[portal] = ordered[0]
+
+        if self.adaptive and len(ordered) > 1 and random.random() < self.explore_rate:
+            explored = random.choice(ordered[1:])
+            ordered.remove(explored)
+            ordered.insert(0, explored)
+            self.explorations[portal] = self.explorations.get(portal, 0) + 1
+        return ordered
+
+    # ------------------------------------------------------------------ calls
+
+    def _stats(self, portal: str) -> Dict[str, int]:
+        return self.hedge_stats.setdefault(portal, {
+            "requests": 0,
+            "hedges_launched": 0,
+            "failovers": 0,
+            "primary_wins": 0,
+            "secondary_wins": 0,
+            "losers_cancelled": 0
+        })
+
+    async def _timed(self, portal: str, provider: str, attempt: ProviderAttempt) -> Any:
+        breaker = self.breaker(provider)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{provider} circuit is open")
+
+        start_time = time.time()
+        try:
+            result = await attempt(provider)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            self.record_outcome(portal, provider, False)
+            raise
+        breaker.record_success()
+        self.record_latency(portal, provider, time.time() - start_time)
+        self.record_outcome(portal, provider, True)
+        return result
+
+    async def call(self, portal: str, providers: List[str], attempt: ProviderAttempt,
+                   seed: Optional[Dict[str, Dict[str, Any]]] = None) -> Tuple[Any, str]:
+        """
+        Run attempt(provider_name) against providers in adaptive order.
+        attempt must raise on failure (including invalid JSON).
+        seed maps provider name to its shared-store metrics for this portal (see _score).
+        Returns: (result, provider_name). Raises AllProvidersFailedError.
+        """
+        if not providers:
+            raise AllProvidersFailedError({})
+
+        ordered = self.order_providers(portal, providers, seed)
+        if not ordered:
+            raise AllProvidersFailedError({name: f"{name} circuit is open" for name in providers})
+        providers = ordered
+
+        stats = self._stats(portal)
+        stats["requests"] += 1
+
+        if not self.hedging_enabled or len(providers) == 1:
+            return await self._call_sequential(portal, providers, attempt, stats)
+        return await self._call_hedged(portal, providers, attempt, stats)
+
+    async def _call_sequential(self, portal: str, providers: List[str], attempt: ProviderAttempt,
+                               stats: Dict[str, int]) -> Tuple[Any, str]:
+        errors = {}
+        for index, provider in enumerate(providers):
+            if index > 0:
+                stats["failovers"] += 1
+            try:
+                result = await self._timed(portal, provider, attempt)
+            except Exception as e:
+                errors[provider] = str(e)
+                continue
+            stats["primary_wins" if index == 0 else "secondary_wins"] += 1
+            return result, provider
+        raise AllProvidersFailedError(errors)
+
+    async def _call_hedged(self, portal: str, providers: List[str], attempt: ProviderAttempt,
+                           stats: Dict[str, int]) -> Tuple[Any, str]:
+        errors = {}
+        remaining = list(providers)
+        pending: Dict[asyncio.Task, str] = {}
+        last_launched = None
+        launch_next = True
+
+        try:
+            while remaining or pending:
+                if remaining and launch_next:
+                    provider = remaining.pop(0)
+                    pending[asyncio.ensure_future(self._timed(portal, provider, attempt))] = provider
+                    last_launched = provider
+                    launch_next = False
+
+                # Only time out (to hedge) while there is another provider left to launch
+                timeout = self.hedge_delay(portal, last_launched) if remaining else None
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    stats["hedges_launched"] += 1
+                    launch_next = True
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors[provider] = str(e)
+                        continue
+
+                    stats["primary_wins" if provider == providers[0] else "secondary_wins"] += 1
+                    return result, provider
+
+                # Everything that finished failed - fail over immediately
+                if remaining:
+                    stats["failovers"] += 1
+                launch_next = True
+        finally:
+            for task in pending:
+                task.cancel()
+                stats["losers_cancelled"] += 1
+
+        raise AllProvidersFailedError(errors)
+
+    async def stream(self, portal: str, providers: List[str], open_stream: ProviderStream,
+                     seed: Optional[Dict[str, Dict[str, Any]]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming counterpart of call(): yields (provider_name, item) for each item
+        of open_stream(provider_name), in adaptive provider order. A provider that
+        fails before yielding anything is failed over; once items have been
+        delivered the error is raised to the caller. Never hedged.
+        Raises AllProvidersFailedError.
+        """
+        ordered = self.order_providers(portal, providers, seed) if providers else []
+        if not ordered:
+            raise AllProvidersFailedError({name: f"{name} circuit is open" for name in providers})
+
+        stats = self._stats(portal)
+        stats["requests"] += 1
+        errors = {}
+
+        for index, provider in enumerate(ordered):
+            if index > 0:
+                stats["failovers"] += 1
+            breaker = self.breaker(provider)
+            if not breaker.allow_request():
+                errors[provider] = f"{provider} circuit is open"
+                continue
+
+            start_time = time.time()
+            started = False
+            try:
+                async for item in open_stream(provider):
+                    started = True
+                    yield provider, item
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                self.record_outcome(portal, provider, False)
+                if started:
+                    raise
+                errors[provider] = str(e)
+                continue
+
+            breaker.record_success()
+            self.record_latency(portal, provider, time.time() - start_time)
+            self.record_outcome(portal, provider, True)
+            stats["primary_wins" if index == 0 else "secondary_wins"] += 1
+            return
+
+        raise AllProvidersFailedError(errors)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing decisions, hedging counters and observed latency/error percentiles"""
+        latency = {}
+        for (portal, provider), samples in self.latencies.items():
+            if not self._recent(samples):
+                continue
+            latency.setdefault(portal, {})[provider] = {
+                "samples": len(samples),
+                "p50": round(self.latency_percentile(portal, provider, 50), 3),
+                "p90": round(self.latency_percentile(portal, provider, 90), 3),
+                "hedge_delay": round(self.hedge_delay(portal, provider), 3)
+            }
+
+        error_rate = {}
+        for (portal, provider), samples in self.outcomes.items():
+            outcomes = self._recent(samples)
+            error_rate.setdefault(portal, {})[provider] = round(
+                (1 - sum(outcomes) / len(outcomes)) * 100, 2
+            ) if outcomes else 0
+
+        return {
+            "adaptive": self.adaptive,
+            "primary": self.primary,
+            "scores": self.scores,
+            "sample_ttl": self.sample_ttl,
+            "explore_rate": self.explore_rate,
+            "explorations": self.explorations,
+            "error_rate": error_rate,
+            "circuit_breakers": self.get_breaker_status(),
+            "hedging_enabled": self.hedging_enabled,
+            "hedge_percentile": self.hedge_percentile,
+            "min_samples": self.min_samples,
+            "default_hedge_delay": self.default_hedge_delay,
+            "by_portal": self.hedge_stats,
+            "latency": latency
+        }
+
+    def get_breaker_status(self) -> Dict[str, Dict[str, Any]]:
+        """Circuit breaker state per provider"""
+        return {name: breaker.get_status() for name, breaker in self.breakers.items()}
@@ -0,0 +1,199 @@
+"""
+Fill-Missing-Fields Re-enrichment
+Second pass over a previously enriched record: only the fields that are
+null/empty, or critical fields that failed 2-source verification, are sent
+to the AI provider, and its answers are merged back into the record. The
+output is a handful of fields instead of the whole schema.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from token_budget import token_ledger
+from verification import CRITICAL_FIELDS, get_nested_value, set_nested_value
+
+# Metadata and MSRP fields (MSRP has its own source rules) are never re-requested
+FILL_SKIP_FIELDS = {
+    "brand", "model_number", "part_number", "verified_by", "enriched_at",
+    "ai_provider", "confidence_score"
+}
+FILL_SKIP_PREFIXES = ("msrp_",)
+
+FILL_SYSTEM_PROMPT = "You are a product data enrichment specialist. Return only valid JSON."
+
+FILL_PROMPT = """A product record was enriched earlier but some fields are still missing or unverified.
+Research ONLY the fields listed below for this product.
+
+PRODUCT:
+{identity}
+
+KNOWN DATA (for identification - do not repeat it):
+{known}
+
+FIELDS TO FILL (dot paths into the record):
+{fields}
+
+CRITICAL FIELDS (require 2+ agreeing authoritative sources - list them):
+{critical}
+
+RULES (Better NULL than WRONG):
+- Use null when a value cannot be verified
+- Include units for all measurements
+- For every critical field you fill, name the sources, e.g. ["ferguson", "manufacturer"]
+- A critical field that already has a value in KNOWN DATA: return that value only if your sources confirm it
+
+RESPONSE FORMAT:
+{{
+  "fields": {{"<path>": <value>, ...}},
+  "sources": {{"<critical path>": ["<source>", "<source>"], ...}}
+}}"""
+
+
+def _missing(value: Any) -> bool:
+    return value is None or value == "" or value == []
+
+
+def _skipped(key: str) -> bool:
+    return key in FILL_SKIP_FIELDS or key.startswith(FILL_SKIP_PREFIXES)
+
+
+def missing_field_paths(record: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Dot paths of the null / empty leaf fields of a (nested) record"""
+    paths = []
+    for key, value in record.items():
+        if _skipped(key):
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            paths.extend(missing_field_paths(value, f"{path}."))
+        elif _missing(value):
+            paths.append(path)
+    return paths
+
+
+def unverified_field_paths(record: Dict[str, Any], portal: str, section: str,
+                           field_details: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Dot paths of the critical fields that validate_product_data did not verify.
+    field_details is keyed by field name within section (as validate_product_data
+    reports it for the flattened section); fields the section doesn't have are ignored.
+    """
+    section_data = record.get(section) or {}
+    return [
+        f"{section}.{field}"
+        for field in CRITICAL_FIELDS.get(portal, [])
+        if field in section_data and not _skipped(field)
+        and not field_details.get(field, {}).get("verified", False)
+    ]
+
+
+def fields_to_fill(record: Dict[str, Any], portal: str, section: str,
+                   field_details: Dict[str, Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    """(all paths to request, the critical ones among them) - missing fields first"""
+    critical = unverified_field_paths(record, portal, section, field_details)
+    paths = missing_field_paths(record)
+    paths += [path for path in critical if path not in paths]
+    return paths, critical
+
+
+def known_fields(record: Dict[str, Any], limit: int = 40) -> Dict[str, Any]:
+    """A compact sample of the filled scalar fields, to ground the provider on the right product"""
+    known = {}
+
+    def walk(data: Dict[str, Any], prefix: str):
+        for key, value in data.items():
+            if len(known) >= limit:
+                return
+            if isinstance(value, dict):
+                walk(value, f"{prefix}{key}.")
+            elif not _missing(value) and not isinstance(value, list) and key not in ("enriched_at", "confidence_score"):
+                known[f"{prefix}{key}"] = value
+
+    walk(record, "")
+    return known
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    return " ".join(str(a).lower().split()) == " ".join(str(b).lower().split())
+
+
+def merge_filled_fields(record: Dict[str, Any], response: Dict[str, Any], paths: List[str],
+                        critical: List[str], store_sources: bool = False,
+                        prior_sources: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    """
+    Merge the provider's answers into record (in place). Only requested paths
+    are applied, and a critical field only with 2+ named sources.
+    store_sources adds <field>_sources / <field>_source_count next to a filled
+    critical field (for records that keep extra keys, so it verifies next time).
+    prior_sources names the sources of critical values already in record (e.g.
+    ["ferguson"] for grounded fields, [] when they are unknown): an answer for a
+    listed path can only confirm the value already there - one that agrees adds
+    its sources to them, one that disagrees is dropped.
+    Returns the paths that were filled.
+    """
+    values = response.get("fields") or {}
+    sources = response.get("sources") or {}
+    requested = set(paths)
+    filled = []
+
+    for path, value in values.items():
+        if path not in requested or _missing(value):
+            continue
+        if path in critical:
+            prior = list((prior_sources or {}).get(path) or [])
+            if path in (prior_sources or {}):
+                # Confirms (keeps) the value already there, or is dropped
+                current = get_nested_value(record, path)
+                if not _same_value(value, current):
+                    continue
+                value = current
+            named = [s for s in sources.get(path) or [] if isinstance(s, str) and s.strip()]
+            named = prior + [s for s in named if s.strip().lower() not in {p.lower() for p in prior}]
+            if len(named) < 2:
+                continue
+            if store_sources:
+                set_nested_value(record, f"{path}_sources", named)
+                set_nested_value(record, f"{path}_source_count", len(named))
+        elif get_nested_value(record, path) is not None and not _missing(get_nested_value(record, path)):
+            continue
+        set_nested_value(record, path, value)
+        filled.append(path)
+
+    return filled
+
+
+async def fill_missing_fields(client, model: str, portal: str, provider: str, identity: str,
+                              record: Dict[str, Any], paths: List[str], critical: List[str],
+                              json_mode: bool = True, store_sources: bool = False,
+                              prior_sources: Optional[Dict[str, List[str]]] = None) -> Tuple[List[str], int]:
+    """
+    Ask one provider for the given paths and merge the answers into record.
+    Returns: (filled_paths, tokens_used)
+    """
+    prompt = FILL_PROMPT.format(
+        identity=identity,
+        known=json.dumps(known_fields(record), default=str),
+        fields="\n".join(f"- {path}" for path in paths),
+        critical="\n".join(f"- {path}" for path in critical) or "- (none)"
+    )
+    args = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": FILL_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        # Room for the requested fields only (a full record needs 4000)
+        "max_tokens": min(4000, 200 + 60 * len(paths))
+    }
+    if json_mode:
+        args["response_format"] = {"type": "json_object"}
+
+    response = await client.chat.completions.create(**args)
+    tokens_used = token_ledger.record_response(portal, provider, model, response)
+
+    content = response.choices[0].message.content.strip()
+    if content.startswith("```"):
+        content = content.split("```")[1].removeprefix("json").strip()
+
+    filled = merge_filled_fields(record, json.loads(content), paths, critical, store_sources, prior_sources)
+    return filled, tokens_used
@@ -0,0 +1,62 @@
+"""
+Request Coalescing (Single-Flight)
+Concurrent identical enrichments await one shared in-flight task
+instead of each issuing its own AI completion
+"""
+
+import copy
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        """Forget the finished task and mark its exception as retrieved"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """
+        Start fn() unless a call with this key is already in flight.
+        Returns: (task, shared) - shared is True when the existing flight was joined.
+        Callers that need the result should await asyncio.shield(task) and copy it.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+        return task, shared
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() once per key at a time.
+        Returns: (result, shared) - shared is True when this caller joined an existing flight.
+
+        The shared task is shielded, so a caller that disconnects does not cancel
+        the work other callers are waiting on. Every caller, the originator included,
+        receives its own deep copy of the result so no caller can mutate another's data.
+        """
+        task, shared = self.start(key, fn)
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result), shared
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Execution/coalescing counters"""
+        return {
+            **self.stats,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,184 @@
+"""
+Token Accounting
+Prompt/completion tokens and estimated cost of every LLM call, broken down
+by API key (hashed - raw keys are never stored), portal and provider, plus
+optional per-key daily token budgets that are checked before a call is made.
+Counts live in the shared metrics store, so budgets hold across all workers.
+"""
+
+import os
+import hashlib
+from contextvars import ContextVar, Token
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from metrics_store import MetricsStore, metrics_store
+
+# Load environment variables
+load_dotenv()
+
+USAGE_SCOPE = "llm_tokens"
+DAILY_SCOPE_PREFIX = "llm_tokens_daily"
+UNKNOWN_KEY = "unknown"
+
+# USD per 1M tokens as (prompt, completion) - update when provider pricing changes
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "grok-2-latest": (2.00, 10.00)
+}
+
+# Hash of the API key of the request (or job) being served
+_current_key_hash: ContextVar[Optional[str]] = ContextVar("api_key_hash", default=None)
+
+
+def hash_api_key(api_key: str) -> str:
+    """Stable short identifier for an API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def set_api_key(api_key: Optional[str]) -> Token:
+    """Attribute LLM calls in the current context to api_key"""
+    return _current_key_hash.set(hash_api_key(api_key) if api_key else None)
+
+
+def set_api_key_hash(key_hash: Optional[str]) -> Token:
+    """Attribute LLM calls in the current context to an already hashed key (background jobs)"""
+    return _current_key_hash.set(key_hash)
+
+
+def reset_api_key(token: Token):
+    _current_key_hash.reset(token)
+
+
+def current_key_hash() -> str:
+    return _current_key_hash.get() or UNKNOWN_KEY
+
+
+def usage_from_response(response: Any) -> Tuple[int, int]:
+    """(prompt_tokens, completion_tokens) of a chat completion (0, 0 if not reported)"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+
+def parse_key_budgets(spec: str) -> Dict[str, int]:
+    """Parse "key_hash=tokens,key_hash=tokens" (AI_TOKEN_BUDGETS)"""
+    budgets = {}
+    for entry in spec.split(","):
+        if "=" in entry:
+            key_hash, tokens = entry.split("=", 1)
+            budgets[key_hash.strip()] = int(tokens.strip())
+    return budgets
+
+
+class TokenBudgetExceededError(Exception):
+    """Raised before an LLM call when the API key has used its daily token budget"""
+
+    def __init__(self, key_hash: str, used: int, budget: int):
+        self.key_hash = key_hash
+        self.used = used
+        self.budget = budget
+        super().__init__(
+            f"Daily AI token budget exceeded for API key {key_hash} ({used}/{budget} tokens). "
+            f"Resets at 00:00 UTC."
+        )
+
+
+class TokenLedger:
+    """Per key / portal / provider token counters and daily budgets"""
+
+    def __init__(self, store: MetricsStore, daily_budget: int = 0,
+                 key_budgets: Optional[Dict[str, int]] = None):
+        self.store = store
+        self.daily_budget = daily_budget
+        self.key_budgets = key_budgets or {}
+        self.stats = {"rejected": 0}
+
+    @staticmethod
+    def _daily_scope(day: Optional[str] = None) -> str:
+        return f"{DAILY_SCOPE_PREFIX}:{day or datetime.utcnow().strftime('%Y-%m-%d')}"
+
+    def budget_for(self, key_hash: str) -> int:
+        """Daily token budget for a key (0 = unlimited)"""
+        return self.key_budgets.get(key_hash, self.daily_budget)
+
+    def used_today(self, key_hash: str) -> int:
+        """Tokens used by a key since 00:00 UTC (all workers)"""
+        return int(self.store.counters(self._daily_scope()).get(key_hash, {}).get("total_tokens", 0))
+
+    def check(self, key_hash: Optional[str] = None):
+        """Raise TokenBudgetExceededError if the key has no budget left today"""
+        key_hash = key_hash or current_key_hash()
+        budget = self.budget_for(key_hash)
+        if budget <= 0:
+            return
+
+        used = self.used_today(key_hash)
+        if used >= budget:
+            self.stats["rejected"] += 1
+            raise TokenBudgetExceededError(key_hash, used, budget)
+
+    def record(self, portal: str, provider: str, model: str, prompt_tokens: int,
+               completion_tokens: int, key_hash: Optional[str] = None) -> int:
+        """Record one LLM call. Returns its total tokens."""
+        key_hash = key_hash or current_key_hash()
+        total = prompt_tokens + completion_tokens
+        prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        name = f"{key_hash}|{portal}|{provider}"
+
+        self.store.incr(USAGE_SCOPE, name, "calls")
+        self.store.incr(USAGE_SCOPE, name, "prompt_tokens", prompt_tokens)
+        self.store.incr(USAGE_SCOPE, name, "completion_tokens", completion_tokens)
+        self.store.incr(USAGE_SCOPE, name, "cost_usd",
+                        (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000)
+        if total:
+            self.store.incr(self._daily_scope(), key_hash, "total_tokens", total)
+        return total
+
+    def record_response(self, portal: str, provider: str, model: str, response: Any) -> int:
+        """Record the usage reported on a chat completion. Returns its total tokens."""
+        prompt_tokens, completion_tokens = usage_from_response(response)
+        return self.record(portal, provider, model, prompt_tokens, completion_tokens)
+
+    def usage(self) -> Dict[str, Dict[str, Dict[str, Dict[str, float]]]]:
+        """Lifetime usage as {key_hash: {portal: {provider: counters}}}"""
+        result: Dict[str, Dict[str, Dict[str, Dict[str, float]]]] = {}
+        for name, fields in self.store.counters(USAGE_SCOPE).items():
+            key_hash, portal, provider = name.split("|", 2)
+            result.setdefault(key_hash, {}).setdefault(portal, {})[provider] = {
+                "calls": int(fields.get("calls", 0)),
+                "prompt_tokens": int(fields.get("prompt_tokens", 0)),
+                "completion_tokens": int(fields.get("completion_tokens", 0)),
+                "cost_usd": round(fields.get("cost_usd", 0.0), 6)
+            }
+        return result
+
+    def budgets(self) -> Dict[str, Dict[str, Any]]:
+        """Today's usage against the budget for every key seen today (or with a configured budget)"""
+        today = self.store.counters(self._daily_scope())
+        result = {}
+        for key_hash in sorted(set(today) | set(self.key_budgets)):
+            used = int(today.get(key_hash, {}).get("total_tokens", 0))
+            budget = self.budget_for(key_hash)
+            result[key_hash] = {
+                "used_today": used,
+                "daily_budget": budget or None,
+                "remaining": max(0, budget - used) if budget else None
+            }
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "default_daily_budget": self.daily_budget or None,
+            "keys_with_budget": len(self.key_budgets),
+            **self.stats
+        }
+
+
+# Global ledger instance
+token_ledger = TokenLedger(
+    metrics_store,
+    daily_budget=int(os.getenv("AI_DAILY_TOKEN_BUDGET", "0")),
+    key_budgets=parse_key_budgets(os.getenv("AI_TOKEN_BUDGETS", ""))
+)
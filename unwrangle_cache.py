@@ -0,0 +1,217 @@
+"""
+Unwrangle Response Cache
+Persistent SQLite cache of Unwrangle search and detail responses keyed on
+(platform, normalized query or URL, page), shared by every Ferguson lookup
+path and all workers. Search results, zero-hit searches (negative results)
+and detail data have separate TTLs; after its TTL an entry stays servable
+as stale for stale_ttl seconds while the caller revalidates it in the
+background (stale-while-revalidate).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import urllib.parse
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+def normalize_target(platform: str, value: str) -> str:
+    """Normalize a search query or product URL so equivalent requests share an entry"""
+    value = urllib.parse.unquote(str(value or "")).strip()
+    if platform.endswith("_search"):
+        return " ".join(value.upper().split())
+
+    # URLs: scheme and host are case-insensitive, a trailing slash is not significant
+    parts = urllib.parse.urlsplit(value)
+    return urllib.parse.urlunsplit((
+        parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""
+    ))
+
+
+class UnwrangleCache:
+    """Caches Unwrangle JSON responses in a SQLite database"""
+
+    def __init__(self, db_path: str = "data/unwrangle_cache.db", search_ttl: int = 6 * 3600,
+                 detail_ttl: int = 24 * 3600, stale_ttl: int = 7 * 24 * 3600, max_entries: int = 20000,
+                 empty_search_ttl: int = 24 * 3600):
+        self.db_path = db_path
+        self.search_ttl = search_ttl
+        self.detail_ttl = detail_ttl
+        self.empty_search_ttl = empty_search_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize database schema"""
+        cursor = self._conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS unwrangle_cache (
+                cache_key TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                target TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                fresh_until REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_unwrangle_cache_last_accessed ON unwrangle_cache(last_accessed)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_unwrangle_cache_target ON unwrangle_cache(platform, target)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(platform: str, target: str, page: int = 1) -> str:
+        """Content-addressed cache key"""
+        raw = "|".join([platform, normalize_target(platform, target), str(page or 1)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def ttl_for(self, platform: str, payload: Optional[Dict[str, Any]] = None) -> int:
+        if not platform.endswith("_search"):
+            return self.detail_ttl
+        # Zero-hit searches (e.g. unknown hyphen variations) rarely start matching
+        if payload is not None and not payload.get("results"):
+            return self.empty_search_ttl
+        return self.search_ttl
+
+    def get(self, platform: str, target: str, page: int = 1) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Return (payload, FRESH or STALE), or (None, None) on a miss or expired entry"""
+        key = self.make_key(platform, target, page)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fresh_until, stale_until FROM unwrangle_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[2] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM unwrangle_cache WHERE cache_key = ?", (key,))
+                    self._conn.commit()
+                self.stats["misses"] += 1
+                return None, None
+
+            payload, fresh_until, _ = row
+            self._conn.execute(
+                "UPDATE unwrangle_cache SET last_accessed = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+
+        state = FRESH if fresh_until > now else STALE
+        self.stats["hits" if state == FRESH else "stale_hits"] += 1
+        return json.loads(payload), state
+
+    def set(self, platform: str, target: str, page: int, payload: Dict[str, Any]):
+        """Store a response and evict least-recently-used entries beyond max_entries"""
+        key = self.make_key(platform, target, page)
+        now = time.time()
+        fresh_until = now + self.ttl_for(platform, payload)
+
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO unwrangle_cache (
+                    cache_key, platform, target, page, payload,
+                    created_at, fresh_until, stale_until, last_accessed, hit_count
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            """, (
+                key, platform, normalize_target(platform, target), page or 1, json.dumps(payload),
+                now, fresh_until, fresh_until + self.stale_ttl, now
+            ))
+            self.stats["writes"] += 1
+
+            # LRU eviction
+            total = self._conn.execute("SELECT COUNT(*) FROM unwrangle_cache").fetchone()[0]
+            if total > self.max_entries:
+                overflow = total - self.max_entries
+                self._conn.execute("""
+                    DELETE FROM unwrangle_cache WHERE cache_key IN (
+                        SELECT cache_key FROM unwrangle_cache ORDER BY last_accessed ASC LIMIT ?
+                    )
+                """, (overflow,))
+                self.stats["evictions"] += overflow
+
+            self._conn.commit()
+
+    def contains(self, platform: str, target: str, page: int = 1) -> bool:
+        """Whether a servable (fresh or stale) entry exists, without counting a lookup"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM unwrangle_cache WHERE cache_key = ? AND stale_until > ?",
+                (self.make_key(platform, target, page), time.time())
+            ).fetchone()
+        return row is not None
+
+    def invalidate(self, platform: Optional[str] = None, target: Optional[str] = None) -> int:
+        """Delete matching entries (all entries if no filter). Returns number removed."""
+        query = "DELETE FROM unwrangle_cache WHERE 1=1"
+        params = []
+
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+
+        if target:
+            if platform:
+                query += " AND target = ?"
+                params.append(normalize_target(platform, target))
+            else:
+                query += " AND target IN (?, ?)"
+                params.extend([normalize_target("_search", target), normalize_target("_detail", target)])
+
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and entry counts"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT platform, SUM(fresh_until > ?), SUM(fresh_until <= ?)
+                FROM unwrangle_cache WHERE stale_until > ? GROUP BY platform
+            """, (now, now, now)).fetchall()
+
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round((self.stats["hits"] + self.stats["stale_hits"]) / lookups * 100, 2) if lookups > 0 else 0,
+            "entries": {platform: {"fresh": fresh, "stale": stale} for platform, fresh, stale in rows},
+            "search_ttl": self.search_ttl,
+            "detail_ttl": self.detail_ttl,
+            "empty_search_ttl": self.empty_search_ttl,
+            "stale_ttl": self.stale_ttl,
+            "max_entries": self.max_entries
+        }
+
+
+# Global cache instance (DATA_DIR is shared by all workers and the CLI scraper)
+unwrangle_cache = UnwrangleCache(
+    db_path=os.path.join(os.getenv("DATA_DIR", "/opt/render/project/src/data"), "unwrangle_cache.db"),
+    search_ttl=int(os.getenv("UNWRANGLE_CACHE_SEARCH_TTL", "21600")),
+    detail_ttl=int(os.getenv("UNWRANGLE_CACHE_DETAIL_TTL", "86400")),
+    stale_ttl=int(os.getenv("UNWRANGLE_CACHE_STALE_TTL", "604800")),
+    max_entries=int(os.getenv("UNWRANGLE_CACHE_MAX_ENTRIES", "20000")),
+    empty_search_ttl=int(os.getenv("UNWRANGLE_CACHE_EMPTY_TTL", "86400"))
+)
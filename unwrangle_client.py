@@ -0,0 +1,229 @@
+"""
+Unwrangle API Client
+Long-lived async HTTP client shared by every Ferguson lookup path
+(keep-alive, HTTP/2 when available, bounded connection pool, circuit breaker,
+credit ledger with daily caps, persistent response cache)
+"""
+
+import os
+import asyncio
+import urllib.parse
+from typing import Optional, Dict, Any, Set
+import httpx
+from dotenv import load_dotenv
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics_store import metrics_store
+from credit_ledger import credit_ledger
+from unwrangle_cache import UnwrangleCache, unwrangle_cache, STALE
+
+# Load environment variables
+load_dotenv()
+
+UNWRANGLE_API_URL = "https://data.unwrangle.com/api/getter/"
+SEARCH_TIMEOUT = 30  # seconds
+DETAIL_TIMEOUT = 45  # seconds
+CREDITS_PER_CALL = 10  # search and detail both cost 10 credits
+
+# Connection pool sizing
+UNWRANGLE_MAX_CONNECTIONS = int(os.getenv("UNWRANGLE_MAX_CONNECTIONS", "20"))
+UNWRANGLE_MAX_KEEPALIVE = int(os.getenv("UNWRANGLE_MAX_KEEPALIVE", "10"))
+UNWRANGLE_MAX_PER_HOST = int(os.getenv("UNWRANGLE_MAX_PER_HOST", "10"))
+
+# Circuit breaker around the Unwrangle base URL
+UNWRANGLE_BREAKER_FAILURE_THRESHOLD = int(os.getenv("UNWRANGLE_BREAKER_FAILURE_THRESHOLD", "5"))
+UNWRANGLE_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("UNWRANGLE_BREAKER_RECOVERY_TIMEOUT", "30"))
+
+# HTTP/2 requires the optional 'h2' package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class UnwrangleCircuitOpenError(CircuitOpenError, httpx.TransportError):
+    """Unwrangle circuit is open - an httpx.HTTPError so callers map it to 503 like other outages"""
+
+
+class UnwrangleClient:
+    """Async Unwrangle client with a shared connection pool"""
+
+    def __init__(self, base_url: str = UNWRANGLE_API_URL, cache: Optional[UnwrangleCache] = unwrangle_cache):
+        self.base_url = base_url
+        self.cache = cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._revalidating: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+        self.breaker = CircuitBreaker(
+            f"unwrangle:{urllib.parse.urlsplit(base_url).netloc}",
+            failure_threshold=UNWRANGLE_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=UNWRANGLE_BREAKER_RECOVERY_TIMEOUT
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazily create the pooled client inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=UNWRANGLE_MAX_CONNECTIONS,
+                    max_keepalive_connections=UNWRANGLE_MAX_KEEPALIVE,
+                    keepalive_expiry=60.0
+                ),
+                timeout=httpx.Timeout(DETAIL_TIMEOUT, connect=10.0),
+                follow_redirects=True
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Per-host concurrency limit (httpx only bounds the pool as a whole)"""
+        host = urllib.parse.urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(UNWRANGLE_MAX_PER_HOST)
+        return self._host_limits[host]
+
+    @staticmethod
+    def _cache_target(params: Dict[str, Any]) -> tuple:
+        return params.get("platform", "unknown"), params.get("search", params.get("url", "")), params.get("page", 1)
+
+    def is_cached(self, params: Dict[str, Any]) -> bool:
+        """Whether get(params) would be answered from the cache (no credits)"""
+        return self.cache is not None and self.cache.contains(*self._cache_target(params))
+
+    async def get(self, params: Dict[str, Any], timeout: float = DETAIL_TIMEOUT,
+                  use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Get a response from the cache, or from the Unwrangle getter API.
+        Cached responses report credits_used 0; a stale entry is returned at once
+        and refreshed in the background.
+        Raises httpx.HTTPError on transport errors or non-2xx responses
+        (UnwrangleCircuitOpenError without a request while the circuit is open),
+        UnwrangleCreditCapError without a request once the daily hard cap is reached.
+        """
+        if not use_cache or self.cache is None:
+            return await self._fetch(params, timeout)
+
+        platform, target, page = self._cache_target(params)
+        cached, state = self.cache.get(platform, target, page)
+        if cached is not None:
+            metrics_store.incr("unwrangle_cache", platform, "stale_hits" if state == STALE else "hits")
+            if state == STALE:
+                self._revalidate(params, timeout)
+            return {**cached, "credits_used": 0}
+
+        metrics_store.incr("unwrangle_cache", platform, "misses")
+        data = await self._fetch(params, timeout)
+        if data.get("success"):
+            self.cache.set(platform, target, page, data)
+        return data
+
+    def _revalidate(self, params: Dict[str, Any], timeout: float):
+        """Refresh a stale entry in the background (once per entry; skipped past the soft credit cap)"""
+        key = UnwrangleCache.make_key(*self._cache_target(params))
+        if key in self._revalidating or not credit_ledger.allow_optional(CREDITS_PER_CALL):
+            return
+
+        async def refresh():
+            try:
+                data = await self._fetch(params, timeout)
+                if data.get("success"):
+                    self.cache.set(*self._cache_target(params), data)
+            except Exception as e:
+                print(f"Unwrangle cache revalidation failed: {e}")
+            finally:
+                self._revalidating.discard(key)
+
+        self._revalidating.add(key)
+        task = asyncio.ensure_future(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def detach(self, task: asyncio.Task):
+        """
+        Let an in-flight call finish in the background instead of cancelling it, so its
+        credits are recorded and its response cached (aclose still cancels it)
+        """
+        self._background.add(task)
+        task.add_done_callback(self._detached_done)
+
+    def _detached_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled():
+            task.exception()  # Mark retrieved - the caller no longer awaits it
+
+    async def _fetch(self, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Make a GET request to the Unwrangle getter API"""
+        credit_ledger.check(CREDITS_PER_CALL)
+        if not self.breaker.allow_request():
+            raise UnwrangleCircuitOpenError("Unwrangle API circuit is open - failing fast")
+
+        request_params = dict(params)
+        request_params.setdefault("api_key", os.getenv("UNWRANGLE_API_KEY"))
+        platform = request_params.get("platform", "unknown")
+
+        sent = False
+        try:
+            async with self._host_limit(self.base_url):
+                sent = True
+                response = await self.client.get(self.base_url, params=request_params, timeout=timeout)
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            if sent:
+                # Unwrangle bills the request whether or not we read the response
+                metrics_store.incr("unwrangle", platform, "requests")
+                metrics_store.incr("unwrangle", platform, "credits", CREDITS_PER_CALL)
+                credit_ledger.record(platform, CREDITS_PER_CALL)
+            raise
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            credit_ledger.record(platform, 0, success=False)
+            raise
+
+        # Only server-side errors count against the circuit - a 4xx means Unwrangle is up
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        if response.is_error:
+            credit_ledger.record(platform, 0, success=False)
+        response.raise_for_status()
+        data = response.json()
+
+        # Credits spent (shared by all workers; exported via /metrics)
+        credits = data.get("credits_used", CREDITS_PER_CALL) or 0
+        metrics_store.incr("unwrangle", platform, "requests")
+        metrics_store.incr("unwrangle", platform, "credits", credits)
+        credit_ledger.record(platform, credits)
+        return data
+
+    @staticmethod
+    def search_params(query: str, page: int = 1) -> Dict[str, Any]:
+        return {"platform": "fergusonhome_search", "search": query, "page": page}
+
+    @staticmethod
+    def detail_params(url: str) -> Dict[str, Any]:
+        return {"platform": "fergusonhome_detail", "url": urllib.parse.quote(url, safe=''), "page": 1}
+
+    async def search(self, query: str, page: int = 1, timeout: float = SEARCH_TIMEOUT,
+                     use_cache: bool = True) -> Dict[str, Any]:
+        """Search Ferguson Home products (10 credits, none when cached)"""
+        return await self.get(self.search_params(query, page), timeout=timeout, use_cache=use_cache)
+
+    async def detail(self, url: str, timeout: float = DETAIL_TIMEOUT, use_cache: bool = True) -> Dict[str, Any]:
+        """Get Ferguson Home product detail by product URL (10 credits, none when cached)"""
+        return await self.get(self.detail_params(url), timeout=timeout, use_cache=use_cache)
+
+    async def aclose(self):
+        """Close the connection pool (pending cache revalidations are dropped)"""
+        for task in list(self._background):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global client instance
+unwrangle_client = UnwrangleClient()
@@ -127,12 +127,13 @@ class UnwrangleFergusonScraper:
         >>> products = scraper.scrape_models(["model1", "model2"])
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, use_cache: bool = True):
         """
         Initialize the scraper.
         
         Args:
             api_key: Unwrangle API key. If not provided, reads from UNWRANGLE_API_KEY env var.
+            use_cache: Reuse responses from the Unwrangle cache shared with the API server
         """
         self.api_key = api_key or os.getenv("UNWRANGLE_API_KEY")
         if not self.api_key:
@@ -142,8 +143,34 @@ class UnwrangleFergusonScraper:
             )
         
         self.client = httpx.Client(timeout=30.0, follow_redirects=True)
+        
+        # Shared response cache lives in DATA_DIR - imported lazily so the CLI
+        # still works (uncached) where that directory isn't writable
+        self.cache = None
+        if use_cache:
+            try:
+                from unwrangle_cache import unwrangle_cache
+                self.cache = unwrangle_cache
+            except OSError as e:
+                console.log(f"[yellow]⚠[/yellow] Response cache unavailable ({e}) - every lookup uses credits")
+        
         console.log(f"[green]✓[/green] Initialized Unwrangle scraper for Ferguson/Build.com")
     
+    def _cache_get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fresh cached response for request params (credits_used 0), or None (stale entries are refetched)"""
+        if self.cache is None:
+            return None
+        from unwrangle_cache import FRESH
+        data, state = self.cache.get(params["platform"], params.get("search") or params.get("url"), 1)
+        if state == FRESH:
+            console.log("[dim]Using cached response (no credits)[/dim]")
+            return {**data, "credits_used": 0}
+        return None
+    
+    def _cache_set(self, params: Dict[str, Any], data: Dict[str, Any]):
+        if self.cache is not None:
+            self.cache.set(params["platform"], params.get("search") or params.get("url"), 1, data)
+    
     def _normalize_model_number(self, model: str) -> str:
         """
         Normalize model number for URL search.
@@ -208,11 +235,15 @@ class UnwrangleFergusonScraper:
         }
         
         try:
-            console.log(f"[dim]Searching for: {normalized_model}[/dim]")
-            response = self.client.get(UNWRANGLE_API_URL, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._cache_get(params)
+            if data is None:
+                console.log(f"[dim]Searching for: {normalized_model}[/dim]")
+                response = self.client.get(UNWRANGLE_API_URL, params=params)
+                response.raise_for_status()
+                
+                data = response.json()
+                if not data.get("error"):
+                    self._cache_set(params, data)
             
             # Get first result from search
             results = data.get("results", [])
@@ -264,6 +295,10 @@ class UnwrangleFergusonScraper:
             "api_key": self.api_key
         }
         
+        cached = self._cache_get(params)
+        if cached is not None:
+            return cached
+        
         for attempt in range(MAX_RETRIES):
             try:
                 console.log(f"[dim]Request attempt {attempt + 1}/{MAX_RETRIES}[/dim]")
@@ -278,6 +313,7 @@ class UnwrangleFergusonScraper:
                     raise Exception(f"API Error: {data['error']}")
                 
                 console.log(f"[green]✓[/green] Successfully fetched data")
+                self._cache_set(params, data)
                 return data
                 
             except httpx.HTTPStatusError as e:
@@ -778,6 +814,12 @@ Examples:
         help="Unwrangle API key (overrides UNWRANGLE_API_KEY env var)"
     )
     
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always fetch from Unwrangle (skip the shared response cache)"
+    )
+    
     args = parser.parse_args()
     
     # Load environment variables for CLI usage
@@ -793,7 +835,7 @@ Examples:
     
     try:
         # Scrape products
-        with UnwrangleFergusonScraper(api_key=api_key) as scraper:
+        with UnwrangleFergusonScraper(api_key=api_key, use_cache=not args.no_cache) as scraper:
             if args.url:
                 # Treat inputs as URLs
                 products = scraper.scrape_urls(args.inputs)
@@ -0,0 +1,158 @@
+"""
+Variant Matcher
+Indexes the variants of an Unwrangle search response once - by exact model
+number, with separators stripped and with the brand prefix stripped - so a
+requested model number and all of its format variations resolve with dict
+lookups instead of nested loops over every product and variant.
+Matches come back ranked: exact > variation > separator > prefix > partial.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+EXACT = "exact"            # Same model number (case-insensitive)
+VARIATION = "variation"    # Same as a generated format variation (K2362 -> K-2362)
+SEPARATOR = "separator"    # Same once hyphens, underscores, spaces and slashes are removed
+PREFIX = "prefix"          # Same once a brand prefix (K-, G-, UC- ...) is removed, if only one side has one
+PARTIAL = "partial"        # One model number contains the other
+
+TIER_RANK = {EXACT: 0, VARIATION: 1, SEPARATOR: 2, PREFIX: 3, PARTIAL: 4}
+ALL_TIERS = (EXACT, VARIATION, SEPARATOR, PREFIX, PARTIAL)
+
+_SEPARATORS = re.compile(r"[\s\-_/]+")
+_BRAND_PREFIX = re.compile(r"^(?:UC|K|G|M|A|T|R|B|C|D)-")
+
+
+def exact_key(model: Optional[str]) -> str:
+    return (model or "").strip().upper()
+
+
+def separator_key(model: Optional[str]) -> str:
+    return _SEPARATORS.sub("", exact_key(model))
+
+
+def prefix_key(model: Optional[str]) -> str:
+    return separator_key(_BRAND_PREFIX.sub("", exact_key(model)))
+
+
+def brand_prefix(model: Optional[str]) -> str:
+    """Brand prefix of a model number without its hyphen ('K' for K-2362, '' if none)"""
+    prefix = _BRAND_PREFIX.match(exact_key(model))
+    return prefix.group(0)[:-1] if prefix else ""
+
+
+@dataclass
+class VariantMatch:
+    """One variant matching a requested model number"""
+    url: Optional[str]
+    model_no: Optional[str]
+    tier: str
+    product_index: int
+    variant_index: int
+    product: Dict[str, Any]
+    variant: Dict[str, Any]
+
+    @property
+    def match_type(self) -> str:
+        """Legacy match type ('exact', 'variation', 'prefix' or 'partial') returned by find_matching_variant"""
+        return self.tier if self.tier in (EXACT, PREFIX, PARTIAL) else VARIATION
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"model_no": self.model_no, "url": self.url, "tier": self.tier}
+
+
+class VariantIndex:
+    """Hash indexes over the variants of a list of search result products"""
+
+    def __init__(self, products: Iterable[Dict[str, Any]]):
+        self.products = list(products)
+        self._entries: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._separator: Dict[str, List[int]] = {}
+        self._prefix: Dict[str, List[int]] = {}
+
+        for product_index, product in enumerate(self.products):
+            for variant_index, variant in enumerate(product.get("variants") or []):
+                key = exact_key(variant.get("model_no"))
+                if not key:
+                    continue
+                entry = len(self._entries)
+                self._entries.append((product_index, variant_index, variant))
+                self._exact.setdefault(key, []).append(entry)
+                self._separator.setdefault(separator_key(key), []).append(entry)
+                self._prefix.setdefault(prefix_key(key), []).append(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def models(self) -> List[Optional[str]]:
+        """Model numbers of every variant, in search result order"""
+        return [
+            variant.get("model_no")
+            for product in self.products for variant in product.get("variants") or []
+        ]
+
+    def match(self, model_number: str, variations: Iterable[str] = (),
+              tiers: Iterable[str] = ALL_TIERS) -> List[VariantMatch]:
+        """
+        All variants matching model_number, best first. Within a tier, matches
+        follow the order of variations, then search result order.
+        """
+        tiers = set(tiers)
+        query = exact_key(model_number)
+        best: Dict[int, Tuple[int, int]] = {}  # entry -> (tier rank, variation position)
+
+        def add(entries: List[int], tier: str, position: int = 0):
+            rank = (TIER_RANK[tier], position)
+            for entry in entries:
+                if entry not in best or rank < best[entry]:
+                    best[entry] = rank
+
+        if not query:
+            return []
+
+        if EXACT in tiers:
+            add(self._exact.get(query, []), EXACT)
+        if VARIATION in tiers:
+            for position, variation in enumerate(variations):
+                key = exact_key(variation)
+                if key != query:
+                    add(self._exact.get(key, []), VARIATION, position)
+        if SEPARATOR in tiers:
+            add(self._separator.get(separator_key(query), []), SEPARATOR)
+        if PREFIX in tiers:
+            # K-2362 matches 2362 (and vice versa) but never another brand's T-2362
+            query_prefix = brand_prefix(query)
+            add([
+                entry for entry in self._prefix.get(prefix_key(query), [])
+                if not query_prefix or not brand_prefix(self._entries[entry][2].get("model_no")) or
+                brand_prefix(self._entries[entry][2].get("model_no")) == query_prefix
+            ], PREFIX)
+        if PARTIAL in tiers:
+            # One pass over the distinct model numbers (already upper-cased)
+            for key, entries in self._exact.items():
+                if query in key or key in query:
+                    add(entries, PARTIAL)
+
+        tier_names = {rank: tier for tier, rank in TIER_RANK.items()}
+        matches = []
+        for entry, (rank, position) in sorted(best.items(), key=lambda item: (item[1], item[0])):
+            product_index, variant_index, variant = self._entries[entry]
+            matches.append(VariantMatch(
+                url=variant.get("url"),
+                model_no=variant.get("model_no"),
+                tier=tier_names[rank],
+                product_index=product_index,
+                variant_index=variant_index,
+                product=self.products[product_index],
+                variant=variant
+            ))
+        return matches
+
+    def best_by_product(self, model_number: str, tiers: Iterable[str] = (EXACT, SEPARATOR)) -> Dict[int, VariantMatch]:
+        """Best matching variant of each product that has one, keyed by product position"""
+        result: Dict[int, VariantMatch] = {}
+        for match in self.match(model_number, tiers=tiers):
+            result.setdefault(match.product_index, match)
+        return result